@@ -0,0 +1,3 @@
+# Benchmarks of work_hours.py, run from the repository directory, e.g.
+#   python -m benchmarks.bench_manifests
+#   python -m benchmarks.bench_hot_paths
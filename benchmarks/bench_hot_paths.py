@@ -0,0 +1,240 @@
+#######################################################
+# bench_hot_paths.py - Scaling of the work_hrs_help hot paths with the size of the work history
+#######################################################
+# A synthetic database is written for each number of years and every hot path is timed on it, then run once
+#   more under tracemalloc for its peak memory. The results and the scaling exponent of each hot path (the
+#   slope of log time over log shifts, 1 is linear) are printed as JSON. Nothing imports PySimpleGUI, run from
+#   the repository directory:
+#     python -m benchmarks.bench_hot_paths --years 1 2 4 8 --output bench_hot_paths.json
+import argparse
+import datetime as dt
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from loguru import logger
+import work_hrs_help as wh
+from benchmarks import synthetic
+
+DATE_FMT_STR = "%Y-%m-%d"
+
+
+def build_cases(shifts_df):
+    """
+    Build the hot path calls to time on the shifts of a database
+
+    :param shifts_df: DataFrame of shifts for all jobs, as returned by read_shifts_table()
+    :return: dict of (function without arguments, number of operations it does) tuples by name
+    """
+    shift_stores = wh.build_shift_stores(shifts_df)
+    eight_day_df = wh.compute_eight_day_df(shifts_df)
+    first_day = dt.datetime.strptime(shifts_df.date.min(), DATE_FMT_STR)
+    last_day = dt.datetime.strptime(shifts_df.date.max(), DATE_FMT_STR)
+    num_days = (last_day - first_day).days + 1
+    week_days = [first_day + dt.timedelta(days=idx) for idx in range(0, num_days, 7)]
+    job = shifts_df.job.value_counts().index[0]
+    # check_for_time_errors() sorts its DataFrame in place, sorting it again changes nothing
+    work_hrs_df = shifts_df[shifts_df.job == job].copy()
+
+    return {
+        "read_shifts_table": (wh.read_shifts_table, 1),
+        "compute_eight_day_df": (lambda: wh.compute_eight_day_df(shifts_df), 1),
+        "get_report_str": (
+            lambda: wh.get_report_str(shift_stores, first_day, last_day, eight_day_df),
+            num_days,
+        ),
+        "Week": (
+            lambda: [wh.Week(shift_stores[job], day) for day in week_days],
+            len(week_days),
+        ),
+        "WorkTimeRange": (
+            lambda: wh.WorkTimeRange(shift_stores[job], first_day, last_day),
+            1,
+        ),
+        "display_alerts": (lambda: wh.display_alerts(eight_day_df), 1),
+        "check_for_time_errors": (lambda: wh.check_for_time_errors(work_hrs_df), 1),
+        "check_for_scheduled_updates": (wh.check_for_scheduled_updates, 1),
+    }
+
+
+def time_case(func, repeat):
+    """return the seconds of the fastest of repeat calls of a function"""
+    best_secs = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best_secs = min(best_secs, time.perf_counter() - start)
+    return best_secs
+
+
+def measure_peak_kib(func):
+    """return the peak KiB allocated during a call of a function, over what was allocated before it"""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round((peak - before) / 1024, 1)
+
+
+def fit_scaling(points):
+    """
+    Fit the exponent of a power law to the times of a hot path
+
+    :param points: list of (number of shifts, seconds) tuples
+    :return: least squares slope of log seconds over log shifts, None with fewer than two sizes
+    """
+    if len(points) < 2:
+        return None
+    xs = [math.log(num_shifts) for num_shifts, _ in points]
+    ys = [math.log(max(secs, 1e-9)) for _, secs in points]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    x_var = sum((x - x_mean) ** 2 for x in xs)
+    if x_var == 0:
+        return None
+    slope = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / x_var
+    return round(slope, 3)
+
+
+def parse_job_mix(job_mix_str):
+    """argparse type for job mixes, e.g. bus=0.7,HD=0.4"""
+    job_mix = {}
+    try:
+        for item in job_mix_str.split(","):
+            job, fraction_str = item.split("=")
+            job_mix[job.strip()] = float(fraction_str)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"{job_mix_str} is not a job mix like bus=0.7,HD=0.4"
+        )
+    return job_mix
+
+
+def run_benchmark(years_list, shifts_per_day, job_mix, repeat, seed, memory=True):
+    """
+    Time every hot path on a synthetic database of each size
+
+    :param years_list: list of numbers of years of shifts, one database each
+    :param shifts_per_day: largest number of shifts of a job on a day
+    :param job_mix: dict of the fraction of the days each job is worked by job
+    :param repeat: number of calls of each hot path, the fastest one is kept
+    :param seed: seed of the random generator
+    :param memory: measure the peak memory of each hot path
+    :return: dict of the sizes, the results of each hot path by name and their scaling exponents
+    """
+    sizes = []
+    results = {}
+    for years in years_list:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            num_shifts = synthetic.write_synthetic_db(
+                os.path.join(tmp_dir, "work_hours.sqlite"),
+                years,
+                shifts_per_day,
+                job_mix,
+                seed,
+            )
+            print(f"{years} years: {num_shifts} shifts", file=sys.stderr)
+            sizes.append({"years": years, "shifts": num_shifts})
+
+            for name, (func, num_ops) in build_cases(wh.read_shifts_table()).items():
+                secs = time_case(func, repeat)
+                result = {
+                    "years": years,
+                    "shifts": num_shifts,
+                    "ops": num_ops,
+                    "seconds": round(secs, 6),
+                    "seconds_per_op": round(secs / num_ops, 9),
+                }
+                if memory:
+                    result["peak_kib"] = measure_peak_kib(func)
+                results.setdefault(name, []).append(result)
+                print(f"  {name}: {secs:.4f} s", file=sys.stderr)
+            # close the connections before the database is deleted
+            wh.set_db_path(None)
+
+    scaling = {
+        name: fit_scaling(
+            [(result["shifts"], result["seconds"]) for result in name_results]
+        )
+        for name, name_results in results.items()
+    }
+    return {"sizes": sizes, "results": results, "scaling": scaling}
+
+
+def main(argv=None):
+    """
+    Run the hot path benchmark
+
+    :param argv: list of arguments, defaults to sys.argv[1:]
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(
+        description="Time the work_hrs_help hot paths on synthetic multi-year databases."
+    )
+    parser.add_argument(
+        "--years",
+        type=float,
+        nargs="+",
+        default=[1, 2, 4, 8],
+        help="years of shifts of each database, default 1 2 4 8",
+    )
+    parser.add_argument(
+        "--shifts-per-day",
+        type=int,
+        default=2,
+        help="largest number of shifts of a job on a day, default 2",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=parse_job_mix,
+        default=synthetic.DEFAULT_JOB_MIX,
+        help="fraction of the days each job is worked, default bus=0.7,HD=0.4,delivery=0.15",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="calls of each hot path, default 3"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed, default 0")
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the peak memory measures"
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    results = {
+        "params": {
+            "years": args.years,
+            "shifts_per_day": args.shifts_per_day,
+            "jobs": args.jobs,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+    }
+    results.update(
+        run_benchmark(
+            args.years,
+            args.shifts_per_day,
+            args.jobs,
+            args.repeat,
+            args.seed,
+            not args.no_memory,
+        )
+    )
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
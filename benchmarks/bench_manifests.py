@@ -0,0 +1,206 @@
+#######################################################
+# bench_manifests.py - Manifest grammar checks and parse throughput
+#######################################################
+# Every manifest of the sample corpus is parsed and checked against manifests/expected.json, then the corpus
+#   is repeated into a large text and the time to parse it is measured. Run from the repository directory:
+#     python -m benchmarks.bench_manifests --output bench_manifests.json
+#     python -m benchmarks.bench_manifests --baseline bench_manifests.json
+#   The exit status is 1 if a sample isn't read as expected or a throughput dropped below the baseline.
+import argparse
+import json
+import os
+import sys
+import time
+from loguru import logger
+import work_hrs_manifest
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manifests")
+EXPECTED_FILE_NAME = "expected.json"
+
+
+def read_corpus(corpus_dir=CORPUS_DIR):
+    """
+    Read the sample manifests
+
+    :param corpus_dir: directory of the sample manifest text files
+    :return: dict of lists of the lines of each file by file name
+    """
+    corpus = {}
+    for file_name in sorted(os.listdir(corpus_dir)):
+        if file_name.endswith(".txt"):
+            with open(os.path.join(corpus_dir, file_name), encoding="utf-8") as f:
+                corpus[file_name] = f.read().splitlines()
+    return corpus
+
+
+def schedule_to_dict(line_num, schedule, error_str):
+    """return the result of reading a manifest in the format of expected.json"""
+    if schedule is None:
+        return {"line": line_num, "error": error_str}
+    return {
+        "line": line_num,
+        "grammar": schedule.grammar,
+        "week_of": schedule.week_of_str,
+        "days": {str(idx): shifts for idx, shifts in schedule.days.items()},
+    }
+
+
+def check_corpus(corpus, expected):
+    """
+    Parse every sample manifest and compare it with the expected week schedule
+
+    :param corpus: dict of lists of lines by file name, as returned by read_corpus()
+    :param expected: dict of lists of expected results by file name, from expected.json
+    :return: list of strings describing the differences, empty if every sample is read as expected
+    """
+    mismatches = []
+    for file_name, lines in corpus.items():
+        results = [
+            schedule_to_dict(*result)
+            for result in work_hrs_manifest.iter_manifests(lines)
+        ]
+        if file_name not in expected:
+            mismatches.append(f"{file_name}: not in {EXPECTED_FILE_NAME}")
+        elif results != expected[file_name]:
+            mismatches.append(
+                f"{file_name}: read {json.dumps(results)},"
+                f" expected {json.dumps(expected[file_name])}"
+            )
+    return mismatches
+
+
+def time_parse(lines, repeat):
+    """
+    Time the parse of text with any number of manifests
+
+    :param lines: list of lines of text
+    :param repeat: number of runs, the fastest one is kept
+    :return: tuple (seconds of the fastest run, number of manifests)
+    """
+    best_secs = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        num_manifests = sum(1 for _ in work_hrs_manifest.iter_manifests(lines))
+        secs = time.perf_counter() - start
+        best_secs = secs if best_secs is None else min(best_secs, secs)
+    return best_secs, num_manifests
+
+
+def run_benchmark(corpus, num_manifests, repeat):
+    """
+    Measure the parse throughput of each sample file and of the whole corpus, each repeated into a text of about
+      num_manifests manifests
+
+    :param corpus: dict of lists of lines by file name, as returned by read_corpus()
+    :param num_manifests: number of manifests to parse for each measure
+    :param repeat: number of runs of each measure, the fastest one is kept
+    :return: dict of results by file name, "corpus" for the whole corpus
+    """
+    texts = dict(corpus)
+    texts["corpus"] = [line for lines in corpus.values() for line in lines]
+
+    results = {}
+    for name, lines in texts.items():
+        # separate the copies so a manifest without a start line doesn't run into the next one
+        lines = lines + [""]
+        file_manifests = sum(1 for _ in work_hrs_manifest.iter_manifest_texts(lines))
+        big_lines = lines * max(1, num_manifests // max(1, file_manifests))
+        secs, parsed_manifests = time_parse(big_lines, repeat)
+        num_bytes = sum(len(line) + 1 for line in big_lines)
+        results[name] = {
+            "manifests": parsed_manifests,
+            "bytes": num_bytes,
+            "seconds": round(secs, 6),
+            "manifests_per_sec": round(parsed_manifests / secs, 1),
+            "mb_per_sec": round(num_bytes / secs / 1e6, 3),
+        }
+    return results
+
+
+def compare_baseline(results, baseline, tolerance):
+    """
+    Compare the throughputs with a baseline run
+
+    :param results: results of this run, as returned by run_benchmark()
+    :param baseline: results of the baseline run
+    :param tolerance: fraction the throughput may drop below the baseline
+    :return: list of strings describing the regressions
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        # text without a start line is one manifest, the rate is compared in bytes
+        min_rate = baseline[name]["mb_per_sec"] * (1 - tolerance)
+        if result["mb_per_sec"] < min_rate:
+            regressions.append(
+                f"{name}: {result['mb_per_sec']} MB/s,"
+                f" baseline {baseline[name]['mb_per_sec']}"
+            )
+    return regressions
+
+
+def main(argv=None):
+    """
+    Run the manifest benchmark
+
+    :param argv: list of arguments, defaults to sys.argv[1:]
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(
+        description="Check the sample manifests and measure the parse throughput."
+    )
+    parser.add_argument(
+        "--manifests",
+        type=int,
+        default=20000,
+        help="manifests parsed for each measure, default 20000",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="runs of each measure, default 5"
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.3,
+        help="fraction the throughput may drop below the baseline, default 0.3",
+    )
+    args = parser.parse_args(argv)
+
+    # the parse logs every manifest at debug level
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    corpus = read_corpus()
+    with open(os.path.join(CORPUS_DIR, EXPECTED_FILE_NAME), encoding="utf-8") as f:
+        expected = json.load(f)
+    mismatches = check_corpus(corpus, expected)
+    for mismatch_str in mismatches:
+        print(mismatch_str, file=sys.stderr)
+
+    results = {
+        "grammars": [grammar.name for grammar in work_hrs_manifest.MANIFEST_GRAMMARS],
+        "throughput": run_benchmark(corpus, args.manifests, args.repeat),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(
+            results["throughput"], baseline["throughput"], args.tolerance
+        )
+        for regression_str in regressions:
+            print(f"Slower than baseline: {regression_str}", file=sys.stderr)
+
+    return 1 if mismatches or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
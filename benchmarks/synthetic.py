@@ -0,0 +1,105 @@
+#######################################################
+# synthetic.py - Synthetic work hours databases for the benchmarks
+#######################################################
+import datetime as dt
+import random
+import work_hrs_help as wh
+
+DATE_FMT_STR = "%Y-%m-%d"
+# fraction of the days each job is worked
+DEFAULT_JOB_MIX = {"bus": 0.7, "HD": 0.4, "delivery": 0.15}
+# shifts fall between these minutes of the day
+FIRST_SHIFT_MIN = 4 * 60
+LAST_SHIFT_MIN = 24 * 60 - 5
+# fraction of the past days whose shifts are still marked as scheduled
+PENDING_UPDATE_RATE = 0.01
+
+
+def generate_shifts(years, shifts_per_day=2, job_mix=None, end_date=None, seed=0):
+    """
+    Generate the shifts of a multi-year work history. The day is split into a window for every shift a day can
+      have, so shifts never overlap, even across jobs. Shifts after today are scheduled, a few past ones are too.
+
+    :param years: number of years of shifts, can be a fraction
+    :param shifts_per_day: largest number of shifts of a job on a day
+    :param job_mix: dict of the fraction of the days each job is worked by job, defaults to DEFAULT_JOB_MIX
+    :param end_date: date object of the last day, defaults to two weeks after today
+    :param seed: seed of the random generator, the same arguments always generate the same shifts
+    :return: list of (job, date, start, end, scheduled) tuples in date and time order
+    """
+    rng = random.Random(seed)
+    job_mix = job_mix or DEFAULT_JOB_MIX
+    today = dt.date.today()
+    end_date = end_date or today + dt.timedelta(days=14)
+    num_days = max(1, round(365.25 * years))
+
+    num_windows = shifts_per_day * len(job_mix)
+    window_mins = (LAST_SHIFT_MIN - FIRST_SHIFT_MIN) // num_windows
+    if window_mins < 60:
+        raise ValueError(f"{num_windows} shifts don't fit in a day")
+    windows = [FIRST_SHIFT_MIN + idx * window_mins for idx in range(num_windows)]
+
+    shifts = []
+    for day_idx in range(num_days):
+        day = end_date - dt.timedelta(days=num_days - 1 - day_idx)
+        date_str = day.strftime(DATE_FMT_STR)
+        pending = day < today and rng.random() < PENDING_UPDATE_RATE
+        free_windows = rng.sample(windows, num_windows)
+        day_shifts = []
+        for job, fraction in job_mix.items():
+            if rng.random() >= fraction:
+                continue
+            for _ in range(rng.randint(1, shifts_per_day)):
+                window_start = free_windows.pop()
+                # at least 30 minutes long, on a 5 minute grid
+                start = window_start + 5 * rng.randrange(window_mins // 10)
+                end = rng.randrange(start + 30, window_start + window_mins + 1, 5)
+                day_shifts.append((start, end, job))
+        for start, end, job in sorted(day_shifts):
+            shifts.append(
+                (
+                    job,
+                    date_str,
+                    f"{date_str} {start // 60:02}:{start % 60:02}",
+                    f"{date_str} {end // 60:02}:{end % 60:02}",
+                    int(day > today or pending),
+                )
+            )
+    return shifts
+
+
+def write_synthetic_db(db_path, years, shifts_per_day=2, job_mix=None, seed=0):
+    """
+    Create a work hours database of synthetic shifts and use it for this session. Jobs of the mix that aren't
+      default jobs are added to the job registry.
+
+    :param db_path: path of the new database file
+    :param years: number of years of shifts
+    :param shifts_per_day: largest number of shifts of a job on a day
+    :param job_mix: dict of the fraction of the days each job is worked by job, defaults to DEFAULT_JOB_MIX
+    :param seed: seed of the random generator
+    :return: number of shifts written
+    """
+    job_mix = job_mix or DEFAULT_JOB_MIX
+    shifts = generate_shifts(years, shifts_per_day, job_mix, seed=seed)
+
+    wh.set_db_path(db_path)
+    # the first connection creates the tables and the default jobs
+    conn = wh.connect_db()
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO jobs (job, label, abbrev, position)"
+            " VALUES (?, ?, ?, ?)",
+            [
+                (job, job, job[:3], position)
+                for position, job in enumerate(job_mix, len(wh.DEFAULT_JOBS))
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO shifts (job, date, start, end, scheduled)"
+            " VALUES (?, ?, ?, ?, ?)",
+            shifts,
+        )
+    # the job registry is read once per session, read it again with the new jobs
+    wh.set_db_path(db_path)
+    return len(shifts)
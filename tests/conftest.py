@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import work_hrs_help as wh
+
+
+@pytest.fixture
+def db(tmp_path):
+    """use an empty work hours database in a temporary directory, created with the default jobs"""
+    wh.set_db_path(str(tmp_path / "work_hours.sqlite"))
+    conn = wh.connect_db()
+    yield conn
+    wh.set_db_path(None)
+
+
+def add_shifts(conn, shifts, scheduled=0):
+    """
+    insert (job, date, start, end) shifts into the shifts table, start and end as HH:MM on the date, and drop
+      what the session cached from the shifts table
+    """
+    with conn:
+        conn.executemany(
+            "INSERT INTO shifts (job, date, start, end, scheduled) VALUES (?, ?, ?, ?, ?)",
+            [
+                (job, date, f"{date} {start}", f"{date} {end}", scheduled)
+                for job, date, start, end in shifts
+            ],
+        )
+    wh.eight_day_cache.clear()
+    wh.shift_interval_index.clear()
+    wh.week_cache.clear()
@@ -0,0 +1,287 @@
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+import work_hrs_help as wh
+from conftest import add_shifts
+
+
+def report_lines(beg_date_str, end_date_str):
+    return list(
+        wh.iter_report_lines(
+            dt.datetime.strptime(beg_date_str, wh.DATE_FMT_STR),
+            dt.datetime.strptime(end_date_str, wh.DATE_FMT_STR),
+            wh.eight_day_cache.get_eight_day_df(),
+        )
+    )
+
+
+def test_report_title_keeps_delivery_shift_title(db):
+    title_str = report_lines("2022-06-01", "2022-06-01")[0]
+    assert "--Del Shift--" in title_str
+    assert "---Del Shift---" not in title_str
+
+
+def test_report_range_past_the_data(db):
+    add_shifts(
+        db,
+        [
+            ("bus", "2022-06-01", "06:00", "09:00"),
+            ("delivery", "2022-06-02", "10:00", "14:00"),
+        ],
+    )
+    lines = report_lines("2022-05-28", "2022-06-12")
+    for date_str in ["2022-05-28", "2022-06-01", "2022-06-12"]:
+        assert any(date_str in line for line in lines)
+    # the days after the last shift keep the 8-day total of the shifts before them
+    (last_line,) = [line for line in lines if "2022-06-08" in line]
+    assert last_line.rstrip().endswith("7:00")
+
+
+def test_report_on_empty_database(db):
+    lines = report_lines("2022-06-01", "2022-06-03")
+    assert sum("2022-06-0" in line for line in lines) == 3
+
+
+SHIFT_COLUMNS = ["date", "start", "end", "scheduled"]
+
+
+def read_saved(job, beg_date_str=None, end_date_str=None):
+    """return the saved shifts of a job in the format compute_shifts_changeset() diffs"""
+    return wh.read_work_hrs_table(job, beg_date_str, end_date_str).reset_index()[
+        ["id"] + SHIFT_COLUMNS
+    ]
+
+
+def make_shifts_df(shifts):
+    """return a work hours DataFrame of (date, start, end) shifts, start and end as HH:MM on the date"""
+    return pd.DataFrame(
+        [(date, f"{date} {start}", f"{date} {end}", 0) for date, start, end in shifts],
+        columns=SHIFT_COLUMNS,
+    )
+
+
+def save_day(job, date_str, shifts):
+    """save the (start, end) shifts of a job on a date like the shifts window does"""
+    return wh.apply_shifts_changeset(
+        job,
+        wh.compute_shifts_changeset(
+            read_saved(job, date_str, date_str),
+            make_shifts_df([(date_str, start, end) for start, end in shifts]),
+        ),
+    )
+
+
+def test_changeset_and_inverse_round_trip(db):
+    add_shifts(
+        db,
+        [
+            ("bus", "2022-06-01", "06:00", "09:00"),
+            ("bus", "2022-06-01", "14:00", "16:00"),
+            ("bus", "2022-06-02", "06:00", "09:00"),
+        ],
+    )
+    saved_df = read_saved("bus")
+    new_df = make_shifts_df(
+        [
+            ("2022-06-01", "06:30", "09:00"),
+            ("2022-06-02", "06:00", "09:00"),
+            ("2022-06-03", "07:00", "08:00"),
+        ]
+    )
+
+    changeset_df = wh.compute_shifts_changeset(saved_df, new_df)
+    assert changeset_df.action.tolist() == ["update", "delete", "insert"]
+    written_df = wh.apply_shifts_changeset("bus", changeset_df)
+    assert read_saved("bus")[SHIFT_COLUMNS].values.tolist() == new_df.values.tolist()
+
+    wh.apply_shifts_changeset("bus", wh.invert_shifts_changeset(written_df), "undo")
+    # the deleted shift comes back with its id
+    assert read_saved("bus").values.tolist() == saved_df.values.tolist()
+    assert wh.compute_shifts_changeset(saved_df, saved_df[SHIFT_COLUMNS]).empty
+
+
+@pytest.mark.parametrize(
+    "change", ["update", "insert_past_end", "delete_first", "undo_insert", "delete_all"]
+)
+def test_eight_day_cache_matches_full_compute(db, change):
+    add_shifts(
+        db,
+        [
+            ("bus", "2022-06-01", "06:00", "09:00"),
+            ("HD", "2022-06-02", "10:00", "16:00"),
+            ("bus", "2022-06-05", "06:00", "09:00"),
+        ],
+    )
+    wh.eight_day_cache.get_eight_day_df()
+
+    if change == "update":
+        save_day("bus", "2022-06-05", [("05:00", "11:00")])
+    elif change == "insert_past_end":
+        save_day("bus", "2022-06-12", [("06:00", "08:00")])
+    elif change == "delete_first":
+        save_day("bus", "2022-06-01", [])
+    elif change == "undo_insert":
+        save_day("bus", "2022-06-12", [("06:00", "08:00")])
+        wh.undo_last_change("bus")
+    elif change == "delete_all":
+        save_day("bus", "2022-06-01", [])
+        save_day("bus", "2022-06-05", [])
+        save_day("HD", "2022-06-02", [])
+
+    pd.testing.assert_frame_equal(
+        wh.eight_day_cache.get_eight_day_df(),
+        wh.compute_eight_day_df(wh.read_shifts_table()),
+        check_dtype=False,
+    )
+
+
+def test_interval_index_overlaps_and_conflicts(db):
+    add_shifts(
+        db,
+        [
+            ("bus", "2022-06-01", "06:00", "09:00"),
+            ("HD", "2022-06-01", "09:00", "12:00"),
+            ("delivery", "2022-06-01", "11:00", "13:00"),
+            ("bus", "2022-06-02", "06:00", "09:00"),
+        ],
+    )
+    index = wh.shift_interval_index
+    assert [
+        shift[0]
+        for shift in index.find_overlaps("2022-06-01 08:00", "2022-06-01 09:30")
+    ] == [
+        "bus",
+        "HD",
+    ]
+    assert [
+        shift[0]
+        for shift in index.find_overlaps(
+            "2022-06-01 08:00", "2022-06-01 09:30", exclude_job="bus"
+        )
+    ] == ["HD"]
+    # back to back shifts don't overlap
+    assert index.find_overlaps("2022-06-01 12:00", "2022-06-01 14:00") == [
+        ("delivery", "2022-06-01 11:00", "2022-06-01 13:00")
+    ]
+    assert index.find_overlaps("2022-06-01 05:00", "2022-06-01 06:00") == []
+    assert index.find_conflicts() == [
+        (
+            ("HD", "2022-06-01 09:00", "2022-06-01 12:00"),
+            ("delivery", "2022-06-01 11:00", "2022-06-01 13:00"),
+        )
+    ]
+
+    # a save updates the index in place
+    save_day("delivery", "2022-06-01", [("12:00", "13:00")])
+    assert index.find_conflicts() == []
+    assert index.find_overlaps("2022-06-01 12:30", "2022-06-01 12:45") == [
+        ("delivery", "2022-06-01 12:00", "2022-06-01 13:00")
+    ]
+
+
+def test_back_to_back_shifts_are_valid():
+    assert wh.validate_day_shifts(["06:00-09:00", "09:00-10:00"]) == ""
+    assert wh.validate_day_shifts(["06:00-09:00", "08:59-10:00"]) != ""
+    assert wh.validate_day_shifts(["06:00-09:00"], {"HD": ["09:00-12:00"]}) == ""
+    assert wh.validate_day_shifts(["06:00-09:01"], {"HD": ["09:00-12:00"]}) != ""
+
+    work_hrs_df = make_shifts_df(
+        [("2022-06-01", "06:00", "09:00"), ("2022-06-01", "09:00", "10:00")]
+    )
+    assert wh.check_for_time_errors(work_hrs_df.copy()) == ""
+    work_hrs_df.loc[1, "start"] = "2022-06-01 08:59"
+    assert wh.check_for_time_errors(work_hrs_df.copy()) != ""
+
+
+def test_hours_headroom(db):
+    add_shifts(
+        db,
+        [
+            ("bus", "2022-06-01", "06:00", "16:00"),
+            ("HD", "2022-06-03", "08:00", "20:00"),
+        ],
+    )
+    hours_headroom = wh.HoursHeadroom(wh.eight_day_cache.get_eight_day_df())
+
+    headroom = hours_headroom.get_headroom("2022-06-01", "bus")
+    assert headroom["15_work_hrs"] == dt.timedelta(hours=5)
+    assert headroom["12_drive_hrs"] == dt.timedelta(hours=2)
+    # the 8-day windows ending from 06-03 on hold both days
+    assert headroom["80_hrs"] == dt.timedelta(hours=58)
+
+    headroom = hours_headroom.get_headroom(
+        "2022-06-03", "HD", {"2022-06-03": dt.timedelta(hours=-2)}
+    )
+    assert headroom["15_work_hrs"] == dt.timedelta(hours=5)
+    assert headroom["12_drive_hrs"] is None
+    assert headroom["80_hrs"] == dt.timedelta(hours=60)
+
+    # dates outside of the history have all the hours left
+    headroom = hours_headroom.get_headroom("2022-07-01", "bus")
+    assert headroom == {
+        "80_hrs": dt.timedelta(hours=80),
+        "15_work_hrs": dt.timedelta(hours=15),
+        "12_drive_hrs": dt.timedelta(hours=12),
+    }
+
+
+def count_scheduled(conn):
+    return conn.execute("SELECT COUNT(*) FROM shifts WHERE scheduled = 1").fetchone()[0]
+
+
+def test_confirm_scheduled_shifts(db):
+    future_date_str = (dt.date.today() + dt.timedelta(days=3)).strftime(wh.DATE_FMT_STR)
+    add_shifts(
+        db,
+        [
+            ("bus", "2022-06-01", "06:00", "09:00"),
+            ("bus", "2022-06-02", "06:00", "09:00"),
+            ("HD", "2022-06-02", "10:00", "14:00"),
+            ("bus", future_date_str, "06:00", "09:00"),
+        ],
+        scheduled=1,
+    )
+
+    shifts_df = wh.confirm_scheduled_shifts(dry_run=True)
+    assert shifts_df[["job", "date"]].values.tolist() == [
+        ["HD", "2022-06-02"],
+        ["bus", "2022-06-01"],
+        ["bus", "2022-06-02"],
+    ]
+    assert count_scheduled(db) == 4
+
+    shifts_df = wh.confirm_scheduled_shifts(exclude_dates=["2022-06-02"])
+    assert shifts_df[["job", "date"]].values.tolist() == [["bus", "2022-06-01"]]
+    assert count_scheduled(db) == 3
+
+    wh.undo_last_change("bus")
+    assert count_scheduled(db) == 4
+    assert wh.confirm_scheduled_shifts(jobs=["HD"]).job.tolist() == ["HD"]
+    assert count_scheduled(db) == 3
+
+
+def alert_messages(eight_day_window=0, daily_tot_hrs=0, drive_tot_hrs=0):
+    """return the (rule, severity) of the alerts of one date with the hours given"""
+    eight_day_df = pd.DataFrame(
+        {
+            "date": ["2022-06-01"],
+            "eight_day_window": [pd.Timedelta(hours=eight_day_window)],
+            "daily_tot_hrs": [pd.Timedelta(hours=daily_tot_hrs)],
+            "drive_tot_hrs": [pd.Timedelta(hours=drive_tot_hrs)],
+        }
+    )
+    alerts_df = wh.evaluate_alerts(eight_day_df)
+    return list(zip(alerts_df.rule, alerts_df.severity))
+
+
+def test_alert_tiers_at_the_thresholds():
+    # like the original display_alerts(), a value at the threshold of a warning is neither a warning nor a note
+    assert alert_messages(eight_day_window=75) == []
+    assert alert_messages(daily_tot_hrs=12) == []
+    assert alert_messages(drive_tot_hrs=10) == []
+    assert alert_messages(eight_day_window=75.5) == [("80_hrs", "warning")]
+    assert alert_messages(eight_day_window=80) == [("80_hrs", "alert")]
+    assert alert_messages(daily_tot_hrs=11) == [("15_work_hrs", "note")]
+    assert alert_messages(drive_tot_hrs=8) == []
@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+import work_hrs_manifest
+from benchmarks import bench_manifests
+
+CORPUS = bench_manifests.read_corpus()
+with open(
+    os.path.join(bench_manifests.CORPUS_DIR, bench_manifests.EXPECTED_FILE_NAME),
+    encoding="utf-8",
+) as f:
+    EXPECTED = json.load(f)
+
+# (file name, manifest lines, expected result) of every manifest of the sample corpus
+CORPUS_MANIFESTS = [
+    (file_name, manifest_lines, expected)
+    for file_name, lines in CORPUS.items()
+    for (_, manifest_lines), expected in zip(
+        work_hrs_manifest.iter_manifest_texts(lines), EXPECTED[file_name]
+    )
+]
+
+
+@pytest.mark.parametrize(
+    "file_name, manifest_lines, expected",
+    CORPUS_MANIFESTS,
+    ids=[
+        f"{file_name}:{expected['line']}" for file_name, _, expected in CORPUS_MANIFESTS
+    ],
+)
+def test_grammars_on_corpus(file_name, manifest_lines, expected):
+    grammar = work_hrs_manifest.detect_grammar(manifest_lines)
+    if "grammar" not in expected:
+        # no grammar reads it
+        if grammar is not None:
+            with pytest.raises(ValueError):
+                grammar.parse(manifest_lines)
+        return
+
+    assert grammar.name == expected["grammar"]
+    schedule = grammar.parse(manifest_lines)
+    assert bench_manifests.schedule_to_dict(expected["line"], schedule, "") == expected
+    # each grammar reads the manifest the same way when it is given by name
+    assert work_hrs_manifest.parse_manifest(manifest_lines, grammar.name) == schedule
+
+
+def test_day_rows_only_match_day_names():
+    grammar = work_hrs_manifest.get_grammar("day_rows")
+    lines = ["Week of 06/01", "Monitor 0600-0900", "Sunset 1800-1900"]
+    assert not grammar.detect(lines)
+    with pytest.raises(ValueError):
+        grammar.parse(lines)
+
+    lines = ["Week of 06/01", "Tues. 0600-0900", "Thurs: 6:00-9:00", "Sunday off"]
+    assert grammar.detect(lines)
+    assert grammar.parse(lines).days == {1: ["06:00-09:00"], 3: ["06:00-09:00"], 6: []}
+
+
+def test_grammar_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        work_hrs_manifest.ManifestGrammar("layout", "a layout", r"(\d{2}/\d{2})")
@@ -3,218 +3,265 @@
 # work_hours.py - A program to track and report my work hours
 # written by Mark Alexander (alexander.markv@gmail.com)
 #############################################################
+import sys
+import time
+
+# the time to first frame of the main window is measured from here
+START_TIME = time.perf_counter()
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # arguments run the command line interface (report, alerts, import-manifests, ...)
+    # before anything below imports the GUI
+    import work_hrs_cli
+
+    sys.exit(work_hrs_cli.main())
+
+# work_hrs_help, pandas and loguru take most of the start up time, they are imported by the functions
+#   that need them, once the main window is shown
 import PySimpleGUI as sg
 import datetime as dt
-import copy
-import work_hrs_help as wh
-import pandas as pd
-from loguru import logger
+import concurrent.futures
+import threading
+import work_hrs_profile
 import re
 
 DATE_FMT_STR = "%Y-%m-%d"
+# short names of the alert rules, shown with the hours headroom of each day
+HEADROOM_RULE_LABELS = {
+    "80_hrs": "80 in 8",
+    "15_work_hrs": "15 working",
+    "12_drive_hrs": "12 driving",
+}
+# milliseconds without typing before the edited days of the shifts window are checked
+VALIDATE_DEBOUNCE_MS = 250
+# days of a report shown on one page of the -HRS_OUTPUT- window
+REPORT_PAGE_DAYS = 31
+# seconds from start up to the main window being shown, a slower start up is logged as a warning
+FIRST_FRAME_TARGET_SECS = 0.5
+# jobs whose shifts window can read manifests
+MANIFEST_JOBS = ["bus"]
 
-work_hours_buttons_layout = [
-    [
-        sg.Button(
-            "Bus Shifts",
-            mouseover_colors="#fed800",  # fed800: National School Bus Yellow
-            expand_x=True,
-            key="-BUSHRS-",
-        )
-    ],
-    [
-        sg.Button(
-            "HD Shifts",
-            mouseover_colors="#ee7125",  # ee7125: Home Depot orange
-            expand_x=True,
-            key="-HDHRS-",
-        )
-    ],
-    [
-        sg.Button(
-            "Delivery Shifts",
-            mouseover_colors="green",
-            expand_x=True,
-            key="-DLVRHRS-",
-        )
-    ],
-]
-
-report_buttons_layout = [
-    [sg.Push(), sg.Button("View 8-day Report", key="-8DAYREPORT-")],
-    [sg.Push(), sg.Button("View Future Report", key="-FUTUREREPORT-")],
-    [sg.Push(), sg.Button("View Custom Report", key="-CUSTOMREPORT-")],
-]
-
-main_layout = [
-    [
-        sg.Multiline(
-            "",
-            key="-HRS_OUTPUT-",
-            expand_x=True,
-            expand_y=True,
-            no_scrollbar=True,
-            write_only=True,
-            reroute_stdout=False,
-            font=("Courier New", 10),
-        )
-    ],
-    [
-        sg.Column(work_hours_buttons_layout),
-        sg.Push(),
-        sg.Frame(
-            "Notifications",
-            [
+
+def make_work_hours_buttons_layout(jobs_df):
+    """return the layout of the buttons opening the shifts window of each job, in the colors of the jobs"""
+    return [
+        [
+            sg.Button(
+                f"{label} Shifts",
+                mouseover_colors=color or None,
+                expand_x=True,
+                key=f"-JOBHRS_{job}-",
+            )
+        ]
+        for job, label, color in zip(jobs_df.index, jobs_df.label, jobs_df.color)
+    ]
+
+
+def make_report_buttons_layout():
+    """return the layout of the report buttons"""
+    return [
+        [sg.Push(), sg.Button("View 8-day Report", key="-8DAYREPORT-")],
+        [sg.Push(), sg.Button("View Future Report", key="-FUTUREREPORT-")],
+        [sg.Push(), sg.Button("View Custom Report", key="-CUSTOMREPORT-")],
+        [sg.Push(), sg.Button("View Overlapping Shifts", key="-CONFLICTSREPORT-")],
+        [sg.Push(), sg.Button("View Timings", key="-TIMINGS-")],
+        [
+            sg.Push(),
+            sg.Button("< Page", key="-PREVPAGE-", disabled=True),
+            sg.Text("", key="-REPORT_PAGE-"),
+            sg.Button("Page >", key="-NEXTPAGE-", disabled=True),
+        ],
+        [sg.Push(), sg.Text("", key="-REPORT_STATUS-")],
+    ]
+
+
+def make_main_layout():
+    """return the layout of the main window"""
+    return [
+        [
+            sg.Multiline(
+                "",
+                key="-HRS_OUTPUT-",
+                expand_x=True,
+                expand_y=True,
+                no_scrollbar=True,
+                write_only=True,
+                reroute_stdout=False,
+                font=("Courier New", 10),
+            )
+        ],
+        [
+            sg.Column(
                 [
-                    sg.Multiline(
-                        "",
-                        no_scrollbar=True,
-                        write_only=True,
-                        key="-NOTIFICATIONS-",
-                        size=(100, 20),
-                        reroute_stdout=True,  # print statements will redirect to this window
-                    )
+                    # the job buttons are added once the job registry is read, after the first frame
+                    [sg.Column([[]], key="-JOB_BUTTONS-", pad=0, expand_x=True)],
+                    [
+                        sg.Button(
+                            "Confirm Past Shifts",
+                            expand_x=True,
+                            key="-CONFIRMSCHEDULED-",
+                        )
+                    ],
                 ]
-            ],
-            title_location="n",
-        ),
-        sg.Push(),
-        sg.Column(report_buttons_layout),
-    ],
-    [
-        sg.Push(),
-        sg.Text(
-            f"Today is: {dt.datetime.today().strftime('%A %B %d, %Y')}",
-            font=("Arial", 15),
-        ),
-    ],
-]
-
-shifts_window_layout = [
-    [
-        sg.Button("PREV", key="-PREV-"),
-        sg.Button("NEXT", key="-NEXT-"),
-        sg.Button("This Week", key="-TODAY-"),
-        sg.Push(),
-        sg.Button("Manifest", key="-MANIFEST-", visible=False),
-    ],
-    [
-        sg.Button("Copy shift times from previous week", key="-COPYPREVWEEK-"),
-    ],
-    # [
-    #     sg.Text("", key="-WEEKOF-")
-    # ],
-    [
-        sg.Frame(
-            "Shifts: HH:MM-HH:MM",
-            [
-                [
-                    sg.Text("", key="-TEXT_0-"),
-                    sg.Push(),
-                    sg.Column(
-                        [
-                            [sg.InputText("", key="-INPUT_0_A-")],
-                            [sg.InputText("", key="-INPUT_0_B-")],
-                            [sg.InputText("", key="-INPUT_0_C-")],
-                        ]
-                    ),
-                ],
-                [
-                    sg.Text("", key="-TEXT_1-"),
-                    sg.Push(),
-                    sg.Column(
-                        [
-                            [sg.InputText("", key="-INPUT_1_A-")],
-                            [sg.InputText("", key="-INPUT_1_B-")],
-                            [sg.InputText("", key="-INPUT_1_C-")],
-                        ]
-                    ),
-                ],
-                [
-                    sg.Text("", key="-TEXT_2-"),
-                    sg.Push(),
-                    sg.Column(
-                        [
-                            [sg.InputText("", key="-INPUT_2_A-")],
-                            [sg.InputText("", key="-INPUT_2_B-")],
-                            [sg.InputText("", key="-INPUT_2_C-")],
-                        ]
-                    ),
-                ],
-                [
-                    sg.Text("", key="-TEXT_3-"),
-                    sg.Push(),
-                    sg.Column(
-                        [
-                            [sg.InputText("", key="-INPUT_3_A-")],
-                            [sg.InputText("", key="-INPUT_3_B-")],
-                            [sg.InputText("", key="-INPUT_3_C-")],
-                        ]
-                    ),
-                ],
-                [
-                    sg.Text("", key="-TEXT_4-"),
-                    sg.Push(),
-                    sg.Column(
-                        [
-                            [sg.InputText("", key="-INPUT_4_A-")],
-                            [sg.InputText("", key="-INPUT_4_B-")],
-                            [sg.InputText("", key="-INPUT_4_C-")],
-                        ]
-                    ),
-                ],
+            ),
+            sg.Push(),
+            sg.Frame(
+                "Notifications",
                 [
-                    sg.Text("", key="-TEXT_5-"),
-                    sg.Push(),
-                    sg.Column(
-                        [
-                            [sg.InputText("", key="-INPUT_5_A-")],
-                            [sg.InputText("", key="-INPUT_5_B-")],
-                            [sg.InputText("", key="-INPUT_5_C-")],
-                        ]
-                    ),
+                    [
+                        sg.Multiline(
+                            "",
+                            no_scrollbar=True,
+                            write_only=True,
+                            key="-NOTIFICATIONS-",
+                            size=(100, 20),
+                            reroute_stdout=True,  # print statements will redirect to this window
+                        )
+                    ]
                 ],
+                title_location="n",
+            ),
+            sg.Push(),
+            sg.Column(make_report_buttons_layout()),
+        ],
+        [
+            sg.Push(),
+            sg.Text(
+                f"Today is: {dt.datetime.today().strftime('%A %B %d, %Y')}",
+                font=("Arial", 15),
+            ),
+        ],
+    ]
+
+
+def make_shifts_window_layout():
+    """return the layout of the shifts window, a row of three shift inputs for each day of the week"""
+    day_rows = [
+        [
+            sg.Text("", key=f"-TEXT_{idx}-"),
+            sg.Push(),
+            sg.Column(
                 [
-                    sg.Text("", key="-TEXT_6-"),
-                    sg.Push(),
-                    sg.Column(
-                        [
-                            [sg.InputText("", key="-INPUT_6_A-")],
-                            [sg.InputText("", key="-INPUT_6_B-")],
-                            [sg.InputText("", key="-INPUT_6_C-")],
-                        ]
-                    ),
-                ],
-            ],
-            title_location="n",
-            key="-FRAME-",
-        )
-    ],
-    [
-        sg.Button("Save Changes", key="-SAVE-"),
-        sg.Button("Cancel", key="-CANCEL-"),
-        sg.Text("Status:", key="-STATUS-", text_color="#FFFFFF"),
-    ],
-]
-
-custom_dates_layout = [
-    [
-        sg.InputText("YYYY-MM-DD", key="-INPUT_BEG_DATE-"),
-        sg.CalendarButton(
-            "Beginning Date", target="-INPUT_BEG_DATE-", format=DATE_FMT_STR
-        ),
-    ],
-    [
-        sg.InputText("YYYY-MM-DD", key="-INPUT_END_DATE-"),
-        sg.CalendarButton("End Date", target="-INPUT_END_DATE-", format=DATE_FMT_STR),
-    ],
-    [
-        sg.Button("Execute report", key="-CUSTSAVE-"),
-        sg.Button("Cancel", key="-CUSTCANCEL-"),
-    ],
-]
+                    [
+                        sg.InputText(
+                            "", key=f"-INPUT_{idx}_{letter}-", enable_events=True
+                        )
+                    ]
+                    for letter in ["A", "B", "C"]
+                ]
+            ),
+            sg.Text("", key=f"-HEADROOM_{idx}-", size=(30, 1)),
+            sg.Text("", key=f"-DAY_STATUS_{idx}-", size=(30, 1), text_color="red"),
+        ]
+        for idx in range(7)
+    ]
+    return [
+        [
+            sg.Button("PREV", key="-PREV-"),
+            sg.Button("NEXT", key="-NEXT-"),
+            sg.Button("This Week", key="-TODAY-"),
+            sg.Push(),
+            sg.Button("Manifest", key="-MANIFEST-", visible=False),
+            sg.Button("Import Manifests", key="-IMPORTMANIFESTS-", visible=False),
+        ],
+        [
+            sg.Button("Copy shift times from previous week", key="-COPYPREVWEEK-"),
+        ],
+        [
+            sg.Frame(
+                "Shifts: HH:MM-HH:MM",
+                day_rows,
+                title_location="n",
+                key="-FRAME-",
+            )
+        ],
+        [
+            sg.Button("Save Changes", key="-SAVE-"),
+            sg.Button("Cancel", key="-CANCEL-"),
+            sg.Button("Undo", key="-UNDO-"),
+            sg.Button("Redo", key="-REDO-"),
+            sg.Text("Status:", key="-STATUS-", text_color="#FFFFFF"),
+        ],
+    ]
+
 
+def make_custom_dates_layout():
+    """return the layout of the custom dates report window"""
+    return [
+        [
+            sg.InputText("YYYY-MM-DD", key="-INPUT_BEG_DATE-"),
+            sg.CalendarButton(
+                "Beginning Date", target="-INPUT_BEG_DATE-", format=DATE_FMT_STR
+            ),
+        ],
+        [
+            sg.InputText("YYYY-MM-DD", key="-INPUT_END_DATE-"),
+            sg.CalendarButton(
+                "End Date", target="-INPUT_END_DATE-", format=DATE_FMT_STR
+            ),
+        ],
+        [
+            sg.Button("Execute report", key="-CUSTSAVE-"),
+            sg.Button("Cancel", key="-CUSTCANCEL-"),
+        ],
+    ]
 
+
+def make_import_manifests_layout():
+    """return the layout of the import manifests window"""
+    return [
+        [sg.Text("Paste the text of any number of manifests here.")],
+        [sg.Multiline("", key="-MANIFESTS_TEXT-", size=(80, 30))],
+        [
+            sg.Button("Import", key="-IMPORTSAVE-"),
+            sg.Button("Cancel", key="-IMPORTCANCEL-"),
+        ],
+    ]
+
+
+def make_confirm_scheduled_layout(jobs_df):
+    """return the layout of the confirm past scheduled shifts window, with a checkbox for each job"""
+    return [
+        [sg.Text("Jobs:")]
+        + [
+            sg.Checkbox(label, default=True, key=f"-CONFIRM_JOB_{job}-")
+            for job, label in jobs_df.label.items()
+        ],
+        [
+            sg.InputText("", key="-CONFIRM_BEG_DATE-", size=(12, 1)),
+            sg.CalendarButton(
+                "Beginning Date", target="-CONFIRM_BEG_DATE-", format=DATE_FMT_STR
+            ),
+            sg.InputText("", key="-CONFIRM_END_DATE-", size=(12, 1)),
+            sg.CalendarButton(
+                "End Date", target="-CONFIRM_END_DATE-", format=DATE_FMT_STR
+            ),
+        ],
+        [
+            sg.Text(
+                "Dates to leave scheduled (YYYY-MM-DD, separated by spaces or commas):"
+            )
+        ],
+        [sg.InputText("", key="-CONFIRM_EXCLUDE-", expand_x=True)],
+        [
+            sg.Multiline(
+                "",
+                key="-CONFIRM_PREVIEW-",
+                size=(60, 20),
+                write_only=True,
+                font=("Courier New", 10),
+            )
+        ],
+        [
+            sg.Button("Preview", key="-CONFIRMPREVIEW-"),
+            sg.Button("Confirm", key="-CONFIRMSAVE-", disabled=True),
+            sg.Button("Cancel", key="-CONFIRMCANCEL-"),
+            sg.Text("", key="-CONFIRM_STATUS-", text_color="red"),
+        ],
+    ]
+
+
+@work_hrs_profile.timed()
 def write_to_window(window, work_info):
     """
     Update work hours window with info given by a Week object
@@ -223,7 +270,6 @@ def write_to_window(window, work_info):
     :param work_info: Week object with info to be written to the window
     :return: None
     """
-    work_info = copy.deepcopy(work_info)
     for key_num, date in enumerate(work_info.get_week_dates_list()):
         # the first row in the Week object is Monday, start of our week
         if key_num == 0:
@@ -255,6 +301,8 @@ def read_shifts_window(values, work_info):
     :param work_info: Week object with info originally in the work hours window
     :return: A new dataframe with the info read from the work hours window
     """
+    import pandas as pd
+
     new_shifts = []
     # read shift info (HH:MM-HH:MM) from shift windows
     for idx in range(7):
@@ -292,33 +340,201 @@ def read_shifts_window(values, work_info):
     return new_df
 
 
-def work_hrs_window(db_table, manifest_button=False):
+@work_hrs_profile.timed()
+def update_headroom(window, job, work_info, shift_store, hours_headroom):
+    """
+    Show the hours that can still be worked on each day of the week, counting the shifts typed into the
+      work hours window in place of the saved ones
+
+    :param window: work hours window object
+    :param job: name of the job
+    :param work_info: Week object with the dates in the work hours window
+    :param shift_store: ShiftStore with the saved shifts of the job
+    :param hours_headroom: HoursHeadroom object built from the saved hours of all jobs
+    :return: None
+    """
+    import work_hrs_help as wh
+
+    day_changes = {}
+    for idx, date in enumerate(work_info.get_week_dates_list()):
+        typed_tot = dt.timedelta()
+        for letter in ["A", "B", "C"]:
+            shift_delta = wh.compute_shift_duration(
+                window[f"-INPUT_{idx}_{letter}-"].get().strip()
+            )
+            if shift_delta is not None:
+                typed_tot += shift_delta
+        daily_info_dict = wh.compute_daily_hrs(shift_store, date)
+        saved_tot = daily_info_dict["shifts_tot"] if daily_info_dict else dt.timedelta()
+        day_changes[date.strftime(DATE_FMT_STR)] = typed_tot - saved_tot
+
+    for idx, date_str in enumerate(day_changes):
+        headroom = hours_headroom.get_headroom(date_str, job, day_changes)
+        # the rule closest to its limit sets the headroom of the day
+        rule, delta = min(
+            ((rule, delta) for rule, delta in headroom.items() if delta is not None),
+            key=lambda rule_delta: rule_delta[1],
+        )
+        if delta > dt.timedelta():
+            hrs, mins = wh.compute_delta_hrs_min(delta)
+            headroom_str = f"Headroom {hrs:02}:{mins:02} ({HEADROOM_RULE_LABELS[rule]})"
+            text_color = "black"
+        else:
+            hrs, mins = wh.compute_delta_hrs_min(-delta)
+            headroom_str = f"Over by {hrs:02}:{mins:02} ({HEADROOM_RULE_LABELS[rule]})"
+            text_color = "red"
+        window[f"-HEADROOM_{idx}-"].update(headroom_str, text_color=text_color)
+
+
+@work_hrs_profile.timed()
+def validate_days(window, job, work_info, shift_stores, day_idxs=range(7)):
+    """
+    Check the shifts typed into the work hours window and show any errors next to each day
+
+    :param window: work hours window object
+    :param job: name of the job
+    :param work_info: Week object with the dates in the work hours window
+    :param shift_stores: dict of ShiftStore objects by job, the other jobs are checked for overlaps
+    :param day_idxs: days to check, 0 (Mon) - 6 (Sun)
+    :return: None
+    """
+    import work_hrs_help as wh
+
+    week_dates_list = work_info.get_week_dates_list()
+    for idx in day_idxs:
+        date_str = week_dates_list[idx].strftime(DATE_FMT_STR)
+        error_str = wh.validate_day_shifts(
+            [window[f"-INPUT_{idx}_{letter}-"].get() for letter in ["A", "B", "C"]],
+            wh.get_other_jobs_shifts(job, date_str, shift_stores),
+        )
+        window[f"-DAY_STATUS_{idx}-"].update(error_str)
+
+
+def refresh_day_checks(
+    window, job, work_info, shift_stores, hours_headroom, day_idxs=range(7)
+):
+    """
+    Validate the edited days of the work hours window and update the hours headroom of the week
+
+    :param window: work hours window object
+    :param job: name of the job
+    :param work_info: Week object with the dates in the work hours window
+    :param shift_stores: dict of ShiftStore objects by job
+    :param hours_headroom: HoursHeadroom object built from the saved hours of all jobs
+    :param day_idxs: days edited, 0 (Mon) - 6 (Sun)
+    :return: None
+    """
+    validate_days(window, job, work_info, shift_stores, day_idxs)
+    # a day's hours count in the 8-day windows of the following days, update them all
+    update_headroom(window, job, work_info, shift_stores[job], hours_headroom)
+
+
+def read_saved_shifts(job, dt_day_object):
+    """
+    Read the saved shifts of all jobs for the work hours window
+
+    :param job: name of the job
+    :param dt_day_object: any date of the week to show
+    :return: tuple (dict of ShiftStore objects by job, HoursHeadroom object, Week object of the job)
+    """
+    import work_hrs_help as wh
+
+    # shifts of all jobs, the other jobs are checked for overlaps with the typed shifts
+    shift_stores = wh.build_shift_stores(wh.read_shifts_table())
+    # prefix sums of the saved hours, the typed shifts are applied on top of them
+    hours_headroom = wh.HoursHeadroom(wh.eight_day_cache.get_eight_day_df())
+    work_info = wh.week_cache.get_week(job, shift_stores[job], dt_day_object)
+    return shift_stores, hours_headroom, work_info
+
+
+def import_manifests_window(job):
+    """
+    A PySimpleGUI window to paste the text of many manifests and import them at once
+
+    :param job: name of the job of the manifests
+    :return: summary DataFrame as returned by wh.import_manifests(), None if cancelled
+    """
+    import work_hrs_help as wh
+
+    window = sg.Window(
+        "Import Manifests",
+        # PySimpleGUI requires a new layout each time the window is brought up
+        make_import_manifests_layout(),
+        modal=True,
+        keep_on_top=True,
+        finalize=True,
+    )
+
+    summary_df = None
+    while True:
+        event, values = window.read()
+
+        if event == "-IMPORTSAVE-":
+            manifests_text = values["-MANIFESTS_TEXT-"]
+            summary_df, _ = wh.import_manifests(
+                [("pasted text", manifests_text.split("\n"))], job
+            )
+            break
+
+        if event == "-IMPORTCANCEL-" or event == sg.WIN_CLOSED:
+            break
+
+    window.close()
+    return summary_df
+
+
+def work_hrs_window(job, manifest_button=False):
     """
     A PySimpleGUI window which contains shift info for a week
 
-    :param db_table: database table name
+    :param job: name of the job
     :param manifest_button: Control visibility of a manifest button
     :return: A string representing any status updates
     """
-    # PySimpleGUI requires a new layout each time the window is brought up
-    work_hrs_layout = copy.deepcopy(shifts_window_layout)
+    import work_hrs_help as wh
+    from loguru import logger
 
     today = dt.date.today()
-    work_hrs_df = wh.read_work_hrs_table(db_table)
-    work_info = wh.Week(work_hrs_df, today)
+    shift_stores, hours_headroom, work_info = read_saved_shifts(job, today)
+    shift_store = shift_stores[job]
     return_str = ""
     window = sg.Window(
-        f"{db_table}", work_hrs_layout, modal=True, keep_on_top=True, finalize=True
+        f"{wh.read_jobs().at[job, 'label']} Shifts",
+        # PySimpleGUI requires a new layout each time the window is brought up
+        make_shifts_window_layout(),
+        modal=True,
+        keep_on_top=True,
+        finalize=True,
     )
     if manifest_button:
         window["-MANIFEST-"].update(visible=True)
+        window["-IMPORTMANIFESTS-"].update(visible=True)
 
     write_to_window(window, work_info)
+    refresh_day_checks(window, job, work_info, shift_stores, hours_headroom)
     changes_flag = False
+    # days edited since the last check, checked once typing pauses
+    edited_day_idxs = set()
+    event_timer = work_hrs_profile.NULL_TIMER
     while True:
-        event, values = window.read()
+        # the handling of an event is timed until the next read
+        event_timer.stop()
+        event, values = window.read(
+            timeout=VALIDATE_DEBOUNCE_MS if edited_day_idxs else None
+        )
+        event_timer = work_hrs_profile.timer(f"{job} window {event}").start()
         if event == "-CANCEL-" or event == sg.WIN_CLOSED:
             break
+        if event.startswith("-INPUT_"):
+            # -INPUT_n_X-: n is the day of the week
+            edited_day_idxs.add(int(event[7]))
+            continue
+        if event == sg.TIMEOUT_EVENT:
+            refresh_day_checks(
+                window, job, work_info, shift_stores, hours_headroom, edited_day_idxs
+            )
+            edited_day_idxs.clear()
+            continue
         if event == "-PREV-" or event == "-NEXT-" or event == "-TODAY-":
             if event == "-PREV-":
                 today = today - dt.timedelta(days=7)
@@ -326,12 +542,42 @@ def work_hrs_window(db_table, manifest_button=False):
                 today = today + dt.timedelta(days=7)
             if event == "-TODAY-":
                 today = dt.date.today()
-            work_info = wh.Week(work_hrs_df, today)
+            work_info = wh.week_cache.get_week(job, shift_store, today)
             write_to_window(window, work_info)
+            refresh_day_checks(window, job, work_info, shift_stores, hours_headroom)
         if event == "-COPYPREVWEEK-":
-            last_week_work_info = wh.Week(work_hrs_df, today - dt.timedelta(days=7))
+            last_week_work_info = wh.week_cache.get_week(
+                job, shift_store, today - dt.timedelta(days=7)
+            )
+            # cached weeks are shared, change a copy
+            work_info = work_info.copy()
             work_info.set_week_shifts_list(last_week_work_info.get_week_shifts_list())
             write_to_window(window, work_info)
+            refresh_day_checks(window, job, work_info, shift_stores, hours_headroom)
+        if event == "-UNDO-" or event == "-REDO-":
+            # undo or redo the last save of this job, from this or an earlier session
+            if event == "-UNDO-":
+                changeset_df = wh.undo_last_change(job)
+                action_str = "Undid"
+            else:
+                changeset_df = wh.redo_last_change(job)
+                action_str = "Redid"
+            if changeset_df is None:
+                window["-STATUS-"].update(
+                    f"Nothing to {event.strip('-').lower()}", text_color="#FF0000"
+                )
+                continue
+
+            # show the shifts as they are now in the database
+            shift_stores, hours_headroom, work_info = read_saved_shifts(job, today)
+            shift_store = shift_stores[job]
+            write_to_window(window, work_info)
+            refresh_day_checks(window, job, work_info, shift_stores, hours_headroom)
+            return_str = (
+                f"{action_str} {len(changeset_df)} shift changes"
+                f" ({', '.join(sorted(changeset_df.date.unique()))})"
+            )
+            window["-STATUS-"].update(return_str, text_color="#FFFFFF")
         if event == "-MANIFEST-":
             manifest_text = sg.popup_get_text(
                 "Enter manifest text here.",
@@ -340,13 +586,34 @@ def work_hrs_window(db_table, manifest_button=False):
                 size=(50, 50),
             )
             if manifest_text:
-                work_info = wh.process_manifest(manifest_text, work_hrs_df)
+                work_info = wh.process_manifest(manifest_text, shift_store)
                 if work_info:
                     write_to_window(window, work_info)
+                    refresh_day_checks(
+                        window, job, work_info, shift_stores, hours_headroom
+                    )
                 else:
                     window["-STATUS-"].update(
                         "Error reading Manifest", text_color="#FF0000"
                     )
+        if event == "-IMPORTMANIFESTS-":
+            summary_df = import_manifests_window(job)
+            if summary_df is not None and not summary_df.empty:
+                sg.popup_scrolled(
+                    wh.render_manifest_summary(summary_df),
+                    title="Manifests Imported",
+                    keep_on_top=True,
+                    font=("Courier New", 10),
+                    size=(100, 20),
+                )
+                # show the shifts as they are now in the database
+                shift_stores, hours_headroom, work_info = read_saved_shifts(job, today)
+                shift_store = shift_stores[job]
+                write_to_window(window, work_info)
+                refresh_day_checks(window, job, work_info, shift_stores, hours_headroom)
+                num_imported = (summary_df.status == "ok").sum()
+                return_str = f"Imported {num_imported} of {len(summary_df)} manifests"
+                window["-STATUS-"].update(return_str, text_color="#FFFFFF")
 
         if event == "-SAVE-":
             new_work_hrs_df = read_shifts_window(values, work_info)
@@ -356,65 +623,139 @@ def work_hrs_window(db_table, manifest_button=False):
                 window["-STATUS-"].update("Formatting error", text_color="#FF0000")
                 continue
 
-            for date in work_info.get_week_dates_list():
-                # for each date, create a filtered DataFrame of the new
-                # and existing work info to detect changes to be saved
-                work_hrs_date_df = work_hrs_df[
-                    work_hrs_df.date == date.strftime(DATE_FMT_STR)
-                ][["date", "start", "end", "scheduled"]].reset_index()
-                new_work_hrs_date_df = new_work_hrs_df[
-                    new_work_hrs_df.date == date.strftime(DATE_FMT_STR)
-                ][["date", "start", "end", "scheduled"]].reset_index()
-
-                # detect changes 1) either DataFrame empty while other isn't,
-                # 2) number of entries are different, 3) some start times differ,
-                # 4) some end times differ, 5) scheduled flags differ
-                if (
-                    (work_hrs_date_df.empty != new_work_hrs_date_df.empty)
-                    or (work_hrs_date_df.shape[0] != new_work_hrs_date_df.shape[0])
-                    or not (work_hrs_date_df.start == new_work_hrs_date_df.start).all()
-                    or not (work_hrs_date_df.end == new_work_hrs_date_df.end).all()
-                    or not (
-                        work_hrs_date_df.scheduled == new_work_hrs_date_df.scheduled
-                    ).all()
-                ):
-                    changes_flag = True
+            # diff the saved and typed shifts of the whole week in one pass
+            week_dates_list = work_info.get_week_dates_list()
+            work_hrs_week_df = shift_store.get_range_df(
+                week_dates_list[0].strftime(DATE_FMT_STR),
+                week_dates_list[-1].strftime(DATE_FMT_STR),
+            )[["date", "start", "end", "scheduled"]].reset_index()
+            changeset_df = wh.compute_shifts_changeset(
+                work_hrs_week_df, new_work_hrs_df
+            )
 
+            if not changeset_df.empty:
+                changes_flag = True
+                # check the new shifts of every changed day
+                for date_str in changeset_df.date.unique():
+                    new_work_hrs_date_df = new_work_hrs_df[
+                        new_work_hrs_df.date == date_str
+                    ].copy()
                     time_errors_str = wh.check_for_time_errors(new_work_hrs_date_df)
-                    # time_errors_str = ""
+                    if time_errors_str == "":
+                        # a shift can't overlap a shift of another job
+                        time_errors_str = wh.check_for_job_overlaps(
+                            job, new_work_hrs_date_df
+                        )
                     if time_errors_str != "":
                         # update STATUS text with error
                         window["-STATUS-"].update(time_errors_str, text_color="#FF0000")
                         changes_flag = "Stay"
                         break
-                    else:
-                        wh.write_work_hrs_table(
-                            db_table,
-                            work_hrs_date_df,
-                            new_work_hrs_date_df,
-                        )
+
+            # write the whole changeset at once, only when every changed day is valid
+            if changes_flag is True:
+                changeset_df = wh.apply_shifts_changeset(job, changeset_df)
+                logger.info("Saved {} changes:\n{}", job, changeset_df.to_string())
 
             if changes_flag is True:
                 return_str = "Changes saved"
                 break
             elif changes_flag == "Stay":
-                logger.error("Save failed, still in {} hours window.", db_table)
+                logger.error("Save failed, still in {} hours window.", job)
                 changes_flag = False
             else:
                 return_str = "No changes saved"
                 break
 
+    event_timer.stop()
     window.close()
     return return_str
 
 
-def custom_dates_report_window():
-    # PySimpleGUI requires a new layout each time the window is brought up
-    new_custom_dates_layout = copy.deepcopy(custom_dates_layout)
+def read_confirm_scheduled_window(values, jobs_df):
+    """
+    Read the jobs, dates and excluded dates of the confirm past scheduled shifts window
+
+    :param values: values from the confirm past scheduled shifts window
+    :param jobs_df: job registry DataFrame
+    :return: tuple (list of jobs, beginning date or None, ending date or None, tuple of excluded dates), dates
+      are YYYY-MM-DD strings, None if a date isn't valid
+    """
+    jobs = [job for job in jobs_df.index if values[f"-CONFIRM_JOB_{job}-"]]
+    beg_date_str = values["-CONFIRM_BEG_DATE-"].strip() or None
+    end_date_str = values["-CONFIRM_END_DATE-"].strip() or None
+    exclude_dates = tuple(
+        date_str
+        for date_str in re.split(r"[\s,]+", values["-CONFIRM_EXCLUDE-"])
+        if date_str
+    )
+    for date_str in (beg_date_str, end_date_str) + exclude_dates:
+        if date_str is None:
+            continue
+        try:
+            dt.datetime.strptime(date_str, DATE_FMT_STR)
+        except ValueError:
+            return None
+    return jobs, beg_date_str, end_date_str, exclude_dates
+
+
+def confirm_scheduled_window():
+    """
+    A PySimpleGUI window to mark the past shifts still scheduled as actual shifts, in bulk. The shifts are
+      previewed first, Confirm writes the shifts of the last preview.
+
+    :return: DataFrame of the confirmed shifts as returned by wh.confirm_scheduled_shifts(), None if cancelled
+    """
+    import work_hrs_help as wh
 
+    jobs_df = wh.read_jobs()
+    window = sg.Window(
+        "Confirm Past Scheduled Shifts",
+        # PySimpleGUI requires a new layout each time the window is brought up
+        make_confirm_scheduled_layout(jobs_df),
+        modal=True,
+        keep_on_top=True,
+        finalize=True,
+    )
+
+    shifts_df = None
+    # the arguments of the last preview, they are the ones confirmed
+    preview_args = None
+    while True:
+        event, values = window.read()
+
+        if event == "-CONFIRMCANCEL-" or event == sg.WIN_CLOSED:
+            break
+
+        if event == "-CONFIRMPREVIEW-" or event == "-CONFIRMSAVE-":
+            confirm_args = read_confirm_scheduled_window(values, jobs_df)
+            if confirm_args is None:
+                window["-CONFIRM_STATUS-"].update("Formatting error with dates")
+                continue
+            if event == "-CONFIRMSAVE-" and confirm_args == preview_args:
+                shifts_df = wh.confirm_scheduled_shifts(*confirm_args)
+                break
+
+            # a preview, or the choices changed since the last one
+            preview_df = wh.confirm_scheduled_shifts(*confirm_args, dry_run=True)
+            window["-CONFIRM_PREVIEW-"].update(wh.render_confirmed_shifts(preview_df))
+            preview_args = confirm_args
+            window["-CONFIRMSAVE-"].update(disabled=preview_df.empty)
+            window["-CONFIRM_STATUS-"].update(
+                ""
+                if event == "-CONFIRMPREVIEW-"
+                else "Choices changed, check the preview"
+            )
+
+    window.close()
+    return shifts_df
+
+
+def custom_dates_report_window():
     window = sg.Window(
         "Custom Dates Report",
-        new_custom_dates_layout,
+        # PySimpleGUI requires a new layout each time the window is brought up
+        make_custom_dates_layout(),
         modal=True,
         keep_on_top=True,
         finalize=True,
@@ -432,168 +773,355 @@ def custom_dates_report_window():
             return (None, None)
 
 
-def main_window():
-    window = sg.Window(
-        "Work Hours", main_layout, resizable=True, size=(1600, 1000), finalize=True
-    )
-
-    # Initial Read in hours tables
-    bus_hrs_df = wh.read_work_hrs_table("bus_hours")
-    HD_hrs_df = wh.read_work_hrs_table("HD_hours")
-    delivery_hrs_df = wh.read_work_hrs_table("delivery_hours")
+@work_hrs_profile.timed(rows=None)
+def build_report(window, report_id, cancel_event, dt_beg_date, dt_end_date, page):
+    """
+    Build one page of a report in a worker thread and post it back to the main window with a
+      -REPORT_DONE- event, or the reason there is no report with a -REPORT_FAILED- event
 
-    first_loop_flag = True
-    while True:
-        event, values = window.read(timeout=100)
+    :param window: main window object, the report is posted to it with write_event_value
+    :param report_id: id of this report, posted back with the result
+    :param cancel_event: threading.Event set when a newer report makes this one stale
+    :param dt_beg_date: datetime object for the starting date
+    :param dt_end_date: datetime object for the ending date, None for the last date with a shift
+    :param page: index of the page of REPORT_PAGE_DAYS days to build
+    :return: None
+    """
+    import work_hrs_help as wh
+    from loguru import logger
 
-        if first_loop_flag:
-            first_loop_flag = False
-            output_str = ""
-            bus_update_dates_list = wh.check_for_scheduled_updates(bus_hrs_df)
-            if bus_update_dates_list:
-                output_str = (
-                    "Bus hours need to be updated:\n"
-                    + "\n".join(bus_update_dates_list)
-                    + "\n"
+    try:
+        eight_day_df = wh.eight_day_cache.get_eight_day_df()
+        if dt_end_date is None:
+            # the eight day DataFrame ends on the last date with a shift in any table
+            if not eight_day_df.empty:
+                dt_end_date = dt.datetime.strptime(
+                    eight_day_df.date.iloc[-1], DATE_FMT_STR
                 )
-            HD_update_dates_list = wh.check_for_scheduled_updates(HD_hrs_df)
-            if HD_update_dates_list:
-                output_str += (
-                    "HD hours need to be updated:\n"
-                    + "\n".join(HD_update_dates_list)
-                    + "\n"
+            if dt_end_date is None or dt_end_date < dt_beg_date:
+                window.write_event_value(
+                    "-REPORT_FAILED-",
+                    (
+                        report_id,
+                        f"No shifts saved on or after {dt_beg_date:%Y-%m-%d}",
+                    ),
                 )
-            if output_str != "":
-                # print update needed notices to NOTIFICATIONS window
-                print(output_str)
+                return
+        num_pages = (dt_end_date - dt_beg_date).days // REPORT_PAGE_DAYS + 1
+        dt_page_beg_date = dt_beg_date + dt.timedelta(days=page * REPORT_PAGE_DAYS)
+        dt_page_end_date = min(
+            dt_page_beg_date + dt.timedelta(days=REPORT_PAGE_DAYS - 1), dt_end_date
+        )
 
-        if event == sg.WIN_CLOSED:
-            break
+        # lines are generated one day at a time, with the latest info for the page dates
+        report_lines = []
+        for line_str in wh.iter_report_lines(
+            dt_page_beg_date, dt_page_end_date, eight_day_df
+        ):
+            if cancel_event.is_set():
+                return
+            report_lines.append(line_str)
+        report_str = "\n".join(report_lines)
 
-        if event == "-BUSHRS-":
-            return_str = work_hrs_window("bus_hours", manifest_button=True)
-            if return_str != "":
-                # print notices to the NOTIFICATIONS window
-                print(return_str)
+        # the notifications cover the whole report, they are only shown with the first page
+        display_str = None
+        if page == 0:
+            display_str = wh.get_notifications_str(
+                dt_beg_date, dt_end_date, eight_day_df
+            )
+    except Exception as e:
+        logger.exception("Report failed")
+        window.write_event_value("-REPORT_FAILED-", (report_id, f"Report failed: {e}"))
+        return
 
-        if event == "-HDHRS-":
-            return_str = work_hrs_window("HD_hours")
-            # print notices to the NOTIFICATIONS window
-            if return_str != "":
-                print(return_str)
+    if not cancel_event.is_set():
+        window.write_event_value(
+            "-REPORT_DONE-",
+            (report_id, dt_end_date, page, num_pages, report_str, display_str),
+        )
 
-        if event == "-DLVRHRS-":
-            return_str = work_hrs_window("delivery_hours")
-            # print notices to the NOTIFICATIONS window
-            if return_str != "":
-                print(return_str)
-
-        if event == "-8DAYREPORT-":
-            # Make sure that we have the latest info
-            bus_hrs_df = wh.read_work_hrs_table("bus_hours")
-            HD_hrs_df = wh.read_work_hrs_table("HD_hours")
-            delivery_hrs_df = wh.read_work_hrs_table("delivery_hours")
-            eight_day_df = wh.compute_eight_day_df(
-                bus_hrs_df, HD_hrs_df, delivery_hrs_df
-            )
 
-            window["-HRS_OUTPUT-"].update("")
-            window["-NOTIFICATIONS-"].update("")
-            seven_days_ago = dt.datetime.today() - dt.timedelta(days=7)
-            seven_day_from_now = dt.datetime.today() + dt.timedelta(days=7)
-            window["-HRS_OUTPUT-"].update(
-                wh.get_report_str(
-                    bus_hrs_df,
-                    HD_hrs_df,
-                    delivery_hrs_df,
-                    seven_days_ago,
-                    seven_day_from_now,
-                    eight_day_df,
-                )
-            )
-            display_str = wh.get_notifications_str(
-                seven_days_ago, seven_day_from_now, eight_day_df
+class ReportWorker:
+    def __init__(self, window):
+        """
+        Runs report generation in a background thread so the main window stays responsive.
+          Reports are shown one page of REPORT_PAGE_DAYS days at a time. Requesting a new report
+          or page cancels the one in progress, only the latest one is shown.
+
+        :param window: main window object
+        """
+        self._window = window
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._report_id = 0
+        self._cancel_event = None
+        self._future = None
+        self._report_name = None
+        self._dt_beg_date = None
+        self._dt_end_date = None
+        self._page = 0
+        self._num_pages = 0
+
+    def request(self, report_name, dt_beg_date, dt_end_date):
+        """start a new report on its first page, cancelling any report in progress"""
+        self._report_name = report_name
+        self._dt_beg_date = dt_beg_date
+        self._dt_end_date = dt_end_date
+        self._submit(0)
+
+    def turn_page(self, step):
+        """show the next (step=1) or previous (step=-1) page of the current report"""
+        page = self._page + step
+        if self._report_name is not None and 0 <= page < self._num_pages:
+            self._submit(page)
+
+    def _submit(self, page):
+        """build a page of the current report in the worker thread"""
+        self.cancel()
+        self._report_id += 1
+        self._cancel_event = threading.Event()
+        self._future = self._executor.submit(
+            build_report,
+            self._window,
+            self._report_id,
+            self._cancel_event,
+            self._dt_beg_date,
+            self._dt_end_date,
+            page,
+        )
+        self._window["-REPORT_STATUS-"].update(f"Generating {self._report_name}...")
+
+    def cancel(self):
+        """cancel the report in progress, if any"""
+        if self._future is not None:
+            self._future.cancel()
+            self._cancel_event.set()
+            self._future = None
+
+    def is_current(self, report_id):
+        """return True if report_id is the latest requested report"""
+        return report_id == self._report_id
+
+    def done(self, dt_end_date=None, page=None, num_pages=None):
+        """mark the latest report as finished, and the page shown if it succeeded"""
+        self._future = None
+        self._window["-REPORT_STATUS-"].update("")
+        if page is None:
+            return
+        # the end of the report is known once its first page is built
+        self._dt_end_date = dt_end_date
+        self._page = page
+        self._num_pages = num_pages
+        self._window["-REPORT_PAGE-"].update(f"Page {page + 1} of {num_pages}")
+        self._window["-PREVPAGE-"].update(disabled=page == 0)
+        self._window["-NEXTPAGE-"].update(disabled=page == num_pages - 1)
+
+    def shutdown(self):
+        """cancel the report in progress and stop the worker thread"""
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+
+def check_startup_updates(window, first_frame_secs):
+    """
+    Check for past dates with scheduled shifts in a background thread once the main window is shown, and
+      post the notices and the job registry back to it with a -STARTUP_DONE- event. work_hrs_help and pandas
+      are imported here.
+
+    :param window: main window object, the notices are posted to it with write_event_value
+    :param first_frame_secs: seconds from start up to the main window being shown
+    :return: None
+    """
+    from loguru import logger
+
+    if first_frame_secs > FIRST_FRAME_TARGET_SECS:
+        logger.warning(
+            "Main window shown in {:.3f} seconds, target is {} seconds",
+            first_frame_secs,
+            FIRST_FRAME_TARGET_SECS,
+        )
+    else:
+        logger.info("Main window shown in {:.3f} seconds", first_frame_secs)
+
+    output_str = ""
+    jobs_df = None
+    try:
+        import work_hrs_help as wh
+
+        jobs_df = wh.read_jobs()
+        # every job is checked in one query
+        for job, update_dates_list in wh.check_for_scheduled_updates().items():
+            output_str += (
+                f"{jobs_df.at[job, 'label']} hours need to be updated:\n"
+                + "\n".join(update_dates_list)
+                + "\n"
             )
+    except Exception as e:
+        logger.exception("Start up check failed")
+        output_str = f"Start up check failed: {e}"
+    window.write_event_value("-STARTUP_DONE-", (output_str, jobs_df))
+
+
+def handle_main_window_event(window, report_worker, event, values):
+    """
+    Handle an event of the main window
+
+    :param window: main window object
+    :param report_worker: ReportWorker of the main window
+    :param event: event read from the main window
+    :param values: values read from the main window
+    :return: None
+    """
+    if event.startswith("-JOBHRS_"):
+        # -JOBHRS_job-
+        job = event[len("-JOBHRS_") : -1]
+        return_str = work_hrs_window(job, manifest_button=job in MANIFEST_JOBS)
+        if return_str != "":
             # print notices to the NOTIFICATIONS window
-            print(display_str)
-
-        if event == "-FUTUREREPORT-":
-            # Make sure that we have the latest info
-            bus_hrs_df = wh.read_work_hrs_table("bus_hours")
-            HD_hrs_df = wh.read_work_hrs_table("HD_hours")
-            delivery_hrs_df = wh.read_work_hrs_table("delivery_hours")
-            eight_day_df = wh.compute_eight_day_df(
-                bus_hrs_df, HD_hrs_df, delivery_hrs_df
-            )
+            print(return_str)
 
-            window["-HRS_OUTPUT-"].update("")
-            window["-NOTIFICATIONS-"].update("")
-            max_date = max(
-                max(bus_hrs_df.date), max(HD_hrs_df.date), max(delivery_hrs_df.date)
-            )
-            window["-HRS_OUTPUT-"].update(
-                wh.get_report_str(
-                    bus_hrs_df,
-                    HD_hrs_df,
-                    delivery_hrs_df,
-                    dt.date.today(),
-                    max_date,
-                    eight_day_df,
-                )
-            )
-            display_str = wh.get_notifications_str(
-                dt.date.today(),
-                dt.datetime.strptime(max_date, DATE_FMT_STR),
-                eight_day_df,
-            )
+    if event == "-CONFIRMSCHEDULED-":
+        confirmed_df = confirm_scheduled_window()
+        if confirmed_df is not None:
             # print notices to the NOTIFICATIONS window
-            print(display_str)
+            print(
+                f"Confirmed {len(confirmed_df)} scheduled shifts"
+                f" on {confirmed_df.date.nunique()} dates"
+            )
 
-        if event == "-CUSTOMREPORT-":
-            custom_beg_date_str, custom_end_date_str = custom_dates_report_window()
+    if event == "-8DAYREPORT-":
+        seven_days_ago = dt.datetime.today() - dt.timedelta(days=7)
+        seven_day_from_now = dt.datetime.today() + dt.timedelta(days=7)
+        report_worker.request("8-day report", seven_days_ago, seven_day_from_now)
 
-            if custom_beg_date_str and custom_end_date_str:
-                try:
-                    dt_beg_date = dt.datetime.strptime(
-                        custom_beg_date_str, DATE_FMT_STR
-                    )
-                    dt_end_date = dt.datetime.strptime(
-                        custom_end_date_str, DATE_FMT_STR
-                    )
-                except ValueError:
-                    print("Formatting error with custom dates")
-                    continue
-
-                if dt_beg_date >= dt_end_date:
-                    print("Begin/End dates out of order")
-                    continue
-
-                # Make sure that we have the latest info
-                bus_hrs_df = wh.read_work_hrs_table("bus_hours")
-                HD_hrs_df = wh.read_work_hrs_table("HD_hours")
-                delivery_hrs_df = wh.read_work_hrs_table("delivery_hours")
-                eight_day_df = wh.compute_eight_day_df(
-                    bus_hrs_df, HD_hrs_df, delivery_hrs_df
-                )
+    if event == "-FUTUREREPORT-":
+        today = dt.datetime.combine(dt.date.today(), dt.time())
+        # the report ends on the last date with a shift
+        report_worker.request("future report", today, None)
+
+    if event == "-CUSTOMREPORT-":
+        custom_beg_date_str, custom_end_date_str = custom_dates_report_window()
+
+        if custom_beg_date_str and custom_end_date_str:
+            try:
+                dt_beg_date = dt.datetime.strptime(custom_beg_date_str, DATE_FMT_STR)
+                dt_end_date = dt.datetime.strptime(custom_end_date_str, DATE_FMT_STR)
+            except ValueError:
+                print("Formatting error with custom dates")
+                return
+
+            if dt_beg_date >= dt_end_date:
+                print("Begin/End dates out of order")
+                return
+
+            report_worker.request("custom report", dt_beg_date, dt_end_date)
 
-                window["-HRS_OUTPUT-"].update("")
+    if event == "-CONFLICTSREPORT-":
+        import work_hrs_help as wh
+
+        # the interval index scans the full history without comparing every pair of shifts
+        window["-HRS_OUTPUT-"].update(wh.get_conflicts_report_str())
+
+    if event == "-TIMINGS-":
+        window["-NOTIFICATIONS-"].update("")
+        if work_hrs_profile.is_enabled():
+            # print the timings to the NOTIFICATIONS window
+            print(work_hrs_profile.get_summary_str())
+        else:
+            work_hrs_profile.enable()
+            print("Timing enabled, click View Timings again for the timings")
+
+    if event == "-PREVPAGE-":
+        report_worker.turn_page(-1)
+
+    if event == "-NEXTPAGE-":
+        report_worker.turn_page(1)
+
+    if event == "-REPORT_DONE-":
+        (
+            report_id,
+            dt_end_date,
+            page,
+            num_pages,
+            report_str,
+            display_str,
+        ) = values[event]
+        # a report finishing after a newer one was requested is dropped
+        if report_worker.is_current(report_id):
+            report_worker.done(dt_end_date, page, num_pages)
+            with work_hrs_profile.timer("Tk update -HRS_OUTPUT-") as tk_timer:
+                tk_timer.rows = report_str.count("\n") + 1
+                window["-HRS_OUTPUT-"].update(report_str)
+            if display_str is not None:
                 window["-NOTIFICATIONS-"].update("")
-                window["-HRS_OUTPUT-"].update(
-                    wh.get_report_str(
-                        bus_hrs_df,
-                        HD_hrs_df,
-                        delivery_hrs_df,
-                        dt_beg_date,
-                        dt_end_date,
-                        eight_day_df,
-                    )
-                )
-                display_str = wh.get_notifications_str(
-                    dt_beg_date, dt_end_date, eight_day_df
-                )
                 # print notices to the NOTIFICATIONS window
                 print(display_str)
 
+    if event == "-STARTUP_DONE-":
+        output_str, jobs_df = values[event]
+        if jobs_df is not None:
+            # a button for each registered job
+            window.extend_layout(
+                window["-JOB_BUTTONS-"], make_work_hours_buttons_layout(jobs_df)
+            )
+        if output_str != "":
+            # print update needed notices to NOTIFICATIONS window
+            print(output_str)
+
+    if event == "-REPORT_FAILED-":
+        report_id, error_str = values[event]
+        if report_worker.is_current(report_id):
+            report_worker.done()
+            print(error_str)
+
+
+def main_window():
+    window = sg.Window(
+        "Work Hours",
+        make_main_layout(),
+        resizable=True,
+        size=(1600, 1000),
+        finalize=True,
+    )
+    first_frame_secs = time.perf_counter() - START_TIME
+    work_hrs_profile.record("time to first frame", first_frame_secs)
+
+    # reports are built in a worker thread and posted back as -REPORT_DONE- events
+    report_worker = ReportWorker(window)
+    # the check for past scheduled shifts doesn't hold up the main window, its notices are posted back as a
+    #   -STARTUP_DONE- event
+    threading.Thread(
+        target=check_startup_updates, args=(window, first_frame_secs), daemon=True
+    ).start()
+    # only imported once the main window is shown, it imports loguru
+    import work_hrs_db
+
+    event_timer = work_hrs_profile.NULL_TIMER
+    while True:
+        # the handling of an event is timed until the next read, timeouts aren't timed
+        event_timer.stop()
+        event, values = window.read(timeout=100)
+        if event != sg.TIMEOUT_EVENT:
+            event_timer = work_hrs_profile.timer(f"main window {event}").start()
+        else:
+            event_timer = work_hrs_profile.NULL_TIMER
+
+        if event == sg.WIN_CLOSED:
+            break
+
+        try:
+            handle_main_window_event(window, report_worker, event, values)
+        except work_hrs_db.DatabaseError as e:
+            # the window stays open to show why the database can't be used
+            print(e)
+
+    event_timer.stop()
+    report_worker.shutdown()
+    # the shifts window prefetches weeks in a worker thread of the week cache
+    import work_hrs_help as wh
+
+    wh.week_cache.shutdown()
+    window.close()
+
 
 if __name__ == "__main__":
     main_window()
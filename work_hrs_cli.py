@@ -0,0 +1,418 @@
+#######################################################
+# work_hrs_cli.py - Command line interface for work_hours.py
+#######################################################
+# Only the standard library is imported at module load, work_hrs_help (and pandas)
+# are imported by the commands that need them, and the GUI is never imported.
+import argparse
+import datetime as dt
+import os
+import sys
+
+DATE_FMT_STR = "%Y-%m-%d"
+# exit status when the database can't be opened, 1 is kept for broken limits, conflicts and bad manifests
+DB_ERROR_STATUS = 3
+
+
+def parse_date(date_str):
+    """argparse type for YYYY-MM-DD dates"""
+    try:
+        return dt.datetime.strptime(date_str, DATE_FMT_STR)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{date_str} is not a YYYY-MM-DD date")
+
+
+def get_date_range(args, default_beg_date, default_end_date):
+    """
+    Resolve the --from/--to dates of a command
+
+    :param args: parsed arguments
+    :param default_beg_date: datetime object used when --from is not given
+    :param default_end_date: datetime object used when --to is not given, None for the last date with a shift
+    :return: tuple of datetime objects (beginning date, ending date), None after printing why if the dates
+      can't be resolved
+    """
+    import work_hrs_help as wh
+
+    dt_beg_date = args.beg_date or default_beg_date
+    dt_end_date = args.end_date or default_end_date
+    if dt_end_date is None:
+        eight_day_df = wh.eight_day_cache.get_eight_day_df()
+        if eight_day_df.empty:
+            print("No shifts saved yet, give the last date with --to", file=sys.stderr)
+            return None
+        dt_end_date = dt.datetime.strptime(eight_day_df.date.iloc[-1], DATE_FMT_STR)
+    if args.beg_date and args.end_date and args.beg_date > args.end_date:
+        print(
+            f"The first date {dt_beg_date:%Y-%m-%d} is after the last date"
+            f" {dt_end_date:%Y-%m-%d}",
+            file=sys.stderr,
+        )
+        return None
+    return dt_beg_date, dt_end_date
+
+
+def report_cmd(args):
+    """print the shifts report and its alerts for a range of dates, default is the 8-day report"""
+    import work_hrs_help as wh
+
+    today = dt.datetime.combine(dt.date.today(), dt.time())
+    date_range = get_date_range(
+        args, today - dt.timedelta(days=7), today + dt.timedelta(days=7)
+    )
+    if date_range is None:
+        return 2
+    dt_beg_date, dt_end_date = date_range
+    eight_day_df = wh.eight_day_cache.get_eight_day_df()
+    # lines are written as they are generated, the report is never held in memory
+    for line_str in wh.iter_report_lines(dt_beg_date, dt_end_date, eight_day_df):
+        print(line_str)
+    print(wh.get_notifications_str(dt_beg_date, dt_end_date, eight_day_df))
+    return 0
+
+
+def alerts_cmd(args):
+    """print the alerts for a range of dates, default is today to the last date with a shift"""
+    import work_hrs_help as wh
+
+    today = dt.datetime.combine(dt.date.today(), dt.time())
+    date_range = get_date_range(args, today, None)
+    if date_range is None:
+        return 2
+    dt_beg_date, dt_end_date = date_range
+    eight_day_df = wh.eight_day_cache.get_eight_day_df()
+    alerts_df = wh.evaluate_alerts(
+        eight_day_df[
+            (eight_day_df.date >= dt_beg_date.strftime(DATE_FMT_STR))
+            & (eight_day_df.date <= dt_end_date.strftime(DATE_FMT_STR))
+        ]
+    )
+    print(wh.render_alerts(alerts_df), end="")
+    # a non-zero exit status lets scripts and timers react to broken limits
+    return 1 if (alerts_df.severity == "alert").any() else 0
+
+
+def pending_updates_cmd(args):
+    """print the dates before today that still have scheduled shifts, for every job"""
+    import work_hrs_help as wh
+
+    jobs_df = wh.read_jobs()
+    for job, update_dates_list in wh.check_for_scheduled_updates().items():
+        print(f"{jobs_df.at[job, 'label']} hours need to be updated:")
+        print("\n".join(update_dates_list))
+    return 0
+
+
+def conflicts_cmd(args):
+    """print the shifts of different jobs that overlap, over the full history"""
+    import work_hrs_help as wh
+
+    conflicts = wh.shift_interval_index.find_conflicts()
+    print(wh.get_conflicts_report_str(conflicts))
+    return 1 if conflicts else 0
+
+
+def history_cmd(args):
+    """print the journal of changes to the shifts of a range of dates"""
+    import work_hrs_help as wh
+
+    history_df = wh.read_history(
+        args.beg_date.strftime(DATE_FMT_STR) if args.beg_date else None,
+        args.end_date.strftime(DATE_FMT_STR) if args.end_date else None,
+        args.job,
+    )
+    for entry in history_df.itertuples():
+        kind_str = entry.kind
+        if entry.kind == "undo" or entry.kind == "redo":
+            # undo and redo changesets refer to the saved or imported changeset
+            kind_str += f" of #{int(entry.ref_id)}"
+        if entry.action == "insert":
+            change_str = f"{entry.start[11:]}-{entry.end[11:]}"
+        elif entry.action == "delete":
+            change_str = f"{entry.old_start[11:]}-{entry.old_end[11:]}"
+        else:
+            change_str = (
+                f"{entry.old_start[11:]}-{entry.old_end[11:]}"
+                f" -> {entry.start[11:]}-{entry.end[11:]}"
+            )
+            if entry.scheduled != entry.old_scheduled:
+                # e.g. confirmed scheduled shifts, whose times don't change
+                change_str += (
+                    f" scheduled {int(entry.old_scheduled)} -> {int(entry.scheduled)}"
+                )
+        print(
+            f"{entry.timestamp}  #{entry.changeset_id:<5} {kind_str:<16} {entry.job:<10}"
+            f" {entry.date}  {entry.action:<7} {change_str}"
+        )
+    return 0
+
+
+def compact_history_cmd(args):
+    """delete the journal entries of changes written before a date"""
+    import work_hrs_help as wh
+
+    num_deleted = wh.compact_journal(args.before.strftime(DATE_FMT_STR))
+    print(f"Deleted {num_deleted} changesets written before {args.before:%Y-%m-%d}")
+    return 0
+
+
+def confirm_scheduled_cmd(args):
+    """mark the past shifts still scheduled as actual shifts, in bulk"""
+    import work_hrs_help as wh
+
+    for job in args.jobs or []:
+        if job not in wh.read_jobs().index:
+            print(f"{job} is not a job", file=sys.stderr)
+            return 2
+
+    shifts_df = wh.confirm_scheduled_shifts(
+        args.jobs,
+        args.beg_date.strftime(DATE_FMT_STR) if args.beg_date else None,
+        args.end_date.strftime(DATE_FMT_STR) if args.end_date else None,
+        [exclude_date.strftime(DATE_FMT_STR) for exclude_date in args.exclude],
+        args.dry_run,
+    )
+    print(wh.render_confirmed_shifts(shifts_df))
+    if args.dry_run:
+        print(f"Dry run, {len(shifts_df)} shifts not confirmed")
+    return 0
+
+
+def iter_manifest_sources(paths):
+    """
+    Open the manifest text files of a list of paths one at a time
+
+    :param paths: list of paths of files, of directories of .txt files or - for stdin
+    :return: generator of (name, open file) pairs
+    """
+    for path in paths:
+        if path == "-":
+            yield "stdin", sys.stdin
+            continue
+        if os.path.isdir(path):
+            file_paths = [
+                os.path.join(path, file_name)
+                for file_name in sorted(os.listdir(path))
+                if file_name.endswith(".txt")
+            ]
+        else:
+            file_paths = [path]
+        for file_path in file_paths:
+            if os.path.isfile(file_path):
+                with open(file_path, encoding="utf-8", errors="replace") as f:
+                    yield file_path, f
+
+
+def import_manifests_cmd(args):
+    """import the shifts of many manifests at once, from text files, directories of text files or stdin"""
+    import work_hrs_help as wh
+    import work_hrs_manifest
+
+    for path in args.paths:
+        if path != "-" and not os.path.exists(path):
+            print(f"{path} not found", file=sys.stderr)
+            return 2
+    if args.job not in wh.read_jobs().index:
+        print(f"{args.job} is not a job", file=sys.stderr)
+        return 2
+    if args.grammar and work_hrs_manifest.get_grammar(args.grammar) is None:
+        grammar_names = [
+            grammar.name for grammar in work_hrs_manifest.MANIFEST_GRAMMARS
+        ]
+        print(
+            f"{args.grammar} is not a manifest grammar: {', '.join(grammar_names)}",
+            file=sys.stderr,
+        )
+        return 2
+
+    summary_df, changeset_df = wh.import_manifests(
+        iter_manifest_sources(args.paths),
+        args.job,
+        args.year,
+        args.dry_run,
+        args.grammar,
+    )
+    print(wh.render_manifest_summary(summary_df))
+    if args.dry_run:
+        print(f"Dry run, {len(changeset_df)} shift changes not written")
+    # a non-zero exit status when a manifest couldn't be imported
+    return 1 if (summary_df.status == "error").any() else 0
+
+
+def build_parser():
+    """return the argument parser of the command line interface"""
+    parser = argparse.ArgumentParser(
+        prog="work_hours",
+        description="Work hours reports and alerts, without the GUI.",
+    )
+    parser.add_argument(
+        "--db",
+        help="path of the work hours database,"
+        f" exits with status {DB_ERROR_STATUS} if it can't be opened",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="show informational log messages"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the timings of the work_hrs_help calls to stderr",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        help="with --profile, dump a cProfile stats file of each outermost call here",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    report_parser = subparsers.add_parser(
+        "report", help="shifts report, default is 7 days before and after today"
+    )
+    alerts_parser = subparsers.add_parser(
+        "alerts",
+        help="hours limit alerts, default is today to the last date with a shift;"
+        " exits with status 1 if a limit is exceeded",
+    )
+    for date_parser in (report_parser, alerts_parser):
+        date_parser.add_argument(
+            "--from", dest="beg_date", type=parse_date, help="first date, YYYY-MM-DD"
+        )
+        date_parser.add_argument(
+            "--to", dest="end_date", type=parse_date, help="last date, YYYY-MM-DD"
+        )
+    report_parser.set_defaults(func=report_cmd)
+    alerts_parser.set_defaults(func=alerts_cmd)
+
+    pending_parser = subparsers.add_parser(
+        "pending-updates", help="past dates with shifts still marked as scheduled"
+    )
+    pending_parser.set_defaults(func=pending_updates_cmd)
+
+    conflicts_parser = subparsers.add_parser(
+        "conflicts",
+        help="shifts of different jobs that overlap;"
+        " exits with status 1 if there are any",
+    )
+    conflicts_parser.set_defaults(func=conflicts_cmd)
+
+    history_parser = subparsers.add_parser(
+        "history", help="journal of changes to the shifts, oldest first"
+    )
+    history_parser.add_argument(
+        "--from", dest="beg_date", type=parse_date, help="first shift date, YYYY-MM-DD"
+    )
+    history_parser.add_argument(
+        "--to", dest="end_date", type=parse_date, help="last shift date, YYYY-MM-DD"
+    )
+    history_parser.add_argument("--job", help="only the changes of this job")
+    history_parser.set_defaults(func=history_cmd)
+
+    compact_parser = subparsers.add_parser(
+        "compact-history",
+        help="delete the journal entries of changes written before a date,"
+        " they can't be undone anymore",
+    )
+    compact_parser.add_argument(
+        "--before", required=True, type=parse_date, help="date, YYYY-MM-DD"
+    )
+    compact_parser.set_defaults(func=compact_history_cmd)
+
+    confirm_parser = subparsers.add_parser(
+        "confirm-scheduled",
+        help="mark the shifts before today that are still scheduled as actual shifts,"
+        " in one transaction; undone like a save",
+    )
+    confirm_parser.add_argument(
+        "--job",
+        dest="jobs",
+        action="append",
+        help="only the shifts of this job, can be repeated, default is every job",
+    )
+    confirm_parser.add_argument(
+        "--from", dest="beg_date", type=parse_date, help="first date, YYYY-MM-DD"
+    )
+    confirm_parser.add_argument(
+        "--to", dest="end_date", type=parse_date, help="last date, YYYY-MM-DD"
+    )
+    confirm_parser.add_argument(
+        "--exclude",
+        nargs="+",
+        type=parse_date,
+        default=[],
+        help="dates whose shifts stay scheduled, YYYY-MM-DD",
+    )
+    confirm_parser.add_argument(
+        "--dry-run", action="store_true", help="list the shifts without confirming"
+    )
+    confirm_parser.set_defaults(func=confirm_scheduled_cmd)
+
+    import_parser = subparsers.add_parser(
+        "import-manifests",
+        help="import the shifts of many manifests in one transaction;"
+        " exits with status 1 if a manifest can't be imported",
+    )
+    import_parser.add_argument(
+        "paths",
+        nargs="+",
+        help="text files with any number of manifests, directories of .txt files or - for stdin",
+    )
+    import_parser.add_argument(
+        "--job", default="bus", help="job of the manifests, default is bus"
+    )
+    import_parser.add_argument(
+        "--year",
+        type=int,
+        help="year of the manifest dates, default is the next date on or after today",
+    )
+    import_parser.add_argument(
+        "--grammar", help="manifest grammar of every manifest, default is auto-detect"
+    )
+    import_parser.add_argument(
+        "--dry-run", action="store_true", help="check the manifests without writing"
+    )
+    import_parser.set_defaults(func=import_manifests_cmd)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the command line interface
+
+    :param argv: list of arguments, defaults to sys.argv[1:]
+    :return: exit status
+    """
+    args = build_parser().parse_args(argv)
+
+    from loguru import logger
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+    if args.profile or args.profile_dir:
+        import work_hrs_profile
+
+        work_hrs_profile.enable(args.profile_dir)
+
+    import work_hrs_db
+
+    if args.db:
+        import work_hrs_help as wh
+
+        wh.set_db_path(args.db)
+
+    try:
+        return args.func(args)
+    except work_hrs_db.DatabaseError as e:
+        print(e, file=sys.stderr)
+        return DB_ERROR_STATUS
+    except BrokenPipeError:
+        # output piped to a command that stopped reading, e.g. head
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if args.profile or args.profile_dir:
+            print(work_hrs_profile.get_summary_str(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
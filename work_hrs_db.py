@@ -0,0 +1,98 @@
+#######################################################
+# work_hrs_db.py - SQLite connection manager for work_hours.py
+#######################################################
+import os
+import sqlite3
+import threading
+from loguru import logger
+
+# environment variable with the path of the work hours database
+DB_PATH_ENV_VAR = "WORK_HOURS_DB"
+# default database, next to this module so the program can be started from any directory
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "work_hours.sqlite"
+)
+
+# pragmas set on every new connection
+CONNECTION_PRAGMAS = {
+    "journal_mode": "WAL",  # readers don't block the writer, one fsync per commit
+    "synchronous": "NORMAL",  # safe with WAL, skips the fsync of every transaction
+    "cache_size": -20000,  # negative values are KiB, 20 MB page cache
+    "mmap_size": 268435456,  # map up to 256 MB of the database file
+    "temp_store": "MEMORY",
+}
+
+_db_path = None
+# one long lived connection per thread, SQLite connections can't be shared between threads
+_thread_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+# bumped by close_connections(), threads reopen connections from an older generation
+_generation = 0
+
+
+class DatabaseError(Exception):
+    """The work hours database can't be opened or upgraded"""
+
+
+def get_db_path():
+    """
+    Resolve the path of the work hours database: a path set with set_db_path(), the WORK_HOURS_DB
+      environment variable, or work_hours.sqlite next to this module
+
+    :return: path of the database file
+    """
+    if _db_path is not None:
+        return _db_path
+    return os.environ.get(DB_PATH_ENV_VAR, DEFAULT_DB_PATH)
+
+
+def set_db_path(db_path):
+    """
+    Use a different database file, open connections to the previous database are closed
+
+    :param db_path: path of the database file, None to go back to the default
+    :return: None
+    """
+    global _db_path
+    close_connections()
+    _db_path = db_path
+
+
+def get_connection():
+    """
+    Return the long lived connection of the calling thread, opening it on first use
+
+    :return: SQLite connection
+    """
+    conn = getattr(_thread_local, "conn", None)
+    if conn is None or _thread_local.generation != _generation:
+        db_path = get_db_path()
+        logger.info("Opening {}.", db_path)
+        conn = sqlite3.connect(db_path)
+        for pragma, value in CONNECTION_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        _thread_local.conn = conn
+        _thread_local.generation = _generation
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+
+def close_connections():
+    """
+    Close the connections of all threads, each thread opens a new one on its next get_connection()
+
+    :return: None
+    """
+    global _generation
+    with _connections_lock:
+        _generation += 1
+        for conn in _connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # connections of other threads can only be closed by their own thread,
+                # they are released when that thread opens its next connection
+                pass
+        _connections.clear()
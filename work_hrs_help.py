@@ -2,70 +2,767 @@
 # work_hrs_help.py - A helper module for work_hours.py
 # written by Mark Alexander (alexander.markv@gmail.com)
 #######################################################
-import sqlite3
 import pandas as pd
+import numpy as np
 import datetime as dt
+import collections
+import concurrent.futures
 import re
-import sys
+import sqlite3
+import threading
 from loguru import logger
+import work_hrs_db
+import work_hrs_manifest
+import work_hrs_profile
 
 DATE_TIME_FMT_STR = "%Y-%m-%d %H:%M"
 DATE_FMT_STR = "%Y-%m-%d"
+TIMESTAMP_FMT_STR = "%Y-%m-%d %H:%M:%S"
+# weeks kept by the week cache of the shifts window
+WEEK_CACHE_SIZE = 64
+# days of shifts read from the database at a time by reports that stream their lines
+REPORT_CHUNK_DAYS = 31
+
+
+# jobs that existed before the job registry, each one had its own work hours table
+# (job, legacy table, label, abbreviation, colour, hours count as driving)
+# fed800: National School Bus Yellow, ee7125: Home Depot orange
+DEFAULT_JOBS = [
+    ("bus", "bus_hours", "Bus", "Bus", "#fed800", 1),
+    ("HD", "HD_hours", "HD", "HD", "#ee7125", 0),
+    ("delivery", "delivery_hours", "Delivery", "Del", "green", 1),
+]
+
+# eight day DataFrame column names of the default jobs, other jobs use "<job>_tot_hrs"
+TOT_HRS_COLUMNS = {
+    "bus": "bus_tot_hrs",
+    "HD": "HD_tot_hrs",
+    "delivery": "deliver_tot_hrs",
+}
+# report column titles of the default jobs, other jobs use "---<abbrev> Shift---"
+SHIFT_TITLES = {"delivery": "--Del Shift--"}
+# suffix of the per-job tables of older databases once their shifts are moved into the shifts table
+LEGACY_BACKUP_SUFFIX = "_backup"
+
+# labels of the alert severities
+ALERT_SEVERITIES = {"alert": "-ALERT-:", "warning": "Warning:", "note": "Note:"}
+
+ALERT_COMPARISONS = {"ge": np.greater_equal, "gt": np.greater}
+
+# hours limits checked against the eight day DataFrame
+# (rule, metric column, tiers), the most severe tier first: (severity, threshold, comparison, message)
+# a tier only matches values below the threshold of the tier before it, so a value of exactly 75 hours in
+#   8 days, 12 working hours or 10 driving hours is neither a warning nor a note
+ALERT_RULES = [
+    (
+        "80_hrs",
+        "eight_day_window",
+        [
+            ("alert", dt.timedelta(hours=80), "ge", "Exceeding 80 hours on"),
+            ("warning", dt.timedelta(hours=75), "gt", "Exceeding 75 of 80 hours on"),
+            ("note", dt.timedelta(hours=70), "gt", "Exceeding 70 of 80 hours on"),
+        ],
+    ),
+    (
+        "15_work_hrs",
+        "daily_tot_hrs",
+        [
+            ("alert", dt.timedelta(hours=15), "ge", "Exceeding 15 working hours on"),
+            (
+                "warning",
+                dt.timedelta(hours=12),
+                "gt",
+                "Exceeding 12 of 15 working hours on",
+            ),
+            (
+                "note",
+                dt.timedelta(hours=10),
+                "gt",
+                "Exceeding 10 of 15 working hours on",
+            ),
+        ],
+    ),
+    (
+        "12_drive_hrs",
+        "drive_tot_hrs",
+        [
+            ("alert", dt.timedelta(hours=12), "ge", "Exceeding 12 driving hours on"),
+            (
+                "warning",
+                dt.timedelta(hours=10),
+                "gt",
+                "Exceeding 10 of 12 driving hours on",
+            ),
+            ("note", dt.timedelta(hours=8), "gt", "Exceeding 8 of 12 driving hours on"),
+        ],
+    ),
+]
+
+# changeset columns recorded in the journal table, after the changeset id
+JOURNAL_COLUMNS = [
+    "action",
+    "id",
+    "date",
+    "start",
+    "end",
+    "scheduled",
+    "old_start",
+    "old_end",
+    "old_scheduled",
+]
+
+# path of the database whose schema has been checked and upgraded this session
+_upgraded_db_path = None
+_upgrade_lock = threading.Lock()
+# job registry DataFrame, read once per session
+_jobs_df = None
+
+
+def upgrade_db(conn):
+    """
+    Create the jobs, shifts and journal tables and their indexes if they don't exist yet, and move shifts from
+      the per-job tables (bus_hours, HD_hours, delivery_hours) of older databases into the shifts table. The
+      per-job tables are renamed with LEGACY_BACKUP_SUFFIX, not dropped.
+
+    :param conn: open SQLite connection
+    :return: None
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        " job TEXT NOT NULL PRIMARY KEY,"
+        " label TEXT NOT NULL,"
+        " abbrev TEXT NOT NULL,"
+        " color TEXT,"
+        " driving INTEGER NOT NULL DEFAULT 0,"
+        " position INTEGER NOT NULL DEFAULT 0)"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS shifts ("
+        " id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,"
+        " job TEXT NOT NULL REFERENCES jobs (job),"
+        " date TEXT NOT NULL,"
+        " start TEXT NOT NULL,"
+        " end TEXT NOT NULL,"
+        " scheduled INTEGER NOT NULL DEFAULT 0,"
+        " comments TEXT)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS shifts_date_idx ON shifts (date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS shifts_start_idx ON shifts (start)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS shifts_job_date_idx ON shifts (job, date)"
+    )
+    # only the few shifts still marked as scheduled are in this index
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS shifts_scheduled_idx ON shifts (job, date)"
+        " WHERE scheduled = 1"
+    )
+
+    # append-only journal of the changesets written to the shifts table,
+    # undo and redo changesets refer to the saved changeset they undo or redo
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS changesets ("
+        " id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,"
+        " timestamp TEXT NOT NULL,"
+        " job TEXT NOT NULL,"
+        " kind TEXT NOT NULL,"
+        " ref_id INTEGER)"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS journal ("
+        " id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,"
+        " changeset_id INTEGER NOT NULL REFERENCES changesets (id),"
+        " action TEXT NOT NULL,"
+        " shift_id INTEGER NOT NULL,"
+        " date TEXT NOT NULL,"
+        " start TEXT,"
+        " end TEXT,"
+        " scheduled INTEGER,"
+        " old_start TEXT,"
+        " old_end TEXT,"
+        " old_scheduled INTEGER)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS changesets_job_idx ON changesets (job, id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS changesets_timestamp_idx ON changesets (timestamp)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS journal_date_idx ON journal (date)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS journal_changeset_idx ON journal (changeset_id)"
+    )
 
+    for position, (job, legacy_table, label, abbrev, color, driving) in enumerate(
+        DEFAULT_JOBS
+    ):
+        cursor.execute(
+            "INSERT OR IGNORE INTO jobs (job, label, abbrev, color, driving, position)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (job, label, abbrev, color, driving, position),
+        )
+        legacy_exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (legacy_table,),
+        ).fetchone()
+        if legacy_exists:
+            logger.info("Moving {} into the shifts table.", legacy_table)
+            cursor.execute(
+                "INSERT INTO shifts (job, date, start, end, scheduled, comments)"
+                " SELECT ?, date, start, end, COALESCE(scheduled, 0), comments"
+                f" FROM {legacy_table} ORDER BY id",
+                (job,),
+            )
+            # kept as a backup of the shifts history, it isn't read anymore
+            cursor.execute(
+                f"ALTER TABLE {legacy_table} RENAME TO {legacy_table}{LEGACY_BACKUP_SUFFIX}"
+            )
 
-def read_work_hrs_table(db_table):
+    conn.commit()
+    cursor.close()
+
+
+def connect_db():
     """
-    Read a work hours table from SQLite database and create a DataFrame
+    Get the work hours database connection of this thread from the connection manager,
+      upgrading the database schema on the first connection of the session
 
-    :param db_table: name of the work hours table
-    :return: Pandas DataFrame of info from the work hours table
+    :return: SQLite connection
+    :raises work_hrs_db.DatabaseError: if the database can't be opened or upgraded
     """
+    global _upgraded_db_path
     try:
-        with sqlite3.connect("work_hours.sqlite") as conn:
-            select_str = f"SELECT * FROM {db_table}"
-            return pd.read_sql(select_str, conn, index_col="id")
-    except FileNotFoundError:
-        logger.critical("SQL file not found! Exiting.")
-        sys.exit()
+        conn = work_hrs_db.get_connection()
+        if _upgraded_db_path != work_hrs_db.get_db_path():
+            # the other threads wait for the upgrade instead of writing the schema at the same time
+            with _upgrade_lock:
+                if _upgraded_db_path != work_hrs_db.get_db_path():
+                    upgrade_db(conn)
+                    _upgraded_db_path = work_hrs_db.get_db_path()
+    except sqlite3.Error as e:
+        # every database helper connects here. The GUI and the CLI report the error, and worker threads post it
+        #   back to the main window like any other failure
+        raise work_hrs_db.DatabaseError(
+            f"Can't open {work_hrs_db.get_db_path()}: {e}"
+        ) from e
+    return conn
+
+
+def set_db_path(db_path):
+    """
+    Use a different work hours database for this session, dropping everything cached from the previous one
 
+    :param db_path: path of the database file, None to go back to the default
+    :return: None
+    """
+    global _upgraded_db_path, _jobs_df
+    work_hrs_db.set_db_path(db_path)
+    with _upgrade_lock:
+        _upgraded_db_path = None
+    _jobs_df = None
+    eight_day_cache.clear()
+    shift_interval_index.clear()
+    week_cache.clear()
+
+
+@work_hrs_profile.timed()
+def read_jobs():
+    """
+    Read the job registry, once per session
 
-def write_work_hrs_table(db_table, work_hrs_date_df, new_work_hrs_date_df):
+    :return: Pandas DataFrame of jobs indexed by job, in display order, with label, abbrev, color and driving columns
     """
-    Write new shift info to a work hours table in SQLite database
+    global _jobs_df
+    if _jobs_df is None:
+        with connect_db() as conn:
+            _jobs_df = pd.read_sql(
+                "SELECT * FROM jobs ORDER BY position", conn, index_col="job"
+            )
+    return _jobs_df
 
-    :param db_table: name of the database work hours table
-    :param work_hrs_date_df: original work hours DataFrame before modification
-    :param new_work_hrs_date_df: DataFrame with new work hours information
-    :return: None
+
+def tot_hrs_column(job):
+    """return the eight day DataFrame column name with the daily total hours of a job"""
+    return TOT_HRS_COLUMNS.get(job, f"{job}_tot_hrs")
+
+
+def parse_work_hrs_times(work_hrs_df):
+    """
+    Add parsed datetime columns (start_dt, end_dt) and a shift duration column to a work hours DataFrame
+
+    :param work_hrs_df: a work hours DataFrame with start and end strings (YYYY-MM-DD HH:MM)
+    :return: the same DataFrame with the start_dt, end_dt and duration columns added
+    """
+    work_hrs_df["start_dt"] = pd.to_datetime(
+        work_hrs_df.start, format=DATE_TIME_FMT_STR
+    )
+    work_hrs_df["end_dt"] = pd.to_datetime(work_hrs_df.end, format=DATE_TIME_FMT_STR)
+    work_hrs_df["duration"] = work_hrs_df.end_dt - work_hrs_df.start_dt
+    return work_hrs_df
+
+
+@work_hrs_profile.timed()
+def read_shifts_table(beg_date_str=None, end_date_str=None, job=None):
+    """
+    Read shifts of all jobs from SQLite database and create a DataFrame
+
+    :param beg_date_str: optional first date (YYYY-MM-DD) to read, defaults to the first date in the table
+    :param end_date_str: optional last date (YYYY-MM-DD) to read, defaults to the last date in the table
+    :param job: optional job to read, defaults to all jobs
+    :return: Pandas DataFrame of shifts with a job column, and parsed start_dt, end_dt and duration columns
+    """
+    where_strs = []
+    params = []
+    if job is not None:
+        where_strs.append("job = ?")
+        params.append(job)
+    if beg_date_str is not None:
+        where_strs.append("date >= ?")
+        params.append(beg_date_str)
+    if end_date_str is not None:
+        where_strs.append("date <= ?")
+        params.append(end_date_str)
+
+    select_str = "SELECT * FROM shifts"
+    if where_strs:
+        select_str += " WHERE " + " AND ".join(where_strs)
+    select_str += " ORDER BY date, id"
+
+    with connect_db() as conn:
+        shifts_df = pd.read_sql(select_str, conn, index_col="id", params=params)
+
+    return parse_work_hrs_times(shifts_df)
+
+
+@work_hrs_profile.timed()
+def read_work_hrs_table(job, beg_date_str=None, end_date_str=None):
+    """
+    Read the shifts of a single job from SQLite database and create a DataFrame
+
+    :param job: name of the job
+    :param beg_date_str: optional first date (YYYY-MM-DD) to read, defaults to the first date in the table
+    :param end_date_str: optional last date (YYYY-MM-DD) to read, defaults to the last date in the table
+    :return: Pandas DataFrame of the job's shifts, with parsed start_dt, end_dt and duration columns
+    """
+    return read_shifts_table(beg_date_str, end_date_str, job=job)
+
+
+@work_hrs_profile.timed()
+def compute_shifts_changeset(work_hrs_df, new_work_hrs_df):
+    """
+    Diff the original and new shifts of any number of days in one pass. Shifts are matched by their position
+      within each date (slot): matching shifts that differ are updates, extra original shifts are deletes and
+      extra new shifts are inserts.
+
+    :param work_hrs_df: original work hours DataFrame with id, date, start, end and scheduled columns
+    :param new_work_hrs_df: work hours DataFrame with the new date, start, end and scheduled columns
+    :return: changeset DataFrame with action (insert, update or delete), id, date, start, end, scheduled,
+      old_start, old_end and old_scheduled columns, ordered by date and slot, empty if nothing changed
+    """
+    columns = ["date", "start", "end", "scheduled"]
+    old_df = work_hrs_df[["id"] + columns].astype({"id": "Int64", "scheduled": "Int64"})
+    new_df = new_work_hrs_df[columns].astype({"scheduled": "Int64"})
+    old_df = old_df.assign(slot=old_df.groupby("date").cumcount())
+    new_df = new_df.assign(slot=new_df.groupby("date").cumcount())
+
+    merged_df = old_df.rename(
+        columns={
+            "start": "old_start",
+            "end": "old_end",
+            "scheduled": "old_scheduled",
+        }
+    ).merge(new_df, on=["date", "slot"], how="outer", indicator=True)
+    action = np.select(
+        [
+            merged_df._merge == "right_only",
+            merged_df._merge == "left_only",
+            (merged_df.start != merged_df.old_start)
+            | (merged_df.end != merged_df.old_end)
+            | (merged_df.scheduled != merged_df.old_scheduled).fillna(True),
+        ],
+        ["insert", "delete", "update"],
+        default="",
+    )
+    changeset_df = merged_df.assign(action=action)[action != ""]
+    return changeset_df.sort_values(["date", "slot"])[
+        [
+            "action",
+            "id",
+            "date",
+            "start",
+            "end",
+            "scheduled",
+            "old_start",
+            "old_end",
+            "old_scheduled",
+        ]
+    ].reset_index(drop=True)
+
+
+def invert_shifts_changeset(changeset_df):
+    """
+    Build the changeset that undoes a changeset: inserts become deletes, deletes become inserts of the same
+      ids and updates restore the old values
+
+    :param changeset_df: changeset DataFrame as returned by apply_shifts_changeset()
+    :return: the inverse changeset DataFrame
+    """
+    return changeset_df.assign(
+        action=changeset_df.action.map(
+            {"insert": "delete", "delete": "insert", "update": "update"}
+        ),
+        start=changeset_df.old_start,
+        end=changeset_df.old_end,
+        scheduled=changeset_df.old_scheduled,
+        old_start=changeset_df.start,
+        old_end=changeset_df.end,
+        old_scheduled=changeset_df.scheduled,
+    )
+
+
+@work_hrs_profile.timed()
+def apply_shifts_changeset(job, changeset_df, kind="save", ref_id=None):
+    """
+    Write a changeset of a job to the shifts table in SQLite database and record it in the journal, with bound
+      parameters in a single transaction
+
+    :param job: name of the job
+    :param changeset_df: changeset DataFrame as returned by compute_shifts_changeset(), inserts with an id
+      reuse it (e.g. to undo a delete)
+    :param kind: journal kind of the changeset: save, import, undo or redo
+    :param ref_id: for undo and redo, the id of the saved changeset undone or redone
+    :return: the changeset that was written, with the ids of the inserted shifts filled in
+    """
+    changeset_df = changeset_df.copy()
+    update_rows = []
+    delete_rows = []
+    for change in changeset_df.itertuples():
+        if change.action == "update":
+            update_rows.append(
+                (change.start, change.end, int(change.scheduled), int(change.id))
+            )
+        elif change.action == "delete":
+            delete_rows.append((int(change.id),))
+    insert_df = changeset_df[changeset_df.action == "insert"]
+
+    logger.info(
+        "Writing shifts for {}: {} updated, {} deleted, {} inserted.",
+        job,
+        len(update_rows),
+        len(delete_rows),
+        len(insert_df),
+    )
+    conn = connect_db()
+    with conn:
+        conn.executemany(
+            "UPDATE shifts SET start = ?, end = ?, scheduled = ? WHERE id = ?",
+            update_rows,
+        )
+        conn.executemany("DELETE FROM shifts WHERE id = ?", delete_rows)
+        # inserted one at a time to read back the id of each new shift
+        for idx, change in zip(insert_df.index, insert_df.itertuples()):
+            cursor = conn.execute(
+                "INSERT INTO shifts (id, job, date, start, end, scheduled)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    None if pd.isna(change.id) else int(change.id),
+                    job,
+                    change.date,
+                    change.start,
+                    change.end,
+                    int(change.scheduled),
+                ),
+            )
+            changeset_df.at[idx, "id"] = cursor.lastrowid
+
+        changeset_id = conn.execute(
+            "INSERT INTO changesets (timestamp, job, kind, ref_id)"
+            " VALUES (?, ?, ?, ?)",
+            (dt.datetime.now().strftime(TIMESTAMP_FMT_STR), job, kind, ref_id),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO journal (changeset_id, action, shift_id, date, start, end,"
+            " scheduled, old_start, old_end, old_scheduled)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (changeset_id,)
+                + tuple(None if pd.isna(value) else value for value in change)
+                for change in changeset_df[JOURNAL_COLUMNS]
+                .astype(object)
+                .itertuples(index=False)
+            ],
+        )
+
+    dates = changeset_df.date.tolist()
+    eight_day_cache.invalidate(job, dates)
+    week_cache.invalidate(job, dates)
+    shift_interval_index.apply_changeset(job, changeset_df)
+    return changeset_df
+
+
+@work_hrs_profile.timed()
+def read_changeset(changeset_id):
+    """
+    Read a changeset back from the journal
+
+    :param changeset_id: id of the changeset in the changesets table
+    :return: changeset DataFrame, as returned by compute_shifts_changeset()
+    """
+    with connect_db() as conn:
+        changeset_df = pd.read_sql(
+            "SELECT action, shift_id AS id, date, start, end, scheduled, old_start,"
+            " old_end, old_scheduled FROM journal WHERE changeset_id = ? ORDER BY id",
+            conn,
+            params=[changeset_id],
+        )
+    return changeset_df.astype(
+        {"id": "Int64", "scheduled": "Int64", "old_scheduled": "Int64"}
+    )
+
+
+def get_undo_redo_ids(job):
+    """
+    Replay the journal of a job to find the saved, imported and confirm changesets that can be undone and
+      redone
+
+    :param job: name of the job
+    :return: tuple of lists of saved, imported and confirm changeset ids (undo stack, redo stack), the next one
+      to undo or redo last
+    """
+    with connect_db() as conn:
+        changesets = conn.execute(
+            "SELECT id, kind, ref_id FROM changesets WHERE job = ? ORDER BY id",
+            (job,),
+        ).fetchall()
+
+    undo_ids = []
+    redo_ids = []
+    for changeset_id, kind, ref_id in changesets:
+        if kind == "save" or kind == "import" or kind == "confirm":
+            undo_ids.append(changeset_id)
+            redo_ids.clear()
+        elif kind == "undo" and ref_id in undo_ids:
+            undo_ids.remove(ref_id)
+            redo_ids.append(ref_id)
+        elif kind == "redo" and ref_id in redo_ids:
+            redo_ids.remove(ref_id)
+            undo_ids.append(ref_id)
+    return undo_ids, redo_ids
+
+
+@work_hrs_profile.timed()
+def undo_last_change(job):
+    """
+    Undo the last saved, imported or confirm changeset of a job that isn't undone yet
+
+    :param job: name of the job
+    :return: the changeset written to undo it, None if there is nothing to undo
+    """
+    undo_ids, _ = get_undo_redo_ids(job)
+    if not undo_ids:
+        return None
+    changeset_df = invert_shifts_changeset(read_changeset(undo_ids[-1]))
+    return apply_shifts_changeset(job, changeset_df, kind="undo", ref_id=undo_ids[-1])
+
+
+@work_hrs_profile.timed()
+def redo_last_change(job):
+    """
+    Redo the last undone changeset of a job
+
+    :param job: name of the job
+    :return: the changeset written to redo it, None if there is nothing to redo
+    """
+    _, redo_ids = get_undo_redo_ids(job)
+    if not redo_ids:
+        return None
+    changeset_df = read_changeset(redo_ids[-1])
+    return apply_shifts_changeset(job, changeset_df, kind="redo", ref_id=redo_ids[-1])
+
+
+@work_hrs_profile.timed()
+def read_history(beg_date_str=None, end_date_str=None, job=None):
+    """
+    Read the journal of changes to the shifts of a range of dates
+
+    :param beg_date_str: optional first shift date (YYYY-MM-DD) to read
+    :param end_date_str: optional last shift date (YYYY-MM-DD) to read
+    :param job: optional job to read, defaults to all jobs
+    :return: DataFrame of journal entries with the timestamp, job, kind and ref_id of their changeset,
+      in the order they were written
+    """
+    where_strs = []
+    params = []
+    if job is not None:
+        where_strs.append("changesets.job = ?")
+        params.append(job)
+    if beg_date_str is not None:
+        where_strs.append("journal.date >= ?")
+        params.append(beg_date_str)
+    if end_date_str is not None:
+        where_strs.append("journal.date <= ?")
+        params.append(end_date_str)
+
+    select_str = (
+        "SELECT journal.changeset_id, changesets.timestamp, changesets.job,"
+        " changesets.kind, changesets.ref_id, journal.action, journal.shift_id,"
+        " journal.date, journal.start, journal.end, journal.scheduled,"
+        " journal.old_start, journal.old_end, journal.old_scheduled"
+        " FROM journal JOIN changesets ON changesets.id = journal.changeset_id"
+    )
+    if where_strs:
+        select_str += " WHERE " + " AND ".join(where_strs)
+    select_str += " ORDER BY journal.id"
+
+    with connect_db() as conn:
+        return pd.read_sql(select_str, conn, params=params)
+
+
+@work_hrs_profile.timed()
+def compact_journal(before_timestamp_str):
+    """
+    Delete the journal entries of changesets written before a time, they can't be undone or redone anymore
+
+    :param before_timestamp_str: time (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS), older changesets are deleted
+    :return: number of changesets deleted
     """
+    conn = connect_db()
+    with conn:
+        conn.execute(
+            "DELETE FROM journal WHERE changeset_id IN"
+            " (SELECT id FROM changesets WHERE timestamp < ?)",
+            (before_timestamp_str,),
+        )
+        num_deleted = conn.execute(
+            "DELETE FROM changesets WHERE timestamp < ?", (before_timestamp_str,)
+        ).rowcount
+    logger.info("Compacted {} changesets from the journal.", num_deleted)
+    return num_deleted
+
+
+@work_hrs_profile.timed()
+def confirm_scheduled_shifts(
+    jobs=None, beg_date_str=None, end_date_str=None, exclude_dates=(), dry_run=False
+):
+    """
+    Mark the shifts before today that are still scheduled as actual shifts, in bulk. The shifts are found with
+      the partial index of scheduled shifts and written with one UPDATE, recorded in the journal as a confirm
+      changeset of each job, in a single transaction. Confirm changesets can be undone like saved ones.
+
+    :param jobs: optional list of jobs to confirm, defaults to all jobs
+    :param beg_date_str: optional first date (YYYY-MM-DD) to confirm
+    :param end_date_str: optional last date (YYYY-MM-DD) to confirm, dates from today on are never confirmed
+    :param exclude_dates: optional iterable of dates (YYYY-MM-DD) whose shifts stay scheduled
+    :param dry_run: only find the shifts to confirm, nothing is written
+    :return: DataFrame of the shifts confirmed, or to confirm in a dry run, with id, job, date, start and end
+      columns, in job and time order
+    """
+    where_strs = ["scheduled = 1", "date < ?"]
+    params = [dt.date.today().strftime(DATE_FMT_STR)]
+    if jobs is not None:
+        where_strs.append(f"job IN ({', '.join('?' * len(jobs))})")
+        params.extend(jobs)
+    if beg_date_str is not None:
+        where_strs.append("date >= ?")
+        params.append(beg_date_str)
+    if end_date_str is not None:
+        where_strs.append("date <= ?")
+        params.append(end_date_str)
+    exclude_dates = sorted(set(exclude_dates))
+    if exclude_dates:
+        where_strs.append(f"date NOT IN ({', '.join('?' * len(exclude_dates))})")
+        params.extend(exclude_dates)
+    where_str = " AND ".join(where_strs)
+
+    conn = connect_db()
+    with conn:
+        shifts_df = pd.read_sql(
+            f"SELECT id, job, date, start, end FROM shifts WHERE {where_str}"
+            " ORDER BY job, start",
+            conn,
+            params=params,
+        )
+        if not dry_run and not shifts_df.empty:
+            timestamp_str = dt.datetime.now().strftime(TIMESTAMP_FMT_STR)
+            for job in shifts_df.job.unique():
+                changeset_id = conn.execute(
+                    "INSERT INTO changesets (timestamp, job, kind, ref_id)"
+                    " VALUES (?, ?, 'confirm', NULL)",
+                    (timestamp_str, job),
+                ).lastrowid
+                # the journal entries are copied from the shifts before they are updated
+                conn.execute(
+                    "INSERT INTO journal (changeset_id, action, shift_id, date, start, end,"
+                    " scheduled, old_start, old_end, old_scheduled)"
+                    " SELECT ?, 'update', id, date, start, end, 0, start, end, 1"
+                    f" FROM shifts WHERE {where_str} AND job = ? ORDER BY start",
+                    [changeset_id] + params + [job],
+                )
+            conn.execute(f"UPDATE shifts SET scheduled = 0 WHERE {where_str}", params)
+
+    if dry_run or shifts_df.empty:
+        return shifts_df
+    logger.info("Confirmed {} scheduled shifts.", len(shifts_df))
+    # the shift times and hours are unchanged, the eight day cache and the interval index are still up to
+    #   date, only the cached weeks show the scheduled flags
+    for job, job_shifts_df in shifts_df.groupby("job"):
+        week_cache.invalidate(job, job_shifts_df.date)
+    return shifts_df
+
+
+def render_confirmed_shifts(shifts_df):
+    """
+    Format the shifts of a confirmation of scheduled shifts
+
+    :param shifts_df: DataFrame of shifts as returned by confirm_scheduled_shifts()
+    :return: string with a line for each shift, in job display order, and a line of totals
+    """
+    jobs_df = read_jobs()
+    label_width = max(len(label) for label in jobs_df.label)
+    lines = []
+    for job in jobs_df.index:
+        for shift in shifts_df[shifts_df.job == job].itertuples():
+            lines.append(
+                f"{jobs_df.at[job, 'label']:<{label_width}}  {shift.date}"
+                f"  {shift.start[11:]}-{shift.end[11:]}"
+            )
+    lines.append(
+        f"{len(shifts_df)} scheduled shifts on {shifts_df.date.nunique()} dates"
+    )
+    return "\n".join(lines)
+
+
+def compute_shift_duration(shift_str):
+    """
+    Compute the length of a shift typed as HH:MM-HH:MM
+
+    :param shift_str: shift string
+    :return: timedelta of the shift, None if the string isn't a shift
+    """
+    if not re.match(r"^\d{2}:\d{2}-\d{2}:\d{2}$", shift_str):
+        return None
+    start_str, end_str = shift_str.split("-")
     try:
-        with sqlite3.connect("work_hours.sqlite") as conn:
-            cursor = conn.cursor()
-            if work_hrs_date_df.shape[0] == new_work_hrs_date_df.shape[0]:
-                logger.info("Updating row in {}.", db_table)
-                for idx, row in new_work_hrs_date_df.iterrows():
-                    update_str = f'UPDATE {db_table} SET start="{row.start}", end="{row.end}", scheduled={row.scheduled} WHERE start="{work_hrs_date_df.iloc[idx].start}"'
-                    cursor.execute(update_str)
-            else:
-                if work_hrs_date_df.empty:
-                    logger.info("Inserting row into {}.", db_table)
-                    for idx, row in new_work_hrs_date_df.iterrows():
-                        add_str = f'INSERT INTO {db_table} (date, start, end, scheduled) VALUES ("{new_work_hrs_date_df.iloc[idx].date}", "{new_work_hrs_date_df.iloc[idx].start}", "{new_work_hrs_date_df.iloc[idx].end}", {new_work_hrs_date_df.iloc[idx].scheduled})'
-                        cursor.execute(add_str)
-                else:
-                    logger.info("Deleting row and inserting new row in {}.", db_table)
-                    for idx, row in work_hrs_date_df.iterrows():
-                        delete_str = f'DELETE FROM {db_table} WHERE start="{work_hrs_date_df.iloc[idx].start}"'
-                        cursor.execute(delete_str)
-                    for idx, row in new_work_hrs_date_df.iterrows():
-                        add_str = f'INSERT INTO {db_table} (date, start, end, scheduled) VALUES ("{new_work_hrs_date_df.iloc[idx].date}", "{new_work_hrs_date_df.iloc[idx].start}", "{new_work_hrs_date_df.iloc[idx].end}", {new_work_hrs_date_df.iloc[idx].scheduled})'
-                        cursor.execute(add_str)
-
-            conn.commit()
-            cursor.close()
-    except FileNotFoundError:
-        logger.critical("SQL file not found! Exiting.")
-        sys.exit()
+        return dt.datetime.strptime(end_str, "%H:%M") - dt.datetime.strptime(
+            start_str, "%H:%M"
+        )
+    except ValueError:
+        return None
+
+
+def shifts_overlap(start_str, end_str, other_start_str, other_end_str):
+    """
+    Check if two shifts overlap. A shift may start at the minute the other one ends, back to back shifts
+      don't overlap. Every overlap check of shifts, in time strings or arrays, follows this rule.
+
+    :param start_str: start of the shift, HH:MM or YYYY-MM-DD HH:MM
+    :param end_str: end of the shift, in the format of start_str
+    :param other_start_str: start of the other shift, in the format of start_str
+    :param other_end_str: end of the other shift, in the format of start_str
+    :return: True if the shifts share any time
+    """
+    # zero padded time strings compare in time order
+    return start_str < other_end_str and other_start_str < end_str
 
 
 def compute_delta_hrs_min(delta):
@@ -75,43 +772,95 @@ def compute_delta_hrs_min(delta):
     return hrs, minutes
 
 
-def compute_daily_hrs(df_table, dt_object, tdelta_as_hrs_min=False):
+class ShiftStore:
+    @work_hrs_profile.timed()
+    def __init__(self, work_hrs_df):
+        """
+        A store of the shifts of one work hours table grouped by date. Built once per table load, it looks up
+          the shifts of a date in O(1) and the shifts of a range of dates in O(log N).
+
+        :param work_hrs_df: The work hours DataFrame for a job, as returned by read_work_hrs_table()
+        """
+        # a stable sort keeps the table order of the shifts within each date
+        self._work_hrs_df = work_hrs_df.sort_values(by="date", kind="stable")
+        self._dates = self._work_hrs_df.date.to_numpy(dtype=object)
+
+        # shift strings are built for every row at once, durations were parsed when the table was read
+        self._shifts = (
+            self._work_hrs_df.start.str.split().str[1]
+            + "-"
+            + self._work_hrs_df.end.str.split().str[1]
+        ).tolist()
+        self._shift_deltas = list(self._work_hrs_df.duration.dt.to_pytimedelta())
+        if "scheduled" in self._work_hrs_df.columns:
+            self._scheduled = self._work_hrs_df.scheduled.tolist()
+        else:
+            self._scheduled = [False] * len(self._dates)
+
+        # positions [first, last) of the shifts for each date
+        unique_dates, first_idx = np.unique(self._dates, return_index=True)
+        last_idx = np.append(first_idx[1:], len(self._dates))
+        self._day_slices = {
+            date_str: (first, last)
+            for date_str, first, last in zip(
+                unique_dates.tolist(), first_idx.tolist(), last_idx.tolist()
+            )
+        }
+
+    def get_day_info(self, date_str):
+        """return lists of shifts, shift deltas and scheduled flags for a date (YYYY-MM-DD), None if no shifts"""
+        day_slice = self._day_slices.get(date_str)
+        if day_slice is None:
+            return None
+        first, last = day_slice
+        return {
+            "shifts": self._shifts[first:last],
+            "shift_deltas": self._shift_deltas[first:last],
+            "scheduled": self._scheduled[first:last],
+        }
+
+    def get_range_df(self, beg_date_str, end_date_str):
+        """return a DataFrame of the table rows from beg_date_str to end_date_str (YYYY-MM-DD), inclusive"""
+        first = np.searchsorted(self._dates, beg_date_str, side="left")
+        last = np.searchsorted(self._dates, end_date_str, side="right")
+        return self._work_hrs_df.iloc[first:last]
+
+
+@work_hrs_profile.timed()
+def build_shift_stores(shifts_df):
+    """
+    Build a ShiftStore for every job from one DataFrame of shifts
+
+    :param shifts_df: DataFrame of shifts for all jobs, as returned by read_shifts_table()
+    :return: dict of ShiftStore objects by job, with an entry for every job in the registry
+    """
+    job_shifts_dfs = dict(list(shifts_df.groupby("job")))
+    return {
+        job: ShiftStore(job_shifts_dfs.get(job, shifts_df.iloc[0:0]))
+        for job in read_jobs().index
+    }
+
+
+def compute_daily_hrs(shift_store, dt_object, tdelta_as_hrs_min=False):
     """Daily hours computation
 
-    Takes a table (DataFrame) of work hours and a date and returns the hours worked.
+    Takes a store of work hours and a date and returns the hours worked.
 
-    :param df_table: a Pandas DataFrame of shifts worked for a single job
+    :param shift_store: a ShiftStore of shifts worked for a single job
     :param dt_object: a datetime object with the date of interest
     :param tdelta_as_hrs_min: boolean that determines if a datetime object (True) or HH:MM string is returned (False)
 
     :return: dict with a list of shifts, a list of total hours for those shifts, and a total of hours worked this job on this date
         - depending on the tdelta_as_hrs_min boolean, shift total and day total will be a datetime.tdelta obj or HH:MM string
     """
-    shifts = []
-    shift_deltas = []
-    scheduled = []
-
-    date_str = dt_object.strftime(DATE_FMT_STR)
-    try:
-        df_date = df_table[df_table.date == date_str]
-        if df_date.empty:
-            return None
-    except KeyError as e:
-        logger.critical("KeyError: {} not found", e)
+    day_info = shift_store.get_day_info(dt_object.strftime(DATE_FMT_STR))
+    if day_info is None:
         return None
 
-    for index, row in df_date.iterrows():
-        shifts.append(row.start.split()[1] + "-" + row.end.split()[1])
-        shift_delta = dt.datetime.strptime(
-            row.end, DATE_TIME_FMT_STR
-        ) - dt.datetime.strptime(row.start, DATE_TIME_FMT_STR)
-        shift_deltas.append(shift_delta)
-        try:
-            scheduled.append(row.scheduled)
-        except AttributeError:
-            scheduled.append(False)
-
-    shifts_tot = pd.Series(shift_deltas).sum()
+    shifts = day_info["shifts"]
+    shift_deltas = day_info["shift_deltas"]
+    scheduled = day_info["scheduled"]
+    shifts_tot = sum(shift_deltas, dt.timedelta())
 
     if tdelta_as_hrs_min:
         for idx, item in enumerate(shift_deltas):
@@ -128,6 +877,63 @@ def compute_daily_hrs(df_table, dt_object, tdelta_as_hrs_min=False):
     }
 
 
+@work_hrs_profile.timed()
+def evaluate_alerts(eight_day_df):
+    """Evaluate the alert rules over a DataFrame of hours worked
+
+    Every tier of a rule is compared against the whole metric column at once, np.select picks
+    the most severe tier matched on each date. Below the first tier, a tier only matches values
+    under the threshold of the tier before it.
+
+    :param eight_day_df: DataFrame with hours worked
+    :return: DataFrame of alert records with date, rule, severity and message columns, ordered by
+      rule, severity and date
+    """
+    alert_dfs = []
+    dates = eight_day_df.date.to_numpy()
+    for rule, column, tiers in ALERT_RULES:
+        values = eight_day_df[column].to_numpy(dtype="timedelta64[ns]")
+        conditions = []
+        prev_threshold = None
+        for _, threshold, comparison, _ in tiers:
+            condition = ALERT_COMPARISONS[comparison](values, np.timedelta64(threshold))
+            if prev_threshold is not None:
+                condition &= values < np.timedelta64(prev_threshold)
+            conditions.append(condition)
+            prev_threshold = threshold
+        tier_idx = np.select(conditions, range(len(tiers)), default=-1)
+        date_idx = np.flatnonzero(tier_idx >= 0)
+        # most severe tier first, dates in order within each tier
+        date_idx = date_idx[np.argsort(tier_idx[date_idx], kind="stable")]
+        alert_dfs.append(
+            pd.DataFrame(
+                {
+                    "date": dates[date_idx],
+                    "rule": rule,
+                    "severity": [tiers[idx][0] for idx in tier_idx[date_idx]],
+                    "message": [tiers[idx][3] for idx in tier_idx[date_idx]],
+                }
+            )
+        )
+    return pd.concat(alert_dfs, ignore_index=True)
+
+
+@work_hrs_profile.timed()
+def render_alerts(alerts_df):
+    """Render alert records as text, one line per alert
+
+    :param alerts_df: DataFrame of alert records, as returned by evaluate_alerts()
+    :return: string of alerts, warnings, and notes
+    """
+    return "".join(
+        f"{ALERT_SEVERITIES[severity]:<10}{message} {date}\n"
+        for date, severity, message in zip(
+            alerts_df.date, alerts_df.severity, alerts_df.message
+        )
+    )
+
+
+@work_hrs_profile.timed()
 def display_alerts(eight_day_df):
     """Display alerts, warnings, notes based on DataFrame of hours worked
 
@@ -135,241 +941,698 @@ def display_alerts(eight_day_df):
 
     :return: string of alerts, warnings, and errors
     """
-    ALERT_80_HRS = f"{'-ALERT-:':<10}Exceeding 80 hours on"
-    WARN_80_HRS = f"{'Warning:':<10}Exceeding 75 of 80 hours on"
-    NOTE_80_HRS = f"{'Note:':<10}Exceeding 70 of 80 hours on"
-    ALERT_15_WORK_HRS = f"{'-ALERT-:':<10}Exceeding 15 working hours on"
-    WARN_15_WORK_HRS = f"{'Warning:':<10}Exceeding 12 of 15 working hours on"
-    NOTE_15_WORK_HRS = f"{'Note:':<10}Exceeding 10 of 15 working hours on"
-    ALERT_12_DRIVE_HRS = f"{'-ALERT-:':<10}Exceeding 12 driving hours on"
-    WARN_12_DRIVE_HRS = f"{'Warning:':<10}Exceeding 10 of 12 driving hours on"
-    NOTE_12_DRIVE_HRS = f"{'Note:':<10}Exceeding 8 of 12 driving hours on"
-
-    DELTA_80_HRS = dt.timedelta(days=3, hours=8)
-    DELTA_75_HRS = dt.timedelta(days=3, hours=3)
-    DELTA_70_HRS = dt.timedelta(days=2, hours=22)
-    DELTA_15_HRS = dt.timedelta(days=0, hours=15)
-    DELTA_12_HRS = dt.timedelta(days=0, hours=12)
-    DELTA_10_HRS = dt.timedelta(days=0, hours=10)
-    DELTA_8_HRS = dt.timedelta(days=0, hours=8)
-
-    new_notifications = []
-
-    # All days which exceed 70 hours in rolling window
-    eighty_in_8_df = eight_day_df[eight_day_df.eight_day_window >= DELTA_70_HRS]
-
-    # ALERT for >= 80
-    for row in eighty_in_8_df.iterrows():
-        if row[1].eight_day_window >= DELTA_80_HRS:
-            new_notifications.append(f"{ALERT_80_HRS} {row[1].date}\n")
-
-    # WARN for >= 75
-    eighty_in_8_df = eighty_in_8_df[eight_day_df.eight_day_window < DELTA_80_HRS]
-    for row in eighty_in_8_df.iterrows():
-        if row[1].eight_day_window > DELTA_75_HRS:
-            new_notifications.append(f"{WARN_80_HRS} {row[1].date}\n")
-
-    # NOTE for >= 70
-    eighty_in_8_df = eighty_in_8_df[eight_day_df.eight_day_window < DELTA_75_HRS]
-    for row in eighty_in_8_df.iterrows():
-        if row[1].eight_day_window > DELTA_70_HRS:
-            new_notifications.append(f"{NOTE_80_HRS} {row[1].date}\n")
-
-    # All days which exceed 10 hours in daily total window
-    fifteen_working_df = eight_day_df[eight_day_df.daily_tot_hrs >= DELTA_10_HRS]
-
-    # ALERT for >= 15
-    for row in fifteen_working_df.iterrows():
-        if row[1].daily_tot_hrs >= DELTA_15_HRS:
-            new_notifications.append(f"{ALERT_15_WORK_HRS} {row[1].date}\n")
-
-    # ALERT for >= 12
-    fifteen_working_df = fifteen_working_df[eight_day_df.daily_tot_hrs < DELTA_15_HRS]
-    for row in fifteen_working_df.iterrows():
-        if row[1].daily_tot_hrs > DELTA_12_HRS:
-            new_notifications.append(f"{WARN_15_WORK_HRS} {row[1].date}\n")
-
-    # ALERT for >= 12
-    fifteen_working_df = fifteen_working_df[eight_day_df.daily_tot_hrs < DELTA_12_HRS]
-    for row in fifteen_working_df.iterrows():
-        if row[1].daily_tot_hrs > DELTA_10_HRS:
-            new_notifications.append(f"{NOTE_15_WORK_HRS} {row[1].date}\n")
-
-    # All days which exceed 12 hours in driving total window
-    twelve_driving_df = eight_day_df[eight_day_df.drive_tot_hrs >= DELTA_8_HRS]
-
-    # ALERT for >= 12
-    for row in twelve_driving_df.iterrows():
-        if row[1].drive_tot_hrs >= DELTA_12_HRS:
-            new_notifications.append(f"{ALERT_12_DRIVE_HRS} {row[1].date}\n")
-
-    # ALERT for >= 10
-    twelve_driving_df = twelve_driving_df[eight_day_df.drive_tot_hrs < DELTA_12_HRS]
-    for row in twelve_driving_df.iterrows():
-        if row[1].drive_tot_hrs > DELTA_10_HRS:
-            new_notifications.append(f"{WARN_12_DRIVE_HRS} {row[1].date}\n")
-
-    # ALERT for >= 8
-    twelve_driving_df = twelve_driving_df[eight_day_df.drive_tot_hrs < DELTA_10_HRS]
-    for row in twelve_driving_df.iterrows():
-        if row[1].drive_tot_hrs > DELTA_8_HRS:
-            new_notifications.append(f"{NOTE_12_DRIVE_HRS} {row[1].date}\n")
-
-    return "".join(new_notifications)
-
-
-def compute_eight_day_df(bus_hrs_df, HD_hrs_df, delivery_hrs_df):
-    """Compute a DataFrame that combines all DataFrames of work hours, creating a new table that sums work hours for each shift
+    return render_alerts(evaluate_alerts(eight_day_df))
+
+
+def compute_daily_totals(work_hrs_df):
+    """Compute the total hours worked on each date for a single job
+
+    The shift durations parsed when the table was read are summed per date.
+
+    :param work_hrs_df: a Pandas DataFrame of shifts worked for a single job, as returned by read_work_hrs_table()
+
+    :return: a Series of timedeltas indexed by date (datetime64), one entry per date with shifts
+    """
+    if work_hrs_df.empty:
+        return pd.Series(dtype="timedelta64[ns]", index=pd.DatetimeIndex([]))
+
+    return work_hrs_df.duration.groupby(work_hrs_df.start_dt.dt.normalize()).sum()
+
+
+def compute_eight_day_window(daily_tot_hrs):
+    """Compute the 8-day rolling sum of daily totals
+
+    :param daily_tot_hrs: a Series of timedeltas, one entry for each consecutive day
+
+    :return: a Series of timedeltas with the sum of each day and the 7 days before it
+    """
+    # rolling sums are not implemented for timedeltas, so sum seconds over the window
+    return pd.to_timedelta(
+        daily_tot_hrs.dt.total_seconds().rolling(8, min_periods=1).sum(),
+        unit="s",
+    ).astype("timedelta64[ns]")
+
+
+@work_hrs_profile.timed()
+def compute_eight_day_df(shifts_df):
+    """Compute a DataFrame that combines the shifts of all jobs, creating a new table that sums work hours for each shift
       for each job, a daily total for all jobs, and an eight day rolling sum
 
-    :param bus_hrs_df: DataFrame of work hours for bus
-    :param HD_hrs_df: DataFrame of Home Depot hours for bus
-    :param delivery_hrs_df: DataFrame of delivery hours for bus
+    :param shifts_df: DataFrame of shifts for all jobs, as returned by read_shifts_table()
 
     :return: a DataFrame containing daily sums of work hours for each job, a daily total of work hours, and an 8 day rolling sum
     """
-    min_date = min(
-        bus_hrs_df.date.min(), HD_hrs_df.date.min(), delivery_hrs_df.date.min()
+    jobs_df = read_jobs()
+    hrs_columns = [tot_hrs_column(job) for job in jobs_df.index]
+    drive_columns = [tot_hrs_column(job) for job in jobs_df.index[jobs_df.driving == 1]]
+
+    if shifts_df.empty:
+        return pd.DataFrame(
+            columns=["date"]
+            + hrs_columns
+            + ["daily_tot_hrs", "eight_day_window", "drive_tot_hrs"]
+        )
+
+    # one groupby sums the shifts of every job on every date
+    daily_totals_df = (
+        shifts_df.groupby([shifts_df.start_dt.dt.normalize(), "job"])
+        .duration.sum()
+        .unstack("job", fill_value=pd.Timedelta(0))
     )
-    max_date = max(
-        bus_hrs_df.date.max(), HD_hrs_df.date.max(), delivery_hrs_df.date.max()
+
+    # every day between the first and last shift gets a row, even if no work was done
+    date_range = pd.date_range(
+        start=daily_totals_df.index.min(), end=daily_totals_df.index.max()
     )
+    daily_totals_df = daily_totals_df.reindex(
+        index=date_range, columns=jobs_df.index, fill_value=pd.Timedelta(0)
+    ).astype("timedelta64[ns]")
 
-    eight_day_df = pd.DataFrame(
-        columns=[
-            "date",
-            "bus_tot_hrs",
-            "HD_tot_hrs",
-            "deliver_tot_hrs",
-            "daily_tot_hrs",
-            "eight_day_window",
-            "drive_tot_hrs",
+    eight_day_df = pd.DataFrame({"date": date_range.strftime(DATE_FMT_STR)})
+    for job, hrs_column in zip(jobs_df.index, hrs_columns):
+        eight_day_df[hrs_column] = daily_totals_df[job].to_numpy()
+    eight_day_df["daily_tot_hrs"] = eight_day_df[hrs_columns].sum(axis=1)
+
+    eight_day_df["eight_day_window"] = compute_eight_day_window(
+        eight_day_df.daily_tot_hrs
+    )
+    eight_day_df["drive_tot_hrs"] = eight_day_df[drive_columns].sum(axis=1)
+
+    return eight_day_df
+
+
+@work_hrs_profile.timed()
+def extend_eight_day_df(eight_day_df, min_date_str, max_date_str):
+    """
+    Add zero hour rows to an eight day DataFrame so that it covers min_date_str to max_date_str
+
+    :param eight_day_df: the eight day window DataFrame
+    :param min_date_str: first date (YYYY-MM-DD) to cover
+    :param max_date_str: last date (YYYY-MM-DD) to cover
+    :return: the eight day DataFrame itself if it already covers the dates, else an extended copy
+    """
+    if eight_day_df.empty:
+        # no shifts saved yet, every date has zero hours
+        date_range = pd.date_range(start=min_date_str, end=max_date_str)
+    elif (
+        min_date_str >= eight_day_df.date.iloc[0]
+        and max_date_str <= eight_day_df.date.iloc[-1]
+    ):
+        return eight_day_df
+    else:
+        date_range = pd.date_range(
+            start=min(min_date_str, eight_day_df.date.iloc[0]),
+            end=max(max_date_str, eight_day_df.date.iloc[-1]),
+        )
+    # the hour columns of an empty DataFrame have no dtype, they are all timedeltas
+    eight_day_df = (
+        eight_day_df.set_index("date")
+        .reindex(date_range.strftime(DATE_FMT_STR), fill_value=pd.Timedelta(0))
+        .astype("timedelta64[ns]")
+    )
+    # the added days have no window yet, recompute all windows in one pass
+    eight_day_df["eight_day_window"] = compute_eight_day_window(
+        eight_day_df.daily_tot_hrs
+    )
+    return eight_day_df.rename_axis("date").reset_index()
+
+
+class EightDayCache:
+    def __init__(self):
+        """
+        A session cache of the eight day DataFrame. The DataFrame is built from the full history once, after that
+          a save only recomputes the daily totals of the dates written and the 8-day windows which include them.
+          The cache can be shared by threads, a save replaces the cached DataFrame instead of modifying it.
+        """
+        self._eight_day_df = None
+        self._lock = threading.Lock()
+
+    @work_hrs_profile.timed()
+    def get_eight_day_df(self):
+        """return the eight day DataFrame, building it from the database on first use"""
+        with self._lock:
+            if self._eight_day_df is None:
+                self._eight_day_df = compute_eight_day_df(read_shifts_table())
+            return self._eight_day_df
+
+    def clear(self):
+        """drop the cached DataFrame, the next get_eight_day_df() rebuilds it from the full history"""
+        with self._lock:
+            self._eight_day_df = None
+
+    def invalidate(self, job, dates):
+        """
+        Recompute the cached totals for dates that were written for a job
+
+        :param job: name of the job that was written
+        :param dates: iterable of date strings (YYYY-MM-DD) that were written
+        :return: None
+        """
+        with self._lock:
+            self._invalidate(job, dates)
+
+    def _invalidate(self, job, dates):
+        """invalidate() with the lock held"""
+        if self._eight_day_df is None:
+            # nothing cached yet, the first get_eight_day_df() will read the new info
+            return
+        if self._eight_day_df.empty or tot_hrs_column(job) not in self._eight_day_df:
+            # nothing to update in place, rebuild on the next get_eight_day_df()
+            self._eight_day_df = None
+            return
+
+        dates = sorted(set(dates))
+        if not dates:
+            return
+        # update a copy, reports in other threads keep the DataFrame they were given
+        eight_day_df = extend_eight_day_df(
+            self._eight_day_df, dates[0], dates[-1]
+        ).copy()
+
+        jobs_df = read_jobs()
+        hrs_columns = [tot_hrs_column(job) for job in jobs_df.index]
+        drive_columns = [
+            tot_hrs_column(job) for job in jobs_df.index[jobs_df.driving == 1]
         ]
+
+        first_date = dt.datetime.strptime(eight_day_df.date.iloc[0], DATE_FMT_STR)
+        hrs_col = eight_day_df.columns.get_loc(tot_hrs_column(job))
+        daily_col = eight_day_df.columns.get_loc("daily_tot_hrs")
+        drive_col = eight_day_df.columns.get_loc("drive_tot_hrs")
+        window_col = eight_day_df.columns.get_loc("eight_day_window")
+
+        for date_str in dates:
+            pos = (dt.datetime.strptime(date_str, DATE_FMT_STR) - first_date).days
+            totals = compute_daily_totals(read_work_hrs_table(job, date_str, date_str))
+            eight_day_df.iloc[pos, hrs_col] = (
+                totals.iloc[0] if not totals.empty else pd.Timedelta(0)
+            )
+            row = eight_day_df.iloc[pos]
+            eight_day_df.iloc[pos, daily_col] = sum(row[hrs_columns], pd.Timedelta(0))
+            eight_day_df.iloc[pos, drive_col] = sum(row[drive_columns], pd.Timedelta(0))
+
+            # only the windows ending on this date and the seven days after it include this date
+            daily_tot_hrs = eight_day_df.daily_tot_hrs.to_numpy()
+            for window_pos in range(pos, min(pos + 8, eight_day_df.shape[0])):
+                eight_day_df.iloc[window_pos, window_col] = daily_tot_hrs[
+                    max(window_pos - 7, 0) : window_pos + 1
+                ].sum()
+
+        # the full history starts and ends on a date with work. A first or last date that dropped to zero hours
+        #   (a delete, or undoing an insert past the end) is trimmed, the windows of the dates kept don't change
+        worked_pos = np.flatnonzero(
+            eight_day_df.daily_tot_hrs.to_numpy() > np.timedelta64(0)
+        )
+        if len(worked_pos) == 0:
+            # no work left at all, rebuild on the next get_eight_day_df()
+            self._eight_day_df = None
+            return
+        if worked_pos[0] > 0 or worked_pos[-1] < eight_day_df.shape[0] - 1:
+            eight_day_df = eight_day_df.iloc[
+                worked_pos[0] : worked_pos[-1] + 1
+            ].reset_index(drop=True)
+
+        self._eight_day_df = eight_day_df
+
+
+eight_day_cache = EightDayCache()
+
+
+class HoursHeadroom:
+    @work_hrs_profile.timed()
+    def __init__(self, eight_day_df):
+        """
+        The hours left before each alert rule is broken on any date. Built once from the eight day DataFrame,
+          prefix sums of the daily totals answer each query in O(1), whatever the length of the history.
+
+        :param eight_day_df: the eight day window DataFrame
+        """
+        # the alert tier of each rule is the limit
+        self._limits = {rule: tiers[0][1] for rule, _, tiers in ALERT_RULES}
+        if eight_day_df.empty:
+            self._first_date = dt.date.today()
+        else:
+            self._first_date = dt.date.fromisoformat(eight_day_df.date.iloc[0])
+        self._daily_secs = (
+            eight_day_df.daily_tot_hrs.to_numpy(dtype="timedelta64[s]")
+            .astype(np.int64)
+            .tolist()
+        )
+        self._drive_secs = (
+            eight_day_df.drive_tot_hrs.to_numpy(dtype="timedelta64[s]")
+            .astype(np.int64)
+            .tolist()
+        )
+        self._daily_prefix_secs = [0] + np.cumsum(self._daily_secs).tolist()
+
+    def _get_pos(self, date_str):
+        """return the position of a date (YYYY-MM-DD) in the daily totals, may be outside of them"""
+        return (dt.date.fromisoformat(date_str) - self._first_date).days
+
+    def _get_range_secs(self, first_pos, last_pos):
+        """return the seconds worked from first_pos to last_pos, inclusive"""
+        num_days = len(self._daily_secs)
+        first_pos = min(max(first_pos, 0), num_days)
+        last_pos = min(max(last_pos + 1, 0), num_days)
+        return self._daily_prefix_secs[last_pos] - self._daily_prefix_secs[first_pos]
+
+    def get_headroom(self, date_str, job, day_changes=None):
+        """
+        Compute the hours that can still be worked on a date before each alert rule is broken
+
+        :param date_str: date (YYYY-MM-DD) of interest
+        :param job: job the hours would be worked for
+        :param day_changes: dict of timedelta changes to the hours of the job by date (YYYY-MM-DD) that are
+          not in the eight day DataFrame yet, e.g. shifts being typed into the shifts window
+        :return: dict of the timedelta left by rule, negative once the limit is broken, None for the driving
+          rule if the job isn't driving
+        """
+        pos = self._get_pos(date_str)
+        change_secs = {
+            self._get_pos(change_date_str): delta.total_seconds()
+            for change_date_str, delta in (day_changes or {}).items()
+        }
+        num_days = len(self._daily_secs)
+        daily_secs = (self._daily_secs[pos] if 0 <= pos < num_days else 0) + (
+            change_secs.get(pos, 0)
+        )
+
+        # hours worked on this date count in the 8-day windows ending on it and on the seven days after it
+        max_window_secs = max(
+            self._get_range_secs(window_pos - 7, window_pos)
+            + sum(
+                secs
+                for change_pos, secs in change_secs.items()
+                if window_pos - 7 <= change_pos <= window_pos
+            )
+            for window_pos in range(pos, pos + 8)
+        )
+
+        headroom = {
+            "80_hrs": self._limits["80_hrs"] - dt.timedelta(seconds=max_window_secs),
+            "15_work_hrs": self._limits["15_work_hrs"]
+            - dt.timedelta(seconds=daily_secs),
+            "12_drive_hrs": None,
+        }
+        if read_jobs().at[job, "driving"]:
+            drive_secs = (self._drive_secs[pos] if 0 <= pos < num_days else 0) + (
+                change_secs.get(pos, 0)
+            )
+            headroom["12_drive_hrs"] = self._limits["12_drive_hrs"] - dt.timedelta(
+                seconds=drive_secs
+            )
+        return headroom
+
+
+class ShiftIntervalIndex:
+    def __init__(self):
+        """
+        An index of the shifts of all jobs as start and end arrays sorted by start time, used to find shifts
+          that overlap across jobs. A shift never spans more than its date, so the shifts overlapping a time range
+          are found with two binary searches in O(log N + k). Saves update the index in place.
+        """
+        self._starts = None
+        self._ends = None
+        self._jobs = None
+        # longest shift in the index, bounds how far before a range an overlapping shift can start
+        self._max_duration = np.timedelta64(0, "m")
+        self._lock = threading.Lock()
+
+    @work_hrs_profile.timed()
+    def _build(self):
+        """build the index from the shifts table, with the lock held"""
+        if self._starts is not None:
+            return
+        shifts_df = read_shifts_table()
+        starts = shifts_df.start_dt.to_numpy(dtype="datetime64[m]")
+        order = np.argsort(starts, kind="stable")
+        self._starts = starts[order]
+        self._ends = shifts_df.end_dt.to_numpy(dtype="datetime64[m]")[order]
+        self._jobs = shifts_df.job.to_numpy(dtype=object)[order]
+        if len(order) > 0:
+            self._max_duration = max(
+                (self._ends - self._starts).max(), np.timedelta64(0, "m")
+            )
+
+    def _get_shift(self, idx):
+        """return the (job, start, end) tuple of the shift at a position of the index"""
+        return (
+            self._jobs[idx],
+            str(self._starts[idx]).replace("T", " "),
+            str(self._ends[idx]).replace("T", " "),
+        )
+
+    def clear(self):
+        """drop the index, the next query rebuilds it from the shifts table"""
+        with self._lock:
+            self._starts = None
+            self._ends = None
+            self._jobs = None
+            self._max_duration = np.timedelta64(0, "m")
+
+    def find_overlaps(self, start_str, end_str, exclude_job=None):
+        """
+        Find the shifts overlapping a time range
+
+        :param start_str: start of the range (YYYY-MM-DD HH:MM)
+        :param end_str: end of the range (YYYY-MM-DD HH:MM)
+        :param exclude_job: job whose shifts are skipped, None to return the shifts of all jobs
+        :return: list of (job, start, end) tuples of the overlapping shifts, ordered by start
+        """
+        start = np.datetime64(start_str.replace(" ", "T"), "m")
+        end = np.datetime64(end_str.replace(" ", "T"), "m")
+        with self._lock:
+            self._build()
+            # the rule of shifts_overlap(): a shift starting at end or ending at start doesn't overlap
+            first = np.searchsorted(self._starts, start - self._max_duration, "right")
+            last = np.searchsorted(self._starts, end, "left")
+            return [
+                self._get_shift(idx)
+                for idx in range(first, last)
+                if self._ends[idx] > start and self._jobs[idx] != exclude_job
+            ]
+
+    def apply_changeset(self, job, changeset_df):
+        """
+        Apply the changes written for a job to the index
+
+        :param job: name of the job that was written
+        :param changeset_df: changeset DataFrame that was written, as returned by compute_shifts_changeset()
+        :return: None
+        """
+        with self._lock:
+            if self._starts is None:
+                # nothing built yet, the first query will read the new info
+                return
+            # remove the shifts replaced by updates and deletes
+            removed_df = changeset_df[changeset_df.action != "insert"]
+            remove_idx = set()
+            for old_start_str, old_end_str in zip(
+                removed_df.old_start, removed_df.old_end
+            ):
+                old_start = np.datetime64(old_start_str.replace(" ", "T"), "m")
+                old_end = np.datetime64(old_end_str.replace(" ", "T"), "m")
+                first = np.searchsorted(self._starts, old_start, "left")
+                last = np.searchsorted(self._starts, old_start, "right")
+                for idx in range(first, last):
+                    if (
+                        idx not in remove_idx
+                        and self._jobs[idx] == job
+                        and self._ends[idx] == old_end
+                    ):
+                        remove_idx.add(idx)
+                        break
+            remove_idx = sorted(remove_idx)
+            starts = np.delete(self._starts, remove_idx)
+            ends = np.delete(self._ends, remove_idx)
+            jobs = np.delete(self._jobs, remove_idx)
+
+            # insert the new shifts of updates and inserts where they keep the arrays sorted
+            added_df = changeset_df[changeset_df.action != "delete"]
+            new_starts = np.array(
+                [start.replace(" ", "T") for start in added_df.start],
+                dtype="datetime64[m]",
+            )
+            new_ends = np.array(
+                [end.replace(" ", "T") for end in added_df.end], dtype="datetime64[m]"
+            )
+            order = np.argsort(new_starts, kind="stable")
+            new_starts = new_starts[order]
+            new_ends = new_ends[order]
+            insert_idx = np.searchsorted(starts, new_starts, "right")
+            self._starts = np.insert(starts, insert_idx, new_starts)
+            self._ends = np.insert(ends, insert_idx, new_ends)
+            self._jobs = np.insert(jobs, insert_idx, job)
+            if len(new_starts) > 0:
+                self._max_duration = max(
+                    self._max_duration, (new_ends - new_starts).max()
+                )
+
+    @work_hrs_profile.timed()
+    def find_conflicts(self):
+        """
+        Scan the full history for shifts of different jobs that overlap
+
+        :return: list of ((job, start, end), (job, start, end)) pairs, ordered by the start of the first shift
+        """
+        with self._lock:
+            self._build()
+            # the shifts after each shift that start before it ends overlap it, a shift starting at its end
+            #   doesn't (the rule of shifts_overlap())
+            overlap_ends = np.searchsorted(self._starts, self._ends, "left")
+            num_overlaps = np.maximum(
+                overlap_ends - np.arange(len(self._starts)) - 1, 0
+            )
+            first_idx = np.repeat(np.arange(len(self._starts)), num_overlaps)
+            # second index of each pair: first_idx + 1, first_idx + 2, ...
+            group_starts = np.repeat(
+                np.cumsum(num_overlaps) - num_overlaps, num_overlaps
+            )
+            second_idx = first_idx + 1 + np.arange(len(first_idx)) - group_starts
+            cross_job = self._jobs[first_idx] != self._jobs[second_idx]
+            return [
+                (self._get_shift(idx), self._get_shift(other_idx))
+                for idx, other_idx in zip(
+                    first_idx[cross_job].tolist(), second_idx[cross_job].tolist()
+                )
+            ]
+
+
+shift_interval_index = ShiftIntervalIndex()
+
+
+@work_hrs_profile.timed()
+def get_conflicts_report_str(conflicts=None):
+    """
+    Create a report of the shifts of different jobs that overlap, over the full history
+
+    :param conflicts: overlapping pairs of shifts as returned by ShiftIntervalIndex.find_conflicts(),
+      None to scan the shift interval index
+    :return: a report string with one line per overlapping pair of shifts
+    """
+    labels = read_jobs().label
+    if conflicts is None:
+        conflicts = shift_interval_index.find_conflicts()
+    if not conflicts:
+        return "No overlapping shifts between jobs"
+    return_str = [f"{len(conflicts)} overlapping shifts between jobs:"]
+    for shift, other_shift in conflicts:
+        job, start_str, end_str = shift
+        other_job, other_start_str, other_end_str = other_shift
+        return_str.append(
+            f"{start_str[:10]}: {labels[job]} {start_str[11:]}-{end_str[11:]}"
+            f" overlaps {labels[other_job]} {other_start_str[11:]}-{other_end_str[11:]}"
+        )
+    return "\n".join(return_str)
+
+
+class ShiftDays:
+    __slots__ = (
+        "_first_day",
+        "_num_days",
+        "_day_offsets",
+        "_starts",
+        "_ends",
+        "_scheduled",
     )
-    hrs_columns = ["bus_tot_hrs", "HD_tot_hrs", "deliver_tot_hrs"]
-    date_range = pd.date_range(start=min_date, end=max_date)
-    row_data_dict = {
-        "date": 0,
-        "bus_tot_hrs": dt.timedelta(),
-        "HD_tot_hrs": dt.timedelta(),
-        "deliver_tot_hrs": dt.timedelta(),
-        "daily_tot_hrs": dt.timedelta(),
-        "eight_day_window": 0,
-    }
-    for idx_date in date_range:
-        row_data_dict["date"] = idx_date.strftime(DATE_FMT_STR)
-        for hrs_idx, item_dict in zip(
-            hrs_columns,
-            [
-                compute_daily_hrs(bus_hrs_df, idx_date, tdelta_as_hrs_min=False),
-                compute_daily_hrs(HD_hrs_df, idx_date, tdelta_as_hrs_min=False),
-                compute_daily_hrs(delivery_hrs_df, idx_date, tdelta_as_hrs_min=False),
-            ],
-        ):
-            if item_dict is None:
-                row_data_dict[hrs_idx] = dt.timedelta()
-            else:
-                row_data_dict[hrs_idx] = item_dict["shifts_tot"]
-        row_data_dict["daily_tot_hrs"] = (
-            row_data_dict["bus_tot_hrs"]
-            + row_data_dict["HD_tot_hrs"]
-            + row_data_dict["deliver_tot_hrs"]
+
+    @work_hrs_profile.timed()
+    def __init__(self, shift_store, first_day, num_days):
+        """
+        The shifts of a run of consecutive days in flat NumPy arrays: start and end minutes after midnight and
+          scheduled flags, with the offsets of each day's shifts. Shift strings and totals are only formatted when
+          a day is displayed, a multi-year range takes a few bytes per shift.
+
+        :param shift_store: The ShiftStore of work hours for a job
+        :param first_day: date or datetime object of the first day
+        :param num_days: number of days
+        """
+        self._first_day = first_day
+        self._num_days = num_days
+        first_date_str = first_day.strftime(DATE_FMT_STR)
+        last_date_str = (first_day + dt.timedelta(days=num_days - 1)).strftime(
+            DATE_FMT_STR
         )
-        row_data_dict["eight_day_window"] = row_data_dict["daily_tot_hrs"]
-        row_data_dict["drive_tot_hrs"] = (
-            row_data_dict["bus_tot_hrs"] + row_data_dict["deliver_tot_hrs"]
+        range_df = shift_store.get_range_df(first_date_str, last_date_str)
+
+        # shifts are sorted by date, each day's shifts are a slice of the flat arrays
+        day_idx = (
+            range_df.date.to_numpy(dtype="datetime64[D]")
+            - np.datetime64(first_date_str, "D")
+        ).astype(np.int64)
+        self._day_offsets = np.zeros(num_days + 1, dtype=np.int32)
+        np.cumsum(np.bincount(day_idx, minlength=num_days), out=self._day_offsets[1:])
+        day_start = range_df.start_dt.dt.normalize()
+        self._starts = (
+            (range_df.start_dt - day_start) // pd.Timedelta(minutes=1)
+        ).to_numpy(dtype=np.int16)
+        self._ends = (
+            (range_df.end_dt - day_start) // pd.Timedelta(minutes=1)
+        ).to_numpy(dtype=np.int16)
+        if "scheduled" in range_df.columns:
+            self._scheduled = range_df.scheduled.to_numpy(dtype=np.int8)
+        else:
+            self._scheduled = np.zeros(len(range_df), dtype=np.int8)
+
+    def copy(self):
+        """return a copy whose shifts can be changed without changing this object"""
+        days_copy = object.__new__(type(self))
+        days_copy._first_day = self._first_day
+        days_copy._num_days = self._num_days
+        days_copy._day_offsets = self._day_offsets.copy()
+        days_copy._starts = self._starts.copy()
+        days_copy._ends = self._ends.copy()
+        days_copy._scheduled = self._scheduled.copy()
+        return days_copy
+
+    def get_day(self, idx):
+        """return the date or datetime object of a day by index"""
+        return self._first_day + dt.timedelta(days=idx)
+
+    def get_day_view(self, idx):
+        """return views of the start minutes, end minutes and scheduled flags of a day's shifts, no copies"""
+        first, last = self._day_offsets[idx], self._day_offsets[idx + 1]
+        return (
+            self._starts[first:last],
+            self._ends[first:last],
+            self._scheduled[first:last],
         )
 
-        eight_day_df = eight_day_df.append(row_data_dict, ignore_index=True)
+    def get_num_shifts(self, idx):
+        """return the number of shifts of a day by index"""
+        return int(self._day_offsets[idx + 1] - self._day_offsets[idx])
+
+    def get_day_shifts(self, idx):
+        """return a list of HH:MM-HH:MM shift strings of a day by index, [""] if no shifts"""
+        starts, ends, _ = self.get_day_view(idx)
+        if len(starts) == 0:
+            return [""]
+        return [
+            f"{start // 60:02}:{start % 60:02}-{end // 60:02}:{end % 60:02}"
+            for start, end in zip(starts.tolist(), ends.tolist())
+        ]
 
-    window = [dt.timedelta()] * 8
-    rolling_window_series = eight_day_df.eight_day_window.copy()
-    for idx, item in enumerate(rolling_window_series):
-        window.append(item)
-        window.pop(0)
-        rolling_window_series[idx] = sum(window, dt.timedelta())
-    eight_day_df["eight_day_window"] = rolling_window_series
+    def get_day_deltas(self, idx):
+        """return a list of HH:MM shift lengths of a day by index"""
+        starts, ends, _ = self.get_day_view(idx)
+        return [
+            f"{hrs:02}:{mins:02}"
+            for hrs, mins in (
+                divmod(minutes, 60) for minutes in (ends - starts).tolist()
+            )
+        ]
+
+    def get_day_total(self, idx):
+        """return the HH:MM total length of the shifts of a day by index"""
+        starts, ends, _ = self.get_day_view(idx)
+        hrs, mins = divmod(int((ends.astype(np.int32) - starts).sum()), 60)
+        return f"{hrs:02}:{mins:02}"
+
+    def set_day_shifts(self, idx, shifts):
+        """replace the shifts of a day by index with a list of HH:MM-HH:MM strings, blank strings are skipped"""
+        starts, ends = [], []
+        for shift in shifts:
+            if shift.strip() == "":
+                continue
+            start_str, end_str = shift.split("-")
+            starts.append(int(start_str[:2]) * 60 + int(start_str[3:5]))
+            ends.append(int(end_str[:2]) * 60 + int(end_str[3:5]))
+        first, last = self._day_offsets[idx], self._day_offsets[idx + 1]
+        # the new shifts keep the scheduled status of the day
+        scheduled = [int(self._scheduled[first:last].any())] * len(starts)
+
+        self._starts = np.concatenate(
+            (
+                self._starts[:first],
+                np.array(starts, dtype=np.int16),
+                self._starts[last:],
+            )
+        )
+        self._ends = np.concatenate(
+            (self._ends[:first], np.array(ends, dtype=np.int16), self._ends[last:])
+        )
+        self._scheduled = np.concatenate(
+            (
+                self._scheduled[:first],
+                np.array(scheduled, dtype=np.int8),
+                self._scheduled[last:],
+            )
+        )
+        self._day_offsets[idx + 1 :] += len(starts) - (last - first)
 
-    return eight_day_df
 
+class Week(ShiftDays):
+    __slots__ = ()
 
-class Week:
-    def __init__(self, work_hrs_df, dt_day_object):
+    def __init__(self, shift_store, dt_day_object):
         """
         A Week class which contains all days of the week. Dates and work info for a given table will be computed
           starting with Monday of the week given by dt_day_object.
 
-        :param work_hrs_df: The work hours DataFrame for a job
+        :param shift_store: The ShiftStore of work hours for a job
         :param dt_day_object: Any date that falls in this week of interest
         """
-        # given a date, fill out the Mon-Sun week with correct dates
-        self._week_dates_list = []
-        for idx in range(7):
-            self._week_dates_list.append(
-                dt_day_object + dt.timedelta(days=(idx - dt_day_object.weekday()))
-            )
-        self._shifts = []
-        self._shift_deltas = []
-        self._shifts_tot = []
-        self._scheduled = []
-        # fill in information for each day with info from the DataFrame
-        for idx in range(7):
-            daily_info_dict = compute_daily_hrs(
-                work_hrs_df, self._week_dates_list[idx], tdelta_as_hrs_min=True
-            )
-
-            if daily_info_dict:
-                self._shifts.append(daily_info_dict["shifts"])
-                self._shift_deltas.append(daily_info_dict["shift_deltas"])
-                self._shifts_tot.append(daily_info_dict["shifts_tot"])
-                self._scheduled.append(daily_info_dict["scheduled"])
-            else:
-                self._shifts.append([""])
-                self._shift_deltas.append(0)
-                self._shifts_tot.append(0)
-                self._scheduled.append(False)
+        super().__init__(
+            shift_store,
+            dt_day_object - dt.timedelta(days=dt_day_object.weekday()),
+            7,
+        )
 
     def get_info_by_day_of_week(self, idx):
         """return work info for day indexed by 0 (Mon) - 6 (Sun)"""
+        if self.get_num_shifts(idx) == 0:
+            return {
+                "shifts": [""],
+                "shift_deltas": 0,
+                "shifts_tot": 0,
+                "scheduled": False,
+                "day": self.get_day(idx),
+            }
         return {
-            "shifts": self._shifts[idx],
-            "shift_deltas": self._shift_deltas[idx],
-            "shifts_tot": self._shifts_tot[idx],
-            "scheduled": self._scheduled[idx],
-            "day": self._week_dates_list[idx],
+            "shifts": self.get_day_shifts(idx),
+            "shift_deltas": self.get_day_deltas(idx),
+            "shifts_tot": self.get_day_total(idx),
+            "scheduled": self.get_day_view(idx)[2].tolist(),
+            "day": self.get_day(idx),
         }
 
     def set_shifts_by_day_of_week(self, idx, shifts):
         """set shifts for day indexed by 0 (Mon) - 6 (Sun)"""
-        self._shifts[idx] = shifts
+        self.set_day_shifts(idx, shifts)
 
     def get_week_dates_list(self):
         """return a list with the dates for each day Mon-Sun"""
-        return self._week_dates_list
+        return [self.get_day(idx) for idx in range(7)]
 
     def get_week_shifts_list(self):
-        """return a list with shifts for each day Mon-Sun"""
-        return self._shifts
+        """return a new list with shifts for each day Mon-Sun"""
+        return [self.get_day_shifts(idx) for idx in range(7)]
 
     def set_week_shifts_list(self, shifts):
         """set shifts from a list of shifts for each day Mon-Sun"""
-        self._shifts = shifts
+        for idx, day_shifts in enumerate(shifts):
+            self.set_day_shifts(idx, day_shifts)
 
     def get_week_scheduled_list(self):
         """return a list of scheduled flag for each shift for each day Mon-Sun"""
-        return self._scheduled
+        return [
+            self.get_day_view(idx)[2].tolist() if self.get_num_shifts(idx) else False
+            for idx in range(7)
+        ]
 
     def __iter__(self):
         return WeekIterator(self)
 
 
 class WeekIterator:
+    __slots__ = ("_week", "_index")
+
     def __init__(self, week):
         self._week = week
         self._index = 0
 
     def __next__(self):
-        if self._index < len(self._week._week_dates_list):
+        if self._index < 7:
             result = self._week.get_info_by_day_of_week(self._index)
             self._index += 1
             return result
@@ -377,65 +1640,170 @@ class WeekIterator:
             raise StopIteration
 
 
-class WorkTimeRange:
-    def __init__(self, work_hrs_df, dt_day_object_start, dt_day_object_stop):
+class WeekCache:
+    def __init__(self, max_weeks=WEEK_CACHE_SIZE):
+        """
+        A bounded LRU cache of Week objects keyed by (job, Monday), for paging through weeks in the shifts window.
+          The weeks before and after each week asked for are built in a background thread. Cached weeks are shared,
+          copy() a week before changing its shifts.
+
+        :param max_weeks: number of weeks kept, the least recently used week is dropped first
+        """
+        self._max_weeks = max_weeks
+        self._weeks = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by clear() and invalidate(), a prefetch started before is dropped
+        self._generation = 0
+        self._executor = None
+        # set by shutdown(), weeks are only built when they are asked for after it
+        self._is_shut_down = False
+
+    @staticmethod
+    def _get_key(job, dt_day_object):
+        """return the cache key of the week of a date"""
+        monday = dt_day_object - dt.timedelta(days=dt_day_object.weekday())
+        return job, monday.strftime(DATE_FMT_STR)
+
+    def _put(self, key, week, generation):
+        """add a week with the lock held, unless the cache changed since it was started"""
+        if generation != self._generation:
+            return
+        self._weeks[key] = week
+        self._weeks.move_to_end(key)
+        while len(self._weeks) > self._max_weeks:
+            self._weeks.popitem(last=False)
+
+    @work_hrs_profile.timed()
+    def get_week(self, job, shift_store, dt_day_object):
+        """
+        Return the Week of a date, building it if it isn't cached, and prefetch the weeks around it
+
+        :param job: name of the job
+        :param shift_store: The ShiftStore of work hours for the job
+        :param dt_day_object: Any date that falls in the week of interest
+        :return: a Week object shared with the cache
+        """
+        key = self._get_key(job, dt_day_object)
+        with self._lock:
+            week = self._weeks.get(key)
+            if week is not None:
+                self._weeks.move_to_end(key)
+            generation = self._generation
+        if week is None:
+            week = Week(shift_store, dt_day_object)
+            with self._lock:
+                self._put(key, week, generation)
+
+        for days in (-7, 7):
+            self.prefetch(job, shift_store, dt_day_object + dt.timedelta(days=days))
+        return week
+
+    def prefetch(self, job, shift_store, dt_day_object):
+        """build the Week of a date in the background, if it isn't cached"""
+        key = self._get_key(job, dt_day_object)
+        with self._lock:
+            if self._is_shut_down or key in self._weeks:
+                return
+            generation = self._generation
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            # submitted with the lock held, so shutdown() can't stop the executor in between
+            self._executor.submit(
+                self._prefetch, key, shift_store, dt_day_object, generation
+            )
+
+    def _prefetch(self, key, shift_store, dt_day_object, generation):
+        """build a week in the worker thread"""
+        week = Week(shift_store, dt_day_object)
+        with self._lock:
+            if key not in self._weeks:
+                self._put(key, week, generation)
+
+    def clear(self):
+        """drop all cached weeks"""
+        with self._lock:
+            self._generation += 1
+            self._weeks.clear()
+
+    def shutdown(self):
+        """cancel the prefetches not started yet and stop the worker thread, nothing is prefetched after this"""
+        with self._lock:
+            self._is_shut_down = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def invalidate(self, job, dates):
+        """
+        Drop the cached weeks of a job which include dates that were written
+
+        :param job: name of the job that was written
+        :param dates: iterable of date strings (YYYY-MM-DD) that were written
+        :return: None
+        """
+        with self._lock:
+            self._generation += 1
+            for date_str in set(dates):
+                self._weeks.pop(
+                    self._get_key(job, dt.date.fromisoformat(date_str)), None
+                )
+
+
+week_cache = WeekCache()
+
+
+class WorkTimeRange(ShiftDays):
+    __slots__ = ()
+
+    def __init__(self, shift_store, dt_day_object_start, dt_day_object_stop):
         """A class which contains all days in a range of dates.
 
-        :param work_hrs_df: The work hours DataFrame for a job
+        :param shift_store: The ShiftStore of work hours for a job
         :param dt_day_object_start: First day of the range
         :param dt_day_object_stop: Last day of the range
         """
-        # create a list of dates for each day from the starting date to ending date
-        self._dates_list = (
-            pd.date_range(start=dt_day_object_start, end=dt_day_object_stop)
-            .to_pydatetime()
-            .tolist()
+        super().__init__(
+            shift_store,
+            dt_day_object_start,
+            max((dt_day_object_stop - dt_day_object_start).days + 1, 0),
         )
-        self._shifts = []
-        self._shift_deltas = []
-        self._shifts_tot = []
-        self._scheduled = []
-        self._num_shifts = []
-        # compute and fill in work info from DataFrame for each day in the range
-        for idx, date in enumerate(self._dates_list):
-            daily_info_dict = compute_daily_hrs(
-                work_hrs_df, date, tdelta_as_hrs_min=True
-            )
-            if daily_info_dict:
-                self._shifts.append(daily_info_dict["shifts"])
-                self._shift_deltas.append(daily_info_dict["shift_deltas"])
-                self._shifts_tot.append(daily_info_dict["shifts_tot"])
-                self._scheduled.append(daily_info_dict["scheduled"])
-                self._num_shifts.append(len(self._shifts[idx]))
-            else:
-                self._shifts.append([""])
-                self._shift_deltas.append([0])
-                self._shifts_tot.append(0)
-                self._scheduled.append([False])
-                self._num_shifts.append(1)
 
     def get_info_by_day(self, idx):
         """return work info for day by index"""
+        if self.get_num_shifts(idx) == 0:
+            return {
+                "num_shifts": 1,
+                "shifts": [""],
+                "shift_deltas": [0],
+                "shifts_tot": 0,
+                "scheduled": [False],
+                "day": self.get_day(idx),
+            }
         return {
-            "num_shifts": self._num_shifts[idx],
-            "shifts": self._shifts[idx],
-            "shift_deltas": self._shift_deltas[idx],
-            "shifts_tot": self._shifts_tot[idx],
-            "scheduled": self._scheduled[idx],
-            "day": self._dates_list[idx],
+            "num_shifts": self.get_num_shifts(idx),
+            "shifts": self.get_day_shifts(idx),
+            "shift_deltas": self.get_day_deltas(idx),
+            "shifts_tot": self.get_day_total(idx),
+            "scheduled": self.get_day_view(idx)[2].tolist(),
+            "day": self.get_day(idx),
         }
 
+    def __len__(self):
+        return self._num_days
+
     def __iter__(self):
         return TimeRangeIterator(self)
 
 
 class TimeRangeIterator:
+    __slots__ = ("_work_time_range", "_index")
+
     def __init__(self, work_time_range):
         self._work_time_range = work_time_range
         self._index = 0
 
     def __next__(self):
-        if self._index < len(self._work_time_range._dates_list):
+        if self._index < len(self._work_time_range):
             result = self._work_time_range.get_info_by_day(self._index)
             self._index += 1
             return result
@@ -443,133 +1811,165 @@ class TimeRangeIterator:
             raise StopIteration
 
 
-def get_report_str(
-    bus_hrs_df,
-    HD_hrs_df,
-    delivery_hrs_df,
+def iter_report_days(dt_day_object_start, dt_day_object_stop, shift_stores=None):
+    """
+    Yield each date of a range with the shift stores holding its shifts
+
+    :param dt_day_object_start: datetime object for the starting date
+    :param dt_day_object_stop: datetime object for the ending date
+    :param shift_stores: dict of ShiftStore objects by job covering the whole range,
+      None to read the shifts from the database REPORT_CHUNK_DAYS at a time
+    :return: generator of (datetime object, dict of ShiftStore objects by job) tuples
+    """
+    chunk_start = dt_day_object_start
+    while chunk_start <= dt_day_object_stop:
+        if shift_stores is None:
+            chunk_stop = min(
+                chunk_start + dt.timedelta(days=REPORT_CHUNK_DAYS - 1),
+                dt_day_object_stop,
+            )
+            chunk_shift_stores = build_shift_stores(
+                read_shifts_table(
+                    chunk_start.strftime(DATE_FMT_STR),
+                    chunk_stop.strftime(DATE_FMT_STR),
+                )
+            )
+        else:
+            chunk_stop = dt_day_object_stop
+            chunk_shift_stores = shift_stores
+        for date in pd.date_range(start=chunk_start, end=chunk_stop).to_pydatetime():
+            yield date, chunk_shift_stores
+        chunk_start = chunk_stop + dt.timedelta(days=1)
+
+
+@work_hrs_profile.timed()
+def iter_report_lines(
     dt_day_object_start,
     dt_day_object_stop,
     eight_day_df,
+    shift_stores=None,
 ):
     """
-    Create a report string for a range of dates based on work hours dataframes
+    Generate the lines of a report for a range of dates one day at a time, so memory use doesn't
+      grow with the length of the range
 
-    :param bus_hrs_df: Bus hours DataFrame
-    :param HD_hrs_df: HD hours DataFrame
-    :param delivery_hrs_df: delivery hours DataFrame
     :param dt_day_object_start: datetime object for the starting date
     :param dt_day_object_stop: datetime object for the ending date
     :param eight_day_df: the eight day window DataFrame
-    :return: a report string with shift info and totals and an 8-day window sum
+    :param shift_stores: dict of ShiftStore objects by job, as returned by build_shift_stores(),
+      None to read the shifts from the database as the report goes
+    :return: generator of report lines, the title line first
     """
-    return_str = []
-    title_str = (
-        f"{'DATE:':^14}"
-        f"     {'---Bus Shift---':^15} {'Shift':^5} {'Total':^5}"
-        f"     {'---HD Shift---':^15} {'Shift':^5} {'Total':^5}"
-        f"     {'--Del Shift--':^15} {'Shift':^5} {'Total':^5}"
-        f"{'Daily Total':>20}"
-        f"{'8-Day Rolling':>20}"
-    )
-    return_str.append(title_str)
+    jobs_df = read_jobs()
+    title_str = f"{'DATE:':^14}"
+    for job, abbrev in jobs_df.abbrev.items():
+        shift_title_str = SHIFT_TITLES.get(job, f"---{abbrev} Shift---")
+        title_str += f"     {shift_title_str:^15} {'Shift':^5} {'Total':^5}"
+    title_str += f"{'Daily Total':>20}" f"{'8-Day Rolling':>20}"
+    yield title_str
     title_str_len = len(title_str)
 
-    # Based on the date range and WorkTimeRange objects, create lists
-    # of work information which will then be zipped together to create
-    # a final report string
-    for date, bus_info, HD_info, delivery_info in zip(
-        pd.date_range(start=dt_day_object_start, end=dt_day_object_stop)
-        .to_pydatetime()
-        .tolist(),
-        WorkTimeRange(bus_hrs_df, dt_day_object_start, dt_day_object_stop),
-        WorkTimeRange(HD_hrs_df, dt_day_object_start, dt_day_object_stop),
-        WorkTimeRange(delivery_hrs_df, dt_day_object_start, dt_day_object_stop),
+    # index the eight day DataFrame by date once, instead of filtering it for every date. The dates of the
+    #   report before the first or after the last saved shift are added with zero hours.
+    eight_day_by_date_df = extend_eight_day_df(
+        eight_day_df,
+        dt_day_object_start.strftime(DATE_FMT_STR),
+        dt_day_object_stop.strftime(DATE_FMT_STR),
+    ).set_index("date")
+
+    for date, day_shift_stores in iter_report_days(
+        dt_day_object_start, dt_day_object_stop, shift_stores
     ):
-        return_str.append("=" * title_str_len)
+        yield "=" * title_str_len
         if date.date() == dt.date.today():
-            return_str.append("\nToday:")
-            return_str.append("*" * title_str_len)
+            yield "\nToday:"
+            yield "*" * title_str_len
         date_str = date.strftime(DATE_FMT_STR)
         day_date_str = date.strftime("%a %Y-%m-%d")
 
-        num_lines_to_print = max(
-            bus_info["num_shifts"], HD_info["num_shifts"], delivery_info["num_shifts"]
-        )
-
-        date_list = [" " * len(day_date_str)] * num_lines_to_print
-
-        bus_shifts_list = [" "] * num_lines_to_print
-        bus_shift_hrs_list = [" "] * num_lines_to_print
-        bus_tot_hrs_list = [" "] * num_lines_to_print
-
-        HD_shifts_list = [" "] * num_lines_to_print
-        HD_shift_hrs_list = [" "] * num_lines_to_print
-        HD_tot_hrs_list = [" "] * num_lines_to_print
+        jobs_info = []
+        for job in jobs_df.index:
+            daily_info_dict = compute_daily_hrs(
+                day_shift_stores[job], date, tdelta_as_hrs_min=True
+            )
+            if daily_info_dict is None:
+                daily_info_dict = {"shifts": [""], "shift_deltas": [0], "shifts_tot": 0}
+            jobs_info.append(daily_info_dict)
 
-        delivery_shifts_list = [" "] * num_lines_to_print
-        delivery_shift_hrs_list = [" "] * num_lines_to_print
-        delivery_tot_hrs_list = [" "] * num_lines_to_print
+        num_lines_to_print = max(len(info["shifts"]) for info in jobs_info)
 
+        date_list = [" " * len(day_date_str)] * num_lines_to_print
         daily_tot_list = [" "] * num_lines_to_print
         eight_day_total_list = [" "] * num_lines_to_print
 
         date_list[0] = day_date_str
-        bus_shifts_list[: len(bus_info["shifts"])] = bus_info["shifts"]
-        bus_shift_hrs_list[: len(bus_info["shift_deltas"])] = bus_info["shift_deltas"]
-        bus_tot_hrs_list[0] = bus_info["shifts_tot"]
 
-        HD_shifts_list[: len(HD_info["shifts"])] = HD_info["shifts"]
-        HD_shift_hrs_list[: len(HD_info["shift_deltas"])] = HD_info["shift_deltas"]
-        HD_tot_hrs_list[0] = HD_info["shifts_tot"]
+        # shifts, shift hours and total hours lists for each job
+        jobs_lists = []
+        for info in jobs_info:
+            shifts_list = [" "] * num_lines_to_print
+            shift_hrs_list = [" "] * num_lines_to_print
+            tot_hrs_list = [" "] * num_lines_to_print
 
-        delivery_shifts_list[: len(delivery_info["shifts"])] = delivery_info["shifts"]
-        delivery_shift_hrs_list[: len(delivery_info["shift_deltas"])] = delivery_info[
-            "shift_deltas"
-        ]
-        delivery_tot_hrs_list[0] = delivery_info["shifts_tot"]
+            shifts_list[: len(info["shifts"])] = info["shifts"]
+            shift_hrs_list[: len(info["shift_deltas"])] = info["shift_deltas"]
+            tot_hrs_list[0] = info["shifts_tot"]
+            jobs_lists.append((shifts_list, shift_hrs_list, tot_hrs_list))
 
         hrs, mins = compute_delta_hrs_min(
-            eight_day_df[eight_day_df.date == date_str].eight_day_window.iloc[0]
+            eight_day_by_date_df.at[date_str, "eight_day_window"]
         )
         eight_day_total_str = f"{hrs:02}:{mins:02}"
         eight_day_total_list[0] = eight_day_total_str
 
         hrs, mins = compute_delta_hrs_min(
-            eight_day_df[eight_day_df.date == date_str].daily_tot_hrs.iloc[0]
+            eight_day_by_date_df.at[date_str, "daily_tot_hrs"]
         )
         daily_total_str = f"{hrs:02}:{mins:02}"
         daily_tot_list[0] = daily_total_str
 
-        output_str_zip = zip(
-            date_list,
-            bus_shifts_list,
-            bus_shift_hrs_list,
-            bus_tot_hrs_list,
-            HD_shifts_list,
-            HD_shift_hrs_list,
-            HD_tot_hrs_list,
-            delivery_shifts_list,
-            delivery_shift_hrs_list,
-            delivery_tot_hrs_list,
-            daily_tot_list,
-            eight_day_total_list,
-        )
-        for line in output_str_zip:
-            return_str.append(
-                f"{line[0]:^10}"
-                f"     {line[1]:^15} {line[2]:^5} {line[3]:^5}"
-                f"     {line[4]:^15} {line[5]:^5} {line[6]:^5}"
-                f"     {line[7]:^15} {line[8]:^5} {line[9]:^5}"
-                f"{line[10]:>20}"
-                f"{line[11]:>20}"
+        for line_idx in range(num_lines_to_print):
+            line_str = f"{date_list[line_idx]:^10}"
+            for shifts_list, shift_hrs_list, tot_hrs_list in jobs_lists:
+                line_str += (
+                    f"     {shifts_list[line_idx]:^15}"
+                    f" {shift_hrs_list[line_idx]:^5}"
+                    f" {tot_hrs_list[line_idx]:^5}"
+                )
+            line_str += (
+                f"{daily_tot_list[line_idx]:>20}"
+                f"{eight_day_total_list[line_idx]:>20}"
             )
+            yield line_str
 
         if date.date() == dt.date.today():
-            return_str.append("*" * title_str_len + "\n")
+            yield "*" * title_str_len + "\n"
 
-    return "\n".join(return_str)
 
+@work_hrs_profile.timed()
+def get_report_str(
+    shift_stores,
+    dt_day_object_start,
+    dt_day_object_stop,
+    eight_day_df,
+):
+    """
+    Create a report string for a range of dates based on work hours shift stores
 
+    :param shift_stores: dict of ShiftStore objects by job, as returned by build_shift_stores()
+    :param dt_day_object_start: datetime object for the starting date
+    :param dt_day_object_stop: datetime object for the ending date
+    :param eight_day_df: the eight day window DataFrame
+    :return: a report string with shift info and totals and an 8-day window sum
+    """
+    return "\n".join(
+        iter_report_lines(
+            dt_day_object_start, dt_day_object_stop, eight_day_df, shift_stores
+        )
+    )
+
+
+@work_hrs_profile.timed()
 def get_notifications_str(dt_day_object_start, dt_day_object_stop, eight_day_df):
     """
     Create a notifications string based on 8-day rolling window DataFrame
@@ -588,24 +1988,33 @@ def get_notifications_str(dt_day_object_start, dt_day_object_stop, eight_day_df)
     return display_alerts(range_window_df)
 
 
-def check_for_scheduled_updates(work_hrs_df):
+@work_hrs_profile.timed()
+def check_for_scheduled_updates(before_date_str=None):
     """
-    Check a work hours DataFrame to see what shifts before today still need to be updated with actual shift info
+    Find the dates of every job that still have shifts marked as scheduled, that need to be updated with
+      actual shift info. One query of the partial index of scheduled shifts, however long the history is.
 
-    :param work_hrs_df: a work hours DataFrame
-    :return: a sorted lists of dates (strings) showing which dates need to be updated
+    :param before_date_str: optional date (YYYY-MM-DD), only dates before it are returned, defaults to today
+    :return: dict of sorted lists of dates (strings) by job, in job display order, only jobs with dates to
+      update are in it
     """
-    today = dt.date.today()
-    # reduce DataFrames to those dates before today that are still set as scheduled
-    work_hrs_updates_df = work_hrs_df[work_hrs_df.date < today.strftime(DATE_FMT_STR)]
-    work_hrs_updates_df = work_hrs_updates_df[work_hrs_updates_df.scheduled == 1]
-    if work_hrs_updates_df.empty:
-        return None
-    else:
-
-        return sorted(list(set(work_hrs_updates_df.date)))
-
-
+    if before_date_str is None:
+        before_date_str = dt.date.today().strftime(DATE_FMT_STR)
+    with connect_db() as conn:
+        # a scan of the covering partial index, in index order, without sorting
+        rows = conn.execute(
+            "SELECT DISTINCT job, date FROM shifts"
+            " WHERE scheduled = 1 AND date < ? ORDER BY job, date",
+            (before_date_str,),
+        ).fetchall()
+
+    job_dates = {}
+    for job, date_str in rows:
+        job_dates.setdefault(job, []).append(date_str)
+    return {job: job_dates[job] for job in read_jobs().index if job in job_dates}
+
+
+@work_hrs_profile.timed()
 def check_for_time_errors(work_hrs_df):
     """
     Check a work hours DataFrame for time formatting errors
@@ -641,77 +2050,265 @@ def check_for_time_errors(work_hrs_df):
             if len(date_start) > 1:
                 date_end.pop(-1)
                 date_start.pop(0)
+                # each shift has to end by the time the next one starts
                 for start, end in zip(date_start, date_end):
-                    if date_end >= date_start:
+                    if end > start:
                         return "Date order issues - overlapping shifts"
 
     return ""
 
 
-def process_manifest(manifest_text, work_hrs_df):
+@work_hrs_profile.timed()
+def check_for_job_overlaps(job, work_hrs_df):
+    """
+    Check the shifts of a work hours DataFrame against the shifts of the other jobs
+
+    :param job: name of the job of the work hours DataFrame
+    :param work_hrs_df: a work hours DataFrame
+    :return: a string to notify of a shift overlapping another job's shift
+    """
+    labels = read_jobs().label
+    for start_str, end_str in zip(work_hrs_df.start, work_hrs_df.end):
+        overlaps = shift_interval_index.find_overlaps(
+            start_str, end_str, exclude_job=job
+        )
+        if overlaps:
+            other_job, other_start_str, other_end_str = overlaps[0]
+            return f"Overlaps {labels[other_job]} shift {other_start_str}-{other_end_str[11:]}"
+    return ""
+
+
+def get_other_jobs_shifts(job, date_str, shift_stores):
+    """
+    Collect the shifts of the other jobs on a date, to check a job's shifts against them
+
+    :param job: name of the job being checked
+    :param date_str: date (YYYY-MM-DD)
+    :param shift_stores: dict of ShiftStore objects by job
+    :return: dict of lists of shift strings (HH:MM-HH:MM) by job label, for the jobs with shifts on the date
+    """
+    labels = read_jobs().label
+    other_jobs_shifts = {}
+    for other_job, other_shift_store in shift_stores.items():
+        day_info = other_shift_store.get_day_info(date_str)
+        if other_job != job and day_info is not None:
+            other_jobs_shifts[labels[other_job]] = day_info["shifts"]
+    return other_jobs_shifts
+
+
+@work_hrs_profile.timed()
+def validate_day_shifts(shift_strs, other_jobs_shifts=None):
+    """
+    Check the shifts of one day as they are typed: format, order within each shift, overlaps between
+      the shifts and overlaps with the shifts of other jobs on the same day
+
+    :param shift_strs: list of shift strings (HH:MM-HH:MM), blank strings are skipped
+    :param other_jobs_shifts: dict of lists of shift strings of other jobs on the same day by job label
+    :return: a string describing the first error found, "" if the shifts are valid
+    """
+    intervals = []
+    for shift_str in shift_strs:
+        shift_str = shift_str.strip()
+        if shift_str == "":
+            continue
+        if compute_shift_duration(shift_str) is None:
+            return f"Format issue: {shift_str}"
+        start_str, end_str = shift_str.split("-")
+        if start_str >= end_str:
+            return f"Order issue: {shift_str}"
+        intervals.append((start_str, end_str))
+
+    # zero padded HH:MM strings sort in time order
+    intervals.sort()
+    for (prev_start_str, prev_end_str), (start_str, end_str) in zip(
+        intervals, intervals[1:]
+    ):
+        if shifts_overlap(prev_start_str, prev_end_str, start_str, end_str):
+            return f"Overlapping shifts at {start_str}"
+
+    for label, other_shift_strs in (other_jobs_shifts or {}).items():
+        for other_shift_str in other_shift_strs:
+            other_start_str, other_end_str = other_shift_str.split("-")
+            for start_str, end_str in intervals:
+                if shifts_overlap(start_str, end_str, other_start_str, other_end_str):
+                    return f"Overlaps {label} shift {other_shift_str}"
+    return ""
+
+
+@work_hrs_profile.timed()
+def process_manifest(manifest_text, shift_store):
     """
     parse text representing a work manifest, create a Week object with shift info filled in
 
     :param manifest_text: a string of text grabbed from an image of a work manifest
-    :param work_hrs_df: a work hours DataFrame
+    :param shift_store: a ShiftStore of work hours
     :return: a Week object with manifest hours filled in
     """
-    shifts = []
-    date_week_of_str = None
-    # parse text for the starting date of the week
-    for line in manifest_text.split("\n"):
-        if "Coord" in line:
-            m = re.search(r"(\d{2}/\d{2})", line)
-            if m:
-                date_week_of_str = m.groups()[0]
-                logger.error("Coord found.")
-
-        # parse text for the work shift info, military hours format (1500-1800)
-        m = re.findall(r"(\d{4}-\d{4})", line)
-        if m:
-            for item in m:
-                shifts.append(item)
-                logger.error("Coord date found")
-
-
-    if not date_week_of_str or not shifts or (len(shifts) != 10):
-        logger.error("No coord info found")
-        if not date_week_of_str:
-            logger.error("date_week_of_str missing")
-        if not shifts:
-            logger.error("shifts missing")
-        if len(shifts) != 10:
-            logger.error("shifts not 10: {}", len(shifts))
+    try:
+        # the whole text is one manifest, its grammar is auto-detected
+        schedule = work_hrs_manifest.parse_manifest(manifest_text.split("\n"))
+        week_of_date = schedule.get_week_of_date()
+    except ValueError as e:
+        logger.error("Manifest not read: {}", e)
         return None
 
-    # add colons to shifts (1500-1800 -> 15:00-18:00)
-    for idx, shift in enumerate(shifts):
-        shifts[idx] = shift[:2] + ":" + shift[2:7] + ":" + shift[7:]
+    # create a Week object with this date, modified to have the new shift info
+    work_info = Week(shift_store, week_of_date)
+    for idx, day_shifts in schedule.days.items():
+        work_info.set_shifts_by_day_of_week(idx, day_shifts)
 
-    # create a datetime object based on the date pulled from manifest
-    # this date is only month/year, so year is assumed to be this year
-    # unless this makes the date in the past, therefore year is next year
-    today = dt.datetime.now()
-    week_of_date = dt.datetime.strptime(date_week_of_str, "%m/%d")
-    week_of_date = week_of_date.replace(year=today.year)
-    if week_of_date < today:
-        week_of_date = week_of_date.replace(week_of_date.year + 1)
+    return work_info
 
-    # create a Week object with this date
-    work_info = Week(work_hrs_df, week_of_date)
 
-    # swap the morning and afternoon shifts to be in time order
-    for idx in range(5):
-        if shifts[idx].split("-")[0] > shifts[idx + 5].split("-")[0]:
-            shifts[idx], shifts[idx + 5] = shifts[idx + 5], shifts[idx]
+@work_hrs_profile.timed()
+def import_manifests(sources, job="bus", year=None, dry_run=False, grammar_name=None):
+    """
+    Import many manifests at once. Every source is scanned in one streaming pass, each manifest's week is
+      checked like a saved week and the shifts of all the valid weeks are written in a single transaction,
+      as one changeset of the journal.
+
+    :param sources: iterable of (name, iterable of lines) pairs, e.g. open text files, each with any number of
+      manifests
+    :param job: name of the job of the manifests
+    :param year: year of the manifest dates, defaults to the next date on or after today
+    :param dry_run: check the manifests without writing anything
+    :param grammar_name: name of the grammar of every manifest, auto-detected for each one by default
+    :return: tuple (summary DataFrame with a source, week, status (ok, unchanged or error) and message row for
+      each manifest, changeset DataFrame of the valid weeks, written unless dry_run)
+    """
+    today_str = dt.date.today().strftime(DATE_FMT_STR)
+    # the dates of the manifests are taken on or after the first day of the year
+    dt_year_object = dt.datetime(year, 1, 1) if year else None
+    shift_stores = build_shift_stores(read_shifts_table())
+    columns = ["date", "start", "end", "scheduled"]
+
+    summary_rows = []
+    week_sources = {}
+    # saved and new shifts of the valid weeks, diffed in one pass once every manifest is read
+    work_hrs_week_dfs = [pd.DataFrame(columns=["id"] + columns)]
+    new_rows = []
+    for name, lines in sources:
+        for line_num, schedule, error_str in work_hrs_manifest.iter_manifests(
+            lines, grammar_name
+        ):
+            source_str = f"{name}:{line_num}"
+            try:
+                if schedule is None:
+                    raise ValueError(error_str)
+                week_of_date = schedule.get_week_of_date(dt_year_object)
+            except ValueError as e:
+                summary_rows.append([source_str, "", "error", str(e)])
+                continue
+
+            week_dates = [
+                (
+                    week_of_date + dt.timedelta(days=idx - week_of_date.weekday())
+                ).strftime(DATE_FMT_STR)
+                for idx in range(7)
+            ]
+            week_str = week_dates[0]
+            if week_str in week_sources:
+                summary_rows.append(
+                    [
+                        source_str,
+                        week_str,
+                        "error",
+                        f"same week as {week_sources[week_str]}",
+                    ]
+                )
+                continue
+
+            week_rows = []
+            error_str = ""
+            for idx, day_shifts in schedule.days.items():
+                date_str = week_dates[idx]
+                error_str = validate_day_shifts(
+                    day_shifts, get_other_jobs_shifts(job, date_str, shift_stores)
+                )
+                if error_str:
+                    error_str = f"{date_str}: {error_str}"
+                    break
+                for shift in day_shifts:
+                    start_str, end_str = shift.split("-")
+                    week_rows.append(
+                        (
+                            date_str,
+                            f"{date_str} {start_str}",
+                            f"{date_str} {end_str}",
+                            int(date_str > today_str),
+                        )
+                    )
+            if error_str:
+                summary_rows.append([source_str, week_str, "error", error_str])
+                continue
+
+            # the manifest replaces the shifts of its days, the other days keep their saved shifts
+            week_sources[week_str] = source_str
+            work_hrs_week_df = (
+                shift_stores[job]
+                .get_range_df(week_str, week_dates[-1])[columns]
+                .reset_index()
+            )
+            work_hrs_week_dfs.append(work_hrs_week_df)
+            new_rows.extend(week_rows)
+            manifest_dates = [week_dates[idx] for idx in schedule.days]
+            new_rows.extend(
+                work_hrs_week_df[~work_hrs_week_df.date.isin(manifest_dates)][
+                    columns
+                ].itertuples(index=False)
+            )
+            summary_rows.append([source_str, week_str, None, ""])
 
-    # remove any 00:00-00:00 shifts
-    for idx, shift in enumerate(shifts):
-        if shift == '00:00-00:00':
-            shifts[idx] = ''
+    changeset_df = compute_shifts_changeset(
+        pd.concat(work_hrs_week_dfs), pd.DataFrame(new_rows, columns=columns)
+    )
+    # count the changes of each week, by the Monday of their dates
+    change_dates = pd.to_datetime(changeset_df.date)
+    week_changes = (
+        (change_dates - pd.to_timedelta(change_dates.dt.weekday, unit="D"))
+        .dt.strftime(DATE_FMT_STR)
+        .value_counts()
+    )
+    for summary_row in summary_rows:
+        if summary_row[2] is None:
+            num_changes = week_changes.get(summary_row[1], 0)
+            if num_changes:
+                summary_row[2:] = ["ok", f"{num_changes} shift changes"]
+            else:
+                summary_row[2] = "unchanged"
 
-    # modify the Week object to have the new shift info
-    for idx in range(5):
-        work_info.set_shifts_by_day_of_week(idx, [shifts[idx], shifts[idx + 5]])
+    if not dry_run and not changeset_df.empty:
+        # an import is undone and redone as a whole, like a saved week
+        changeset_df = apply_shifts_changeset(job, changeset_df, kind="import")
+    summary_df = pd.DataFrame(
+        summary_rows, columns=["source", "week", "status", "message"]
+    )
+    logger.info(
+        "Imported {} of {} manifests for {}{}.",
+        (summary_df.status == "ok").sum(),
+        len(summary_df),
+        job,
+        " (dry run)" if dry_run else "",
+    )
+    return summary_df, changeset_df
 
-    return work_info
+
+def render_manifest_summary(summary_df):
+    """
+    Format the summary of a manifest import
+
+    :param summary_df: summary DataFrame as returned by import_manifests()
+    :return: string with a line for each manifest and a line of totals
+    """
+    source_width = max([len(source_str) for source_str in summary_df.source] + [6])
+    lines = [
+        f"{row.source:<{source_width}}  {row.week:<10}  {row.status:<9} {row.message}".rstrip()
+        for row in summary_df.itertuples()
+    ]
+    status_counts = summary_df.status.value_counts()
+    lines.append(
+        f"{len(summary_df)} manifests: {status_counts.get('ok', 0)} ok,"
+        f" {status_counts.get('unchanged', 0)} unchanged,"
+        f" {status_counts.get('error', 0)} errors"
+    )
+    return "\n".join(lines)
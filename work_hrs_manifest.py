@@ -0,0 +1,326 @@
+#######################################################
+# work_hrs_manifest.py - Manifest grammars for work_hours.py
+#######################################################
+# A manifest is the text grabbed from an image of a route's work schedule for a week. Each layout of manifest
+#   is a grammar in the registry, its patterns are compiled once when it is registered. Only the standard
+#   library is imported, the manifests can be parsed without pandas.
+import abc
+import datetime as dt
+import re
+from loguru import logger
+
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+# a day with this shift is a day off
+DAY_OFF_SHIFT = "00:00-00:00"
+
+# registered grammars, auto-detection tries them in this order
+MANIFEST_GRAMMARS = []
+# the start line patterns of every registered grammar in one pattern, to split manifests with one search a line
+_start_pattern = None
+
+
+class ManifestSchedule:
+    __slots__ = ("grammar", "week_of_str", "days")
+
+    def __init__(self, grammar, week_of_str, days):
+        """
+        The week schedule read from a manifest
+
+        :param grammar: name of the grammar that read it
+        :param week_of_str: date of the week (MM/DD), the year isn't on manifests
+        :param days: dict of lists of HH:MM-HH:MM shifts, sorted, by day of the week 0 (Mon) - 6 (Sun). Days
+          missing from the manifest aren't in the dict, a day off is an empty list.
+        """
+        self.grammar = grammar
+        self.week_of_str = week_of_str
+        self.days = days
+
+    def get_week_of_date(self, today=None):
+        """
+        Resolve the date of the week: it is in this year, unless this makes the date in the past, therefore it
+          is in next year
+
+        :param today: datetime object, defaults to now
+        :return: datetime object of the week date
+        :raises ValueError: if the week date isn't a valid date
+        """
+        if today is None:
+            today = dt.datetime.now()
+        try:
+            week_of_date = dt.datetime.strptime(
+                f"{today.year}/{self.week_of_str}", "%Y/%m/%d"
+            )
+            if week_of_date < today:
+                week_of_date = week_of_date.replace(year=today.year + 1)
+        except ValueError:
+            raise ValueError(f"invalid week date {self.week_of_str}")
+        return week_of_date
+
+    def __eq__(self, other):
+        return isinstance(other, ManifestSchedule) and (
+            (self.grammar, self.week_of_str, self.days)
+            == (other.grammar, other.week_of_str, other.days)
+        )
+
+    def __repr__(self):
+        return (
+            f"ManifestSchedule({self.grammar!r}, {self.week_of_str!r}, {self.days!r})"
+        )
+
+
+class ManifestGrammar(abc.ABC):
+    def __init__(self, name, description, start_pattern):
+        """
+        Base class of the manifest grammars
+
+        :param name: name of the grammar in the registry
+        :param description: one line description of the layout
+        :param start_pattern: regex of the line with the week date that starts a manifest, its first group is
+          the date (MM/DD)
+        """
+        self.name = name
+        self.description = description
+        self.start_pattern = re.compile(start_pattern, re.IGNORECASE)
+
+    def find_week_of_str(self, lines):
+        """return the week date (MM/DD) of the last start line, None if there isn't one"""
+        week_of_str = None
+        for line in lines:
+            m = self.start_pattern.search(line)
+            if m:
+                week_of_str = m.group(1)
+        return week_of_str
+
+    @abc.abstractmethod
+    def detect(self, lines):
+        """return True if the lines of a manifest have this layout"""
+
+    @abc.abstractmethod
+    def parse(self, lines):
+        """
+        Read the week schedule of a manifest
+
+        :param lines: list of lines of one manifest
+        :return: a ManifestSchedule object
+        :raises ValueError: if the manifest doesn't follow the grammar
+        """
+
+
+class SlotColumnsGrammar(ManifestGrammar):
+    def __init__(self, name, description, start_pattern, shift_pattern, day_counts):
+        """
+        A manifest with a fixed number of shift slots per day: all the first shifts of the week, then all the
+          second shifts, in military hours (1500-1800)
+
+        :param shift_pattern: regex of a shift, its groups are the start and end times (HHMM)
+        :param day_counts: tuple of the numbers of days a week can have, from Monday
+        """
+        super().__init__(name, description, start_pattern)
+        self.shift_pattern = re.compile(shift_pattern)
+        self.day_counts = day_counts
+
+    def detect(self, lines):
+        return self.find_week_of_str(lines) is not None
+
+    def parse(self, lines):
+        week_of_str = self.find_week_of_str(lines)
+        if week_of_str is None:
+            raise ValueError("week date missing")
+        shifts = [
+            f"{start[:2]}:{start[2:]}-{end[:2]}:{end[2:]}"
+            for line in lines
+            for start, end in self.shift_pattern.findall(line)
+        ]
+        num_days = len(shifts) // 2
+        if len(shifts) % 2 or num_days not in self.day_counts:
+            expected_str = " or ".join(str(2 * count) for count in self.day_counts)
+            raise ValueError(f"{expected_str} shifts expected, found {len(shifts)}")
+
+        # the slots of a day are put in time order, day off shifts are removed
+        days = {
+            idx: [
+                shift
+                for shift in sorted([shifts[idx], shifts[idx + num_days]])
+                if shift != DAY_OFF_SHIFT
+            ]
+            for idx in range(num_days)
+        }
+        return ManifestSchedule(self.name, week_of_str, days)
+
+
+class DayRowsGrammar(ManifestGrammar):
+    def __init__(self, name, description, start_pattern, day_pattern, shift_pattern):
+        """
+        A manifest with a row for each day, starting with the day's name, and any number of shifts on a row.
+          "off" on a row is a day off, days without a row keep their shifts.
+
+        :param day_pattern: regex of a day row, its groups are the day name and the rest of the row
+        :param shift_pattern: regex of a shift, its groups are the start hours and minutes and the end hours
+          and minutes
+        """
+        super().__init__(name, description, start_pattern)
+        self.day_pattern = re.compile(day_pattern, re.IGNORECASE)
+        self.shift_pattern = re.compile(shift_pattern)
+
+    def detect(self, lines):
+        for line in lines:
+            m = self.day_pattern.match(line)
+            if m and self.shift_pattern.search(m.group(2)):
+                return True
+        return False
+
+    def parse(self, lines):
+        week_of_str = self.find_week_of_str(lines)
+        if week_of_str is None:
+            raise ValueError("week date missing")
+        days = {}
+        for line in lines:
+            m = self.day_pattern.match(line)
+            if not m:
+                continue
+            shifts = [
+                f"{int(start_hrs):02}:{start_mins}-{int(end_hrs):02}:{end_mins}"
+                for start_hrs, start_mins, end_hrs, end_mins in self.shift_pattern.findall(
+                    m.group(2)
+                )
+            ]
+            # a row without shifts is a header, unless it says the day is off
+            if not shifts and m.group(2).strip().lower() != "off":
+                continue
+            day_idx = DAY_NAMES.index(m.group(1)[:3].lower())
+            if day_idx in days:
+                raise ValueError(f"{m.group(1)} is on more than one row")
+            days[day_idx] = sorted(shift for shift in shifts if shift != DAY_OFF_SHIFT)
+        if not days:
+            raise ValueError("no day rows found")
+        return ManifestSchedule(self.name, week_of_str, days)
+
+
+def register_grammar(grammar):
+    """
+    Add a grammar to the registry, it is tried after the grammars already registered
+
+    :param grammar: a ManifestGrammar object
+    :return: the grammar
+    """
+    global _start_pattern
+
+    if get_grammar(grammar.name) is not None:
+        raise ValueError(f"manifest grammar {grammar.name} is already registered")
+    MANIFEST_GRAMMARS.append(grammar)
+    _start_pattern = re.compile(
+        "|".join(
+            f"(?:{other_grammar.start_pattern.pattern})"
+            for other_grammar in MANIFEST_GRAMMARS
+        ),
+        re.IGNORECASE,
+    )
+    return grammar
+
+
+def get_grammar(name):
+    """return the registered grammar with a name, None if there isn't one"""
+    for grammar in MANIFEST_GRAMMARS:
+        if grammar.name == name:
+            return grammar
+    return None
+
+
+def detect_grammar(lines):
+    """return the first registered grammar that detects the lines of a manifest, None if none does"""
+    for grammar in MANIFEST_GRAMMARS:
+        if grammar.detect(lines):
+            return grammar
+    return None
+
+
+def parse_manifest(lines, grammar_name=None):
+    """
+    Read the week schedule of one manifest
+
+    :param lines: list of lines of the manifest
+    :param grammar_name: name of the grammar to use, auto-detected by default
+    :return: a ManifestSchedule object
+    :raises ValueError: if no grammar matches or the manifest doesn't follow its grammar
+    """
+    if grammar_name is None:
+        grammar = detect_grammar(lines)
+        if grammar is None:
+            raise ValueError("no manifest grammar matches")
+    else:
+        grammar = get_grammar(grammar_name)
+        if grammar is None:
+            raise ValueError(f"unknown manifest grammar {grammar_name}")
+    return grammar.parse(lines)
+
+
+def iter_manifest_texts(lines):
+    """
+    Split text with any number of manifests into the lines of each manifest, in one streaming pass. A manifest
+      starts at the start line of any grammar, once the current manifest has one.
+
+    :param lines: iterable of lines of text, e.g. an open file
+    :return: generator of tuples (number of the first line, list of the lines of a manifest)
+    """
+    first_line_num = 1
+    manifest_lines = []
+    has_start_line = False
+    for line_num, line in enumerate(lines, 1):
+        is_start_line = _start_pattern.search(line) is not None
+        if is_start_line and has_start_line:
+            yield first_line_num, manifest_lines
+            first_line_num, manifest_lines = line_num, []
+        has_start_line = has_start_line or is_start_line
+        manifest_lines.append(line)
+
+    if any(line.strip() for line in manifest_lines):
+        yield first_line_num, manifest_lines
+
+
+def iter_manifests(lines, grammar_name=None):
+    """
+    Read the week schedules of text with any number of manifests
+
+    :param lines: iterable of lines of text, e.g. an open file
+    :param grammar_name: name of the grammar of every manifest, auto-detected for each one by default
+    :return: generator of tuples (number of the first line, ManifestSchedule object or None, error string)
+    """
+    for line_num, manifest_lines in iter_manifest_texts(lines):
+        try:
+            schedule = parse_manifest(manifest_lines, grammar_name)
+        except ValueError as e:
+            yield line_num, None, str(e)
+            continue
+        logger.debug(
+            "Manifest at line {}: {} week of {}, {} days",
+            line_num,
+            schedule.grammar,
+            schedule.week_of_str,
+            len(schedule.days),
+        )
+        yield line_num, schedule, ""
+
+
+# rows of days, e.g. "Mon 0600-0900 14:00-16:30", under a "Week of MM/DD" or "Coord" line. A row starts with
+#   a whole day name or its abbreviation, "Monitor" or "Sunset" don't start a row
+register_grammar(
+    DayRowsGrammar(
+        "day_rows",
+        "a row of shifts for each day name, any number of shifts and days",
+        r"(?:Week of|Coord).*?(\d{1,2}/\d{1,2})",
+        r"\s*(mon(?:day)?|tue(?:s|sday)?|wed(?:nesday)?|thu(?:r|rs|rsday)?|fri(?:day)?"
+        r"|sat(?:urday)?|sun(?:day)?)\b\.?:?\s+(.*)",
+        r"(\d{1,2}):?(\d{2})\s*-\s*(\d{1,2}):?(\d{2})",
+    )
+)
+# the route manifest: the week date is on the "Coord" line, the morning shifts of the week then the
+#   afternoon shifts, 5 or 6 days
+register_grammar(
+    SlotColumnsGrammar(
+        "coord",
+        "morning then afternoon shifts in military hours under a Coord MM/DD line",
+        r"Coord.*?(\d{2}/\d{2})",
+        r"(\d{4})-(\d{4})",
+        (5, 6),
+    )
+)
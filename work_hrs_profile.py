@@ -0,0 +1,270 @@
+#######################################################
+# work_hrs_profile.py - Timing instrumentation for work_hours.py
+#######################################################
+# The entry points of work_hrs_help and the GUI handlers are wrapped with timed() or timer(). While timing is
+#   disabled, the default, a wrapped function costs one flag check. While enabled, the calls, time and rows of
+#   every name are collected, and each outermost timed call can be dumped to a cProfile stats file.
+import cProfile
+import functools
+import inspect
+import os
+import threading
+import time
+
+# environment variables: any value enables timing, a directory also dumps cProfile stats files in it
+PROFILE_ENV_VAR = "WORK_HOURS_PROFILE"
+PROFILE_DIR_ENV_VAR = "WORK_HOURS_PROFILE_DIR"
+
+_enabled = False
+_cprofile_dir = None
+# [calls, total seconds, max seconds, rows or None if not counted] by name
+_stats = {}
+_stats_lock = threading.Lock()
+# only one cProfile profiler can run at a time
+_cprofile_lock = threading.Lock()
+_num_dumps = 0
+# depth of the timed calls of each thread, only the outermost ones are dumped
+_thread_local = threading.local()
+
+
+def enable(cprofile_dir=None):
+    """
+    Start collecting timings
+
+    :param cprofile_dir: optional directory to dump a cProfile stats file of each outermost timed call in
+    :return: None
+    """
+    global _enabled, _cprofile_dir
+    if cprofile_dir is not None:
+        os.makedirs(cprofile_dir, exist_ok=True)
+    _cprofile_dir = cprofile_dir
+    _enabled = True
+
+
+def disable():
+    """stop collecting timings, the collected ones are kept"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    """return True if timings are collected"""
+    return _enabled
+
+
+def reset():
+    """drop the collected timings"""
+    with _stats_lock:
+        _stats.clear()
+
+
+def count_rows(result):
+    """return the rows of a DataFrame, the items of a list, the lines of a string, None for anything else"""
+    if isinstance(result, tuple):
+        return count_rows(result[0]) if result else None
+    if hasattr(result, "shape"):
+        return result.shape[0]
+    if isinstance(result, (list, dict, set)):
+        return len(result)
+    if isinstance(result, str):
+        return result.count("\n") + 1 if result else 0
+    return None
+
+
+def record(name, secs, rows=None):
+    """
+    Add a call to the timings of a name
+
+    :param name: name of the timed code
+    :param secs: seconds it took
+    :param rows: optional number of rows it handled
+    :return: None
+    """
+    with _stats_lock:
+        stats = _stats.setdefault(name, [0, 0.0, 0.0, None])
+        stats[0] += 1
+        stats[1] += secs
+        stats[2] = max(stats[2], secs)
+        if rows is not None:
+            stats[3] = (stats[3] or 0) + rows
+
+
+def _call_profiled(name, func, args, kwargs):
+    """call a function under cProfile and dump its stats, unless another call is already profiled"""
+    global _num_dumps
+    if not _cprofile_lock.acquire(blocking=False):
+        return func(*args, **kwargs)
+    try:
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            _num_dumps += 1
+            file_name = f"{_num_dumps:04}_{name.replace('.', '_')}.prof"
+            profiler.dump_stats(os.path.join(_cprofile_dir, file_name))
+    finally:
+        _cprofile_lock.release()
+
+
+def timed(name=None, rows=count_rows):
+    """
+    Decorator collecting the timings of a function. Generator functions are timed while they generate, not
+      while their caller uses the items, and their rows are the items generated.
+
+    :param name: name of the timings, defaults to the qualified name of the function
+    :param rows: function of the result returning the number of rows, defaults to count_rows()
+    :return: the decorator
+    """
+
+    def decorator(func):
+        timings_name = name or func.__qualname__
+
+        if inspect.isgeneratorfunction(func):
+
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return (yield from func(*args, **kwargs))
+                generator = func(*args, **kwargs)
+                secs = 0.0
+                num_items = 0
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            item = next(generator)
+                        except StopIteration as e:
+                            return e.value
+                        finally:
+                            secs += time.perf_counter() - start
+                        num_items += 1
+                        yield item
+                finally:
+                    generator.close()
+                    record(timings_name, secs, num_items)
+
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            depth = getattr(_thread_local, "depth", 0)
+            _thread_local.depth = depth + 1
+            start = time.perf_counter()
+            try:
+                if _cprofile_dir is not None and depth == 0:
+                    result = _call_profiled(timings_name, func, args, kwargs)
+                else:
+                    result = func(*args, **kwargs)
+            finally:
+                secs = time.perf_counter() - start
+                _thread_local.depth = depth
+            record(timings_name, secs, rows(result) if rows else None)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class Timer:
+    __slots__ = ("name", "rows", "_start")
+
+    def __init__(self, name):
+        """
+        Times a block of code, as a context manager or with start() and stop()
+
+        :param name: name of the timings
+        """
+        self.name = name
+        # set by the timed code to record the rows it handled
+        self.rows = None
+        self._start = None
+
+    def start(self):
+        """start timing, return self"""
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self):
+        """stop timing and record the time since start(), if it was started"""
+        if self._start is not None:
+            record(self.name, time.perf_counter() - self._start, self.rows)
+            self._start = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+class NullTimer:
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        """A Timer that records nothing, returned by timer() while timing is disabled"""
+        self.rows = None
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+def timer(name):
+    """
+    Time a block of code, e.g. with timer("Tk update"): ...
+
+    :param name: name of the timings
+    :return: a Timer object, NULL_TIMER while timing is disabled
+    """
+    return Timer(name) if _enabled else NULL_TIMER
+
+
+def get_summary_str():
+    """
+    Format the collected timings, slowest total first
+
+    :return: string with a line of calls, total, mean and max milliseconds and rows for each name
+    """
+    with _stats_lock:
+        stats_items = sorted(_stats.items(), key=lambda item: item[1][1], reverse=True)
+    if not stats_items:
+        return "No timings collected"
+    name_width = max(len(name) for name, _ in stats_items)
+    lines = [
+        f"{'name':<{name_width}}  {'calls':>7}  {'total ms':>10}  {'mean ms':>9}"
+        f"  {'max ms':>9}  {'rows':>9}"
+    ]
+    for name, (calls, total_secs, max_secs, rows) in stats_items:
+        lines.append(
+            f"{name:<{name_width}}  {calls:>7}  {total_secs * 1000:>10.1f}"
+            f"  {total_secs * 1000 / calls:>9.2f}  {max_secs * 1000:>9.2f}"
+            f"  {'' if rows is None else rows:>9}"
+        )
+    return "\n".join(lines)
+
+
+if os.environ.get(PROFILE_DIR_ENV_VAR) or os.environ.get(PROFILE_ENV_VAR):
+    # loguru is only imported when timing is enabled, work_hours.py imports this module before its first frame
+    from loguru import logger
+
+if os.environ.get(PROFILE_DIR_ENV_VAR):
+    enable(os.environ[PROFILE_DIR_ENV_VAR])
+    logger.info("Timing enabled, cProfile stats in {}", _cprofile_dir)
+elif os.environ.get(PROFILE_ENV_VAR):
+    enable()
+    logger.info("Timing enabled")